@@ -0,0 +1,66 @@
+"""
+Command line interface.
+
+    python -m agh_graphs run script.json [--output result.vtk] [--format vtk] [--layer 2]
+
+runs a derivation script (see `agh_graphs.script`), prints a report of the
+time taken by each production and the size of the graph, and optionally
+writes the result. Graphs are written as `npz` (see
+`agh_graphs.storage.save_graph`) or `columnar` (a directory, see
+`agh_graphs.storage.save_columnar`); meshes as `vtk`, `obj` or `msh` (the
+leaf mesh, or the mesh of `--layer` if given).
+"""
+import argparse
+import os
+import sys
+import time
+
+from agh_graphs.mesh import WRITERS, layer_mesh, leaf_mesh
+from agh_graphs.script import load_script, run_script, format_report
+from agh_graphs.storage import save_graph, save_columnar
+
+FORMATS = ['npz', 'columnar'] + list(WRITERS)
+
+
+def write_result(graph, path, output_format: str = None, layer: int = None):
+    """
+    Writes `graph` to `path` in `output_format`, by default given by the
+    extension of `path` (`columnar` for paths without an extension).
+    """
+    if output_format is None:
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        output_format = extension or 'columnar'
+    if output_format == 'npz':
+        save_graph(graph, path)
+    elif output_format == 'columnar':
+        save_columnar(graph, path)
+    elif output_format in WRITERS:
+        mesh = leaf_mesh(graph) if layer is None else layer_mesh(graph, layer)
+        WRITERS[output_format](mesh, path)
+    else:
+        raise ValueError('unknown format {}'.format(output_format))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m agh_graphs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run a derivation script')
+    run.add_argument('script', help='path to the JSON script')
+    run.add_argument('--output', '-o', help='path to write the result to')
+    run.add_argument('--format', '-f', choices=FORMATS, help='format of the result (by default from the extension)')
+    run.add_argument('--layer', type=int, help='layer to export as a mesh (the leaf mesh by default)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    graph, reports = run_script(load_script(args.script))
+    print(format_report(reports))
+    print('\n{} steps, {} vertexes, {} edges in {:.3f} s'.format(
+        len(reports), graph.number_of_nodes(), graph.number_of_edges(), time.perf_counter() - start))
+
+    if args.output:
+        write_result(graph, args.output, args.format, args.layer)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
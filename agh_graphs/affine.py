@@ -0,0 +1,137 @@
+"""
+Tracing of positions as affine combinations of anchor positions.
+
+Every position created by the productions is a midpoint, a centroid or a
+copy of other positions. When the coordinates of the anchor positions are
+replaced by `AffineScalar`s, the productions compute, along with the actual
+values, the coefficients of each new coordinate with respect to the anchors.
+"""
+import numpy as np
+
+
+class AffineScalar:
+    """
+    A number together with its coefficients with respect to the anchors.
+
+    `coefficients` has one element per anchor, followed by the constant term.
+    Comparisons, hashing and conversion to `float` use only the value, so the
+    productions can make their decisions as if plain numbers were used.
+    Operations which are not affine (e.g. multiplying two traced numbers)
+    return a plain `float`.
+    """
+    __slots__ = ('value', 'coefficients')
+
+    def __init__(self, value, coefficients):
+        self.value = value
+        self.coefficients = coefficients
+
+    def __add__(self, other):
+        if isinstance(other, AffineScalar):
+            return AffineScalar(self.value + other.value, self.coefficients + other.coefficients)
+        coefficients = self.coefficients.copy()
+        coefficients[-1] += other
+        return AffineScalar(self.value + other, coefficients)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return AffineScalar(-self.value, -self.coefficients)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, AffineScalar):
+            return self.value * other.value
+        return AffineScalar(self.value * other, self.coefficients * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, AffineScalar):
+            return self.value / other.value
+        return AffineScalar(self.value / other, self.coefficients / other)
+
+    def __rtruediv__(self, other):
+        return other / self.value
+
+    def __pow__(self, power):
+        return self.value ** power
+
+    def __abs__(self):
+        return abs(self.value)
+
+    def __float__(self):
+        return float(self.value)
+
+    def __eq__(self, other):
+        return self.value == value_of(other)
+
+    def __lt__(self, other):
+        return self.value < value_of(other)
+
+    def __le__(self, other):
+        return self.value <= value_of(other)
+
+    def __gt__(self, other):
+        return self.value > value_of(other)
+
+    def __ge__(self, other):
+        return self.value >= value_of(other)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'AffineScalar({!r})'.format(self.value)
+
+
+def value_of(x):
+    """
+    Returns the value of `x`, which may be traced or not.
+    """
+    if isinstance(x, AffineScalar):
+        return x.value
+    return x
+
+
+def is_traced(position) -> bool:
+    """
+    Checks whether any coordinate of `position` is traced.
+    """
+    return any(isinstance(x, AffineScalar) for x in position)
+
+
+def trace_position(position, index: int, size: int):
+    """
+    Returns `position` traced as the `index`-th of `size` anchors.
+    """
+    traced = []
+    for value in position:
+        coefficients = np.zeros(size + 1)
+        coefficients[index] = 1.0
+        traced.append(AffineScalar(value, coefficients))
+    return tuple(traced)
+
+
+def coefficients_of(x, size: int) -> np.ndarray:
+    """
+    Returns coefficients of `x` with respect to `size` anchors.
+
+    Numbers which are not traced are constant.
+    """
+    if isinstance(x, AffineScalar):
+        return x.coefficients
+    coefficients = np.zeros(size + 1)
+    coefficients[-1] = x
+    return coefficients
+
+
+def untrace_position(position):
+    """
+    Returns `position` with plain values instead of traced ones.
+    """
+    return tuple(value_of(x) for x in position)
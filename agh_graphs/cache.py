@@ -0,0 +1,139 @@
+"""
+Content-addressed cache of results of derivations.
+
+A result is identified by the structural hash of the input graph (see
+`agh_graphs.hashing`), the identity of the derivation (its class and its
+`version` attribute) and the parameters of its `run` method. Results are
+stored in a directory as `.npz` files (see `agh_graphs.storage`); the least
+recently used ones are removed when the directory grows over `max_bytes`.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.hashing import StructuralHash, structural_hash
+from agh_graphs.storage import arrays_to_graph, save_graph
+from agh_graphs.utils import gen_name
+
+
+class DerivationCache:
+    """
+    Runs derivations, reusing results stored in `directory`.
+
+    Only the `layer`, `position` and `label` attributes of vertices are
+    cached, and positions of cached results are `float`s. The derivation
+    should not depend on anything except the input graph, its `version`
+    and its parameters, and `version` has to be changed whenever the
+    derivation changes its results.
+    """
+
+    def __init__(self, directory, max_bytes: int = 2 ** 30, decimals: int = 9):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, derivation, graph: Graph, **params) -> str:
+        """
+        Returns the key of the result of `derivation.run(graph, **params)`.
+        """
+        derivation_class = type(derivation)
+        identity = (
+            structural_hash(graph, decimals=self.decimals).hexdigest(),
+            derivation_class.__module__ + '.' + derivation_class.__qualname__,
+            getattr(derivation, 'version', None),
+            sorted(params.items()),
+        )
+        return hashlib.sha256(repr(identity).encode()).hexdigest()
+
+    def run(self, derivation, graph: Graph, **params):
+        """
+        Transforms `graph` in place as `derivation.run(graph, **params)`
+        would do, loading the result if it is cached.
+
+        Vertices of `graph` which are kept by the derivation keep their ids,
+        new vertices get new ones.
+        """
+        path = self.__path(self.key(derivation, graph, **params))
+        if os.path.exists(path):
+            self.hits += 1
+            with np.load(path) as arrays:
+                self.__load(graph, arrays)
+            os.utime(path)
+            return
+
+        self.misses += 1
+        inputs = list(graph.nodes())
+        input_graph = Graph()
+        input_graph.add_nodes_from(graph.nodes(data=True))
+        derivation.run(graph, **params)
+
+        source = {v: k for k, v in enumerate(inputs)}
+        # a unique temporary file, so concurrent writers of the same result do not clash
+        fd, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                save_graph(graph, file,
+                           source=np.array([source.get(v, -1) for v in graph.nodes()], dtype=np.int64),
+                           **{'input_' + name: column for name, column in _input_columns(input_graph).items()})
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the cache takes at
+        most `max_bytes`.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def __load(self, graph: Graph, arrays):
+        h = StructuralHash(decimals=self.decimals)
+        by_signature = {}
+        for v, data in graph.nodes(data=True):
+            by_signature.setdefault(h.signature(data), []).append(v)
+
+        input_ids = [by_signature[h.signature(data)].pop()
+                     for data in _input_rows(arrays)]
+        ids = [input_ids[k] if k >= 0 else gen_name() for k in arrays['source'].tolist()]
+
+        kept = set(ids)
+        graph.remove_edges_from(list(graph.edges()))
+        graph.remove_nodes_from([v for v in list(graph.nodes()) if v not in kept])
+        arrays_to_graph(arrays, graph, ids)
+
+
+def _input_columns(graph: Graph) -> dict:
+    node_data = [data for _, data in graph.nodes(data=True)]
+    return {
+        'layer': np.array([data['layer'] for data in node_data], dtype=np.int32),
+        'position': np.array([data['position'] for data in node_data], dtype=np.float64).reshape(-1, 2),
+        'label': np.array([data['label'] for data in node_data], dtype=str),
+    }
+
+
+def _input_rows(arrays) -> list:
+    return [{'layer': layer, 'position': position, 'label': label}
+            for layer, position, label in zip(arrays['input_layer'].tolist(), arrays['input_position'].tolist(),
+                                              arrays['input_label'].tolist())]
@@ -0,0 +1,133 @@
+"""
+Checkpointing of long sequences of productions.
+
+`Checkpointing` is a hook of `agh_graphs.production.SequenceRun` which
+periodically (or when a signal is received) writes a checkpoint: the
+graph (see `agh_graphs.storage`) together with the state of the run, i.e.
+the number of applied steps, the vertexes returned by them (which are
+inputs of further steps) and the state of a random number generator.
+Checkpoints are written between steps, to a temporary file which then
+replaces the previous checkpoint, so a checkpoint is always consistent.
+
+When a checkpoint exists, the run is resumed from it, so a run which was
+interrupted gives the same graph as an uninterrupted one.
+`run_with_checkpoints` applies steps with just this hook.
+Graphs with exact positions cannot be checkpointed, since the storage
+rejects them.
+"""
+import json
+import os
+import random
+import signal
+import tempfile
+from typing import List
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.production import Step, StepHook, apply_sequence
+from agh_graphs.storage import arrays_to_graph, save_graph
+
+
+class Checkpointing(StepHook):
+    """
+    Writes checkpoints of a run to `path` after every `interval` steps and
+    after each step during which one of `signals` was received. `rng` (a
+    `random.Random` or a `numpy.random.Generator`) is saved and restored
+    along with the graph.
+
+    If `path` exists when the run starts, its graph and `rng` are replaced
+    with the checkpointed ones and the run continues from the checkpointed
+    step. The last checkpoint is kept after the run.
+
+    Only the `layer`, `position` and `label` attributes of vertexes are
+    checkpointed, and positions are checkpointed as `float`s.
+    """
+
+    def __init__(self, path, interval: int = None, signals=(), rng=None):
+        self.path = path
+        self.interval = interval
+        self.signals = signals
+        self.rng = rng
+        self.__requested = []
+        self.__previous_handlers = {}
+
+    def start(self, run):
+        if os.path.exists(self.path):
+            run.prod_input, run.outputs = load_checkpoint(self.path, run.graph, self.rng)
+        self.__previous_handlers = {s: signal.signal(s, lambda signum, frame: self.__requested.append(signum))
+                                    for s in self.signals}
+
+    def after_step(self, run, step, step_input, step_output):
+        if self.__requested or (self.interval and len(run.outputs) % self.interval == 0):
+            self.__requested.clear()
+            save_checkpoint(self.path, run.graph, run.prod_input, run.outputs, self.rng)
+
+    def close(self, run):
+        for s, handler in self.__previous_handlers.items():
+            signal.signal(s, handler)
+        self.__previous_handlers = {}
+
+
+def run_with_checkpoints(graph: Graph, steps: List[Step], prod_input: List[str], path, interval: int = None,
+                         signals=(), rng=None, **kwargs) -> List[List[str]]:
+    """
+    Applies productions of `steps` on `graph` (see
+    `agh_graphs.production.apply_sequence`), writing checkpoints to `path`
+    (see `Checkpointing`).
+
+    Returns lists of vertexes returned by each step.
+    """
+    return apply_sequence(graph, steps, prod_input, [Checkpointing(path, interval, signals, rng)], **kwargs)
+
+
+def save_checkpoint(path, graph: Graph, prod_input: List[str], outputs: List[List[str]], rng=None):
+    """
+    Atomically writes a checkpoint of a run to `path`.
+    """
+    state = {
+        'prod_input': list(prod_input),
+        'outputs': outputs,
+        'rng': __rng_state(rng),
+    }
+    fd, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(str(path)) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            save_graph(graph, file, state=np.array(json.dumps(state)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def load_checkpoint(path, graph: Graph, rng=None):
+    """
+    Replaces `graph` and the state of `rng` with the ones checkpointed at
+    `path`. Returns the input of the run and the vertexes returned by
+    the applied steps.
+    """
+    with np.load(path) as arrays:
+        graph.clear()
+        arrays_to_graph(arrays, graph)
+        state = json.loads(arrays['state'].item())
+    if rng is not None:
+        __set_rng_state(rng, state['rng'])
+    return state['prod_input'], state['outputs']
+
+
+def __rng_state(rng):
+    if rng is None:
+        return None
+    if isinstance(rng, random.Random):
+        return rng.getstate()
+    return rng.bit_generator.state
+
+
+def __set_rng_state(rng, state):
+    if isinstance(rng, random.Random):
+        version, internal_state, gauss_next = state
+        rng.setstate((version, tuple(internal_state), gauss_next))
+    else:
+        rng.bit_generator.state = state
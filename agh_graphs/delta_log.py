@@ -0,0 +1,415 @@
+"""
+Append-only binary log of derivations.
+
+The log starts with the file header `MAGIC`, followed by a sequence of
+records, each made of a header (kind, step and length of the payload) and
+a payload of fields: arrays of `int64` or `float64` numbers or lists of
+strings and ints (ids of vertexes have to be either). Vertexes are referred
+to by integers, which are valid until the next snapshot; their ids are
+stored only once, when they are created.
+
+A `DELTA` record stores a `agh_graphs.stream.Delta`, a `SNAPSHOT` record
+stores the whole graph. The log starts with a snapshot of the initial graph
+and further snapshots may be written periodically, so a state can be
+rebuilt by reading the nearest preceding snapshot and the deltas after it.
+A truncated record at the end of the log (e.g. after a crash) is ignored,
+so if it is a snapshot, the state is rebuilt from the previous one.
+
+A log may be continued by a restarted run (see `DeltaLogWriter`), which
+appends a snapshot of the state it restarts from. Deltas of the steps
+which are repeated after the restart stay in the log before that snapshot,
+so `replay_log` never applies them, but `read_deltas` yields them.
+
+Only the `layer`, `position` and `label` attributes of vertexes are logged,
+and positions are logged as `float64`, so exact positions (see
+`agh_graphs.utils.is_exact`) are rejected instead of being rounded.
+
+Run this module to rebuild a state from a log, e.g.
+
+    python -m agh_graphs.delta_log derivation.log graph.npz --step 3
+"""
+import argparse
+import os
+import struct
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.production import StepHook
+from agh_graphs.stream import Delta, Streaming
+from agh_graphs.storage import save_graph
+from agh_graphs.utils import reject_exact
+
+SNAPSHOT = 1
+DELTA = 2
+
+# index of removed vertexes among fields of a delta
+REMOVED_NODES = 10
+
+MAGIC = b'AGHDLOG1'
+HEADER = struct.Struct('<BQQ')
+FIELD_HEADER = struct.Struct('<cQ')
+
+
+class DeltaLogWriter(StepHook):
+    """
+    Writes deltas of derivations of `graph` to the log at `path`, starting
+    with a snapshot of `graph`. Deltas have to be written after they are
+    applied to `graph`.
+
+    If `snapshot_interval` is given, a snapshot of `graph` is written after
+    every `snapshot_interval` deltas.
+
+    If `append` is set and the log exists, it is continued instead of being
+    replaced: a truncated record at its end is dropped and a snapshot of
+    `graph` is appended, so the state of `graph` may be older than the last
+    record (e.g. restored from a checkpoint). Steps are counted from `step`,
+    by default from the last record.
+
+    The writer is also a hook of `agh_graphs.production.SequenceRun`, which
+    writes the delta of each step (see `agh_graphs.stream.Streaming`). If
+    `graph` is not given, the log is opened when the run starts, with the
+    graph of the run and its number of applied steps as `step`, so with
+    `append` set a run resumed e.g. by `agh_graphs.checkpoint.Checkpointing`
+    (preceding the writer among the hooks) continues its log.
+    """
+
+    def __init__(self, path, graph: Graph = None, snapshot_interval: int = None, append: bool = False,
+                 step: int = None, radius: int = 2):
+        self.path = path
+        self.graph = None
+        self.snapshot_interval = snapshot_interval
+        self.append = append
+        self.steps = 0
+        self.__streaming = Streaming(radius)
+        self.__ids = {}
+        self.__next_id = 0
+        self.__file = None
+        if graph is not None:
+            self.open(graph, step)
+
+    def open(self, graph: Graph, step: int = None):
+        """
+        Opens the log for `graph` and appends a snapshot of it.
+        """
+        self.graph = graph
+        last_step = None
+        if self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            length, last_step = _complete_records(self.path)
+            self.__file = open(self.path, 'r+b')
+            self.__file.truncate(length)
+            self.__file.seek(length)
+        else:
+            self.__file = open(self.path, 'wb')
+            self.__file.write(MAGIC)
+        self.steps = step if step is not None else last_step or 0
+        self.__ids = {}
+        self.__next_id = 0
+        self.snapshot()
+
+    def write(self, delta: Delta):
+        """
+        Appends `delta` to the log.
+        """
+        ids = self.__ids
+        for v in delta.created_nodes:
+            ids[v] = self.__new_id()
+        created = list(delta.created_nodes.values())
+        relabels = list(delta.relabels.items())
+        moves = list(delta.moves.items())
+
+        self.__write_record(DELTA, self.steps, [
+            [str(delta.production)],
+            _int_array(ids[v] for v in delta.inputs),
+            _int_array(ids[v] for v in delta.outputs),
+            list(delta.created_nodes),
+            _int_array(ids[v] for v in delta.created_nodes),
+            _int_array(data['layer'] for data in created),
+            _position_array(data['position'] for data in created),
+            [data['label'] for data in created],
+            _int_array(ids[v] for e in delta.created_edges for v in e),
+            _int_array(ids[v] for e in delta.removed_edges for v in e),
+            _int_array(ids[v] for v in delta.removed_nodes),
+            _int_array(ids[v] for pair in delta.merged_nodes.items() for v in pair),
+            _int_array(ids[v] for v, _ in relabels),
+            [label for _, label in relabels],
+            _int_array(ids[v] for v, _ in moves),
+            _position_array(position for _, position in moves),
+        ])
+        for v in delta.removed_nodes:
+            del ids[v]
+
+        self.steps += 1
+        if self.snapshot_interval and self.steps % self.snapshot_interval == 0:
+            self.snapshot()
+
+    def snapshot(self):
+        """
+        Appends a snapshot of the graph to the log.
+        """
+        ids = self.__ids
+        for v in self.graph.nodes():
+            if v not in ids:
+                ids[v] = self.__new_id()
+        node_data = self.graph.nodes(data=True)
+        nodes = list(self.graph.nodes())
+
+        self.__write_record(SNAPSHOT, self.steps, [
+            nodes,
+            _int_array(ids[v] for v in nodes),
+            _int_array(node_data[v]['layer'] for v in nodes),
+            _position_array(node_data[v]['position'] for v in nodes),
+            [node_data[v]['label'] for v in nodes],
+            _int_array(ids[v] for e in self.graph.edges() for v in e),
+        ])
+
+    def close(self, run=None):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def start(self, run):
+        if self.graph is None:
+            self.open(run.graph, len(run.outputs))
+
+    def before_step(self, run, step, step_input):
+        self.__streaming.before_step(run, step, step_input)
+
+    def after_step(self, run, step, step_input, step_output):
+        self.__streaming.after_step(run, step, step_input, step_output)
+        self.write(self.__streaming.delta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __new_id(self) -> int:
+        self.__next_id += 1
+        return self.__next_id - 1
+
+    def __write_record(self, kind: int, step: int, fields):
+        payload = b''.join(_encode_field(field) for field in fields)
+        self.__file.write(HEADER.pack(kind, step, len(payload)))
+        self.__file.write(payload)
+        self.__file.flush()
+
+
+def read_records(path, start: int = None):
+    """
+    Yields records `(kind, step, fields)` of the log at `path`, starting at
+    byte offset `start` (at the first record by default).
+    """
+    with open(path, 'rb') as file:
+        _check_magic(file)
+        if start is not None:
+            file.seek(start)
+        while True:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, step, length = HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield kind, step, _decode_fields(payload)
+
+
+def snapshot_offsets(path) -> list:
+    """
+    Returns pairs `(step, offset)` of complete snapshots in the log at
+    `path`, reading only the headers of records.
+    """
+    return [(step, offset) for kind, step, offset, _ in _record_headers(path) if kind == SNAPSHOT]
+
+
+def _record_headers(path):
+    """
+    Yields `(kind, step, offset, length)` of complete records in the log at
+    `path`.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        _check_magic(file)
+        offset = len(MAGIC)
+        while True:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, step, length = HEADER.unpack(header)
+            if offset + HEADER.size + length > size:
+                return
+            yield kind, step, offset, HEADER.size + length
+            offset += HEADER.size + length
+            file.seek(offset)
+
+
+def _complete_records(path):
+    """
+    Returns the length of the complete records of the log at `path` and the
+    step following them.
+    """
+    length = len(MAGIC)
+    step = None
+    for kind, record_step, offset, record_length in _record_headers(path):
+        length = offset + record_length
+        step = record_step + 1 if kind == DELTA else record_step
+    return length, step
+
+
+def _check_magic(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError('{} is not a delta log'.format(file.name))
+
+
+def replay_log(path, step: int = None, graph: Graph = None) -> Graph:
+    """
+    Rebuilds the graph after `step` deltas (after all deltas by default)
+    from the log at `path`, starting from the nearest preceding snapshot.
+    Vertexes are added to `graph` (a new `Graph` by default).
+    """
+    if graph is None:
+        graph = Graph()
+    offset = max((o for s, o in snapshot_offsets(path) if step is None or s <= step), default=None)
+
+    names = {}
+    started = False
+    for kind, record_step, fields in read_records(path, offset):
+        if kind == SNAPSHOT:
+            # later snapshots only renumber the vertexes
+            _apply_snapshot(None if started else graph, names, fields)
+            started = True
+        elif kind == DELTA:
+            if step is not None and record_step >= step:
+                break
+            _apply_delta(graph, names, fields)
+    return graph
+
+
+def read_deltas(path):
+    """
+    Yields deltas stored in the log at `path`, with names of productions
+    instead of productions and without attributes of created vertexes other
+    than `layer`, `position` and `label`.
+    """
+    names = {}
+    for kind, _, fields in read_records(path):
+        if kind == SNAPSHOT:
+            _apply_snapshot(None, names, fields)
+        else:
+            yield _to_delta(names, fields)
+            for v in fields[REMOVED_NODES].tolist():
+                del names[v]
+
+
+def _apply_snapshot(graph, names: dict, fields):
+    node_names, ids, layers, positions, labels, edges = fields
+    names.clear()
+    names.update(zip(ids.tolist(), node_names))
+    if graph is None:
+        return
+    graph.clear()
+    graph.add_nodes_from(
+        (v, {'layer': layer, 'position': (x, y), 'label': label})
+        for v, layer, (x, y), label in zip(node_names, layers.tolist(), positions.reshape(-1, 2).tolist(), labels))
+    graph.add_edges_from(_name_pairs(names, edges))
+
+
+def _apply_delta(graph: Graph, names: dict, fields):
+    delta = _to_delta(names, fields)
+    graph.add_nodes_from(delta.created_nodes.items())
+    graph.remove_edges_from(e for e in delta.removed_edges if graph.has_edge(*e))
+    graph.add_edges_from(delta.created_edges)
+    for v, label in delta.relabels.items():
+        graph.nodes[v]['label'] = label
+    for v, position in delta.moves.items():
+        graph.nodes[v]['position'] = position
+    graph.remove_nodes_from(delta.removed_nodes)
+    for v in fields[REMOVED_NODES].tolist():
+        del names[v]
+
+
+def _to_delta(names: dict, fields) -> Delta:
+    [production], inputs, outputs, created_names, created_ids, layers, positions, labels, created_edges, \
+        removed_edges, removed_nodes, merged_nodes, relabel_ids, relabel_labels, move_ids, move_positions = fields
+
+    names.update(zip(created_ids.tolist(), created_names))
+    delta = Delta(production, [names[v] for v in inputs.tolist()], [names[v] for v in outputs.tolist()])
+    delta.created_nodes = {
+        v: {'layer': layer, 'position': (x, y), 'label': label}
+        for v, layer, (x, y), label in zip(created_names, layers.tolist(), positions.reshape(-1, 2).tolist(), labels)}
+    delta.created_edges = _name_pairs(names, created_edges)
+    delta.removed_edges = _name_pairs(names, removed_edges)
+    delta.removed_nodes = [names[v] for v in removed_nodes.tolist()]
+    delta.merged_nodes = dict(_name_pairs(names, merged_nodes))
+    delta.relabels = {names[v]: label for v, label in zip(relabel_ids.tolist(), relabel_labels)}
+    delta.moves = {names[v]: (x, y) for v, (x, y) in zip(move_ids.tolist(), move_positions.reshape(-1, 2).tolist())}
+    return delta
+
+
+def _name_pairs(names: dict, pairs: np.ndarray) -> list:
+    return [(names[u], names[v]) for u, v in pairs.reshape(-1, 2).tolist()]
+
+
+def _int_array(values) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int64)
+
+
+def _position_array(positions) -> np.ndarray:
+    positions = list(positions)
+    reject_exact(positions, 'the delta log')
+    return np.array([float(c) for p in positions for c in p], dtype=np.float64)
+
+
+def _encode_field(field) -> bytes:
+    if isinstance(field, np.ndarray):
+        code = b'q' if field.dtype == np.int64 else b'd'
+        return FIELD_HEADER.pack(code, len(field)) + field.tobytes()
+    data = '\0'.join(_tagged(value) for value in field).encode()
+    return FIELD_HEADER.pack(b's', len(field)) + struct.pack('<Q', len(data)) + data
+
+
+def _tagged(value) -> str:
+    # strings and ints are told apart by a tag, so ids of both types round-trip
+    if isinstance(value, str):
+        return 's' + value
+    if isinstance(value, int):
+        return 'i' + str(value)
+    raise ValueError('ids of vertexes have to be ints or strings')
+
+
+def _untagged(value: str):
+    return value[1:] if value[0] == 's' else int(value[1:])
+
+
+def _decode_fields(payload: bytes) -> list:
+    fields = []
+    offset = 0
+    while offset < len(payload):
+        code, count = FIELD_HEADER.unpack_from(payload, offset)
+        offset += FIELD_HEADER.size
+        if code == b's':
+            [length] = struct.unpack_from('<Q', payload, offset)
+            offset += 8
+            data = payload[offset:offset + length].decode()
+            fields.append([_untagged(value) for value in data.split('\0')] if count else [])
+            offset += length
+        else:
+            dtype = np.int64 if code == b'q' else np.float64
+            fields.append(np.frombuffer(payload, dtype=dtype, count=count, offset=offset))
+            offset += 8 * count
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuilds a graph from a derivation log.')
+    parser.add_argument('log', help='path to the log')
+    parser.add_argument('output', help='path to the .npz file to write the graph to')
+    parser.add_argument('--step', type=int, default=None, help='number of deltas to replay (all by default)')
+    args = parser.parse_args()
+    save_graph(replay_log(args.log, args.step), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,53 @@
+import functools
+
 from matplotlib import pyplot
 from networkx import Graph
 
+from agh_graphs.macro_production import MacroProduction
+from agh_graphs.production import Step, SequenceRun
 from agh_graphs.productions.p1 import P1
 from agh_graphs.productions.p12 import P12
 from agh_graphs.productions.p9 import P9
+from agh_graphs.stream import stream_sequence
 from agh_graphs.utils import gen_name
 from agh_graphs.visualize import visualize_graph_layer, visualize_graph_3d
 
 
+@functools.lru_cache(maxsize=None)
+def derivation_a_macro() -> MacroProduction:
+    """
+    Returns the whole derivation A fused into a single macro-production.
+    The macro-production is shared, so it is recorded only once.
+    """
+    lhs = Graph()
+    lhs.add_node('e', layer=0, position=(0.5, 0.5), label='E')
+    steps = [
+        Step(P1(), [(-1, 0)]),
+        Step(P9(), [(0, 0)]),
+        Step(P9(), [(0, 1)]),
+        Step(P12(), [(0, 0), (0, 1), (1, 0), (2, 0)]),
+    ]
+    return MacroProduction(lhs, ['e'], steps, outputs=[(1, 0), (2, 0)])
+
+
 class DerivationA:
+    version = 1
 
-    def __init__(self, visualize=False):
+    def __init__(self, visualize=False, fused=False):
         self.visualize = visualize
+        self.fused = fused
 
     def run(self, graph, p1_positions):
         assert len(graph.nodes()) == 1
         initial_node_name = list(graph.nodes())[0]
         self.visualize_if_enabled(graph)
 
-        [i1, i2] = P1().apply(graph, [initial_node_name], positions=p1_positions)
-        self.visualize_if_enabled(graph)
-
-        [i1_] = P9().apply(graph, [i1])
-        self.visualize_if_enabled(graph)
-
-        [i2_] = P9().apply(graph, [i2])
-        self.visualize_if_enabled(graph)
-
-        [] = P12().apply(graph, [i1, i2, i1_, i2_])
-        self.visualize_if_enabled(graph)
+        if self.fused:
+            derivation_a_macro().apply(graph, [initial_node_name], positions=p1_positions)
+            self.visualize_if_enabled(graph)
+        else:
+            for _ in SequenceRun(graph, derivation_a_macro().steps, [initial_node_name], positions=p1_positions):
+                self.visualize_if_enabled(graph)
 
         if self.visualize:
             visualize_graph_layer(graph, 0)
@@ -40,6 +59,16 @@ class DerivationA:
             visualize_graph_layer(graph, 2)
             pyplot.show()
 
+    @staticmethod
+    def stream(graph, p1_positions):
+        """
+        Runs the derivation production by production, yielding a `Delta`
+        (see `agh_graphs.stream`) after each production.
+        """
+        assert len(graph.nodes()) == 1
+        initial_node_name = list(graph.nodes())[0]
+        yield from stream_sequence(graph, derivation_a_macro().steps, [initial_node_name], positions=p1_positions)
+
     def visualize_if_enabled(self, graph):
         if self.visualize:
             visualize_graph_3d(graph)
@@ -0,0 +1,110 @@
+"""
+Cached geometry of triangles represented by interiors.
+
+The geometry of an interior is computed lazily and cached per graph object,
+so copies of a graph do not share their caches. A cached geometry is
+recomputed when the neighbors of its interior changed or any of its corners
+was moved. Geometries of removed interiors are evicted once the cache holds
+more entries than the graph has vertexes.
+"""
+import math
+import weakref
+
+from networkx import Graph
+
+from agh_graphs.utils import get_neighbors_at, angle_with_x_axis
+
+
+class TriangleGeometry:
+    """
+    Geometry of a triangle represented by an interior.
+
+    `corners` are ids of the corners in counterclockwise order and
+    `positions` are their positions. Edge `k` connects `corners[k]` and
+    `corners[(k + 1) % 3]`; `edge_lengths` and `edge_angles` (0-180, see
+    `angle_with_x_axis`) are given for each edge and `longest_edge` is the
+    index of the longest one.
+
+    `neighbors` are the corners in the order returned by `get_neighbors_at`;
+    `orientation` is `1` if they are in counterclockwise order, `-1` if they
+    are in clockwise order and `0` if the triangle is degenerate.
+    """
+    __slots__ = ('neighbors', 'corners', 'positions', 'area', 'edge_lengths', 'edge_angles', 'longest_edge',
+                 'orientation')
+
+    def __init__(self, corners, positions):
+        self.neighbors = tuple(corners)
+        (ax, ay), (bx, by), (cx, cy) = positions
+        doubled_area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        self.orientation = (doubled_area > 0) - (doubled_area < 0)
+        if self.orientation < 0:
+            corners = (corners[0], corners[2], corners[1])
+            positions = (positions[0], positions[2], positions[1])
+
+        self.corners = tuple(corners)
+        self.positions = tuple(positions)
+        self.area = abs(doubled_area) / 2
+        self.edge_lengths = tuple(math.dist(positions[k], positions[(k + 1) % 3]) for k in range(3))
+        self.edge_angles = tuple(angle_with_x_axis(positions[k], positions[(k + 1) % 3]) for k in range(3))
+        self.longest_edge = max(range(3), key=lambda k: self.edge_lengths[k])
+
+    def edge_index(self, a, b) -> int:
+        """
+        Returns the index of the edge between corners `a` and `b`.
+        """
+        for k in range(3):
+            if {self.corners[k], self.corners[(k + 1) % 3]} == {a, b}:
+                return k
+        raise ValueError('{} and {} are not corners of the triangle'.format(a, b))
+
+    def opposite_corner(self, edge: int):
+        """
+        Returns the corner which is not on the edge `edge`.
+        """
+        return self.corners[(edge + 2) % 3]
+
+    def is_valid(self, graph: Graph, neighbors) -> bool:
+        """
+        Checks whether `neighbors` of the interior (as returned by
+        `get_neighbors_at`) are the corners and they are still at the same
+        positions in `graph`.
+        """
+        if tuple(neighbors) != self.neighbors:
+            return False
+        node_positions = graph.nodes(data='position')
+        return all(node_positions[v] == p for v, p in zip(self.corners, self.positions))
+
+
+__caches = weakref.WeakKeyDictionary()
+
+
+def triangle_geometry(graph: Graph, interior: str) -> TriangleGeometry:
+    """
+    Returns the geometry of the triangle represented by `interior`, which
+    has to have 3 neighbors on its layer.
+    """
+    cache = __caches.setdefault(graph, {})
+    neighbors = get_neighbors_at(graph, interior, graph.nodes[interior]['layer'])
+    geometry = cache.get(interior)
+    if geometry is None or not geometry.is_valid(graph, neighbors):
+        if len(neighbors) != 3:
+            raise ValueError('interior with wrong number of edges')
+        if len(cache) > graph.number_of_nodes():
+            for v in [v for v in cache if v not in graph]:
+                del cache[v]
+        positions = [graph.nodes[v]['position'] for v in neighbors]
+        geometry = TriangleGeometry(neighbors, positions)
+        cache[interior] = geometry
+    return geometry
+
+
+def invalidate_geometry(graph: Graph, interior: str = None):
+    """
+    Removes the cached geometry of `interior` or, if it is `None`, of all
+    interiors of `graph`.
+    """
+    cache = __caches.get(graph, {})
+    if interior is None:
+        cache.clear()
+    else:
+        cache.pop(interior, None)
@@ -0,0 +1,299 @@
+"""
+Graph classes specialized for layered graphs.
+
+They extend `networkx.Graph`, so they can be used anywhere a `Graph` is
+expected, in particular by productions.
+"""
+from collections.abc import MutableMapping
+
+from networkx import Graph, is_frozen
+
+
+class LayeredGraph(Graph):
+    """
+    A graph which keeps edges within a layer separately from edges between
+    layers, so neighbors on the same layer, parents and children are
+    available without filtering all neighbors by layer.
+
+    Vertices are also indexed by layer (see `layers`).
+
+    Vertices should be added with their `layer` before any edge to them is
+    added, and the layer of a vertex with edges should not change.
+    """
+
+    def __init__(self, incoming_graph_data=None, **attr):
+        # dicts (with `None` values) rather than sets keep insertion order
+        self.layer_adj = {}
+        self.cross_adj = {}
+        self.layers = {}
+        self.__indexed_layer = {}
+        super().__init__(incoming_graph_data, **attr)
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self.__ensure_node(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        nodes_for_adding = list(nodes_for_adding)
+        super().add_nodes_from(nodes_for_adding, **attr)
+        for n in nodes_for_adding:
+            self.__ensure_node(n[0] if isinstance(n, tuple) and len(n) == 2 and isinstance(n[1], dict) else n)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self.__classify_edge(u_of_edge, v_of_edge)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        ebunch_to_add = list(ebunch_to_add)
+        super().add_edges_from(ebunch_to_add, **attr)
+        for e in ebunch_to_add:
+            self.__classify_edge(e[0], e[1])
+
+    def remove_edge(self, u, v):
+        super().remove_edge(u, v)
+        self.__forget_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        ebunch = list(ebunch)
+        super().remove_edges_from(ebunch)
+        for e in ebunch:
+            self.__forget_edge(e[0], e[1])
+
+    def remove_node(self, n):
+        super().remove_node(n)
+        self.__forget_node(n)
+
+    def remove_nodes_from(self, nodes):
+        nodes = list(nodes)
+        super().remove_nodes_from(nodes)
+        for n in nodes:
+            self.__forget_node(n)
+
+    def clear(self):
+        super().clear()
+        self.layer_adj.clear()
+        self.cross_adj.clear()
+        self.layers.clear()
+        self.__indexed_layer.clear()
+
+    def clear_edges(self):
+        super().clear_edges()
+        for adj in [self.layer_adj, self.cross_adj]:
+            for neighbors in adj.values():
+                neighbors.clear()
+
+    def layer_nodes(self, layer) -> list:
+        """
+        Returns vertices on layer `layer`.
+        """
+        return list(self.layers.get(layer, {}))
+
+    def layer_neighbors(self, v) -> list:
+        """
+        Returns neighbors of `v` on the same layer.
+        """
+        return list(self.layer_adj[v])
+
+    def cross_neighbors(self, v, layer=None) -> list:
+        """
+        Returns neighbors of `v` on other layers, or only on `layer` if given.
+        """
+        if layer is None:
+            return list(self.cross_adj[v])
+        node_layers = self.nodes(data='layer')
+        return [n for n in self.cross_adj[v] if node_layers[n] == layer]
+
+    def children(self, v) -> list:
+        """
+        Returns neighbors of `v` on the next layer.
+        """
+        return self.cross_neighbors(v, self.nodes[v]['layer'] + 1)
+
+    def parents(self, v) -> list:
+        """
+        Returns neighbors of `v` on the previous layer.
+        """
+        return self.cross_neighbors(v, self.nodes[v]['layer'] - 1)
+
+    def __ensure_node(self, n):
+        self.layer_adj.setdefault(n, {})
+        self.cross_adj.setdefault(n, {})
+        layer = self._node[n].get('layer')
+        if n in self.__indexed_layer:
+            if self.__indexed_layer[n] == layer:
+                return
+            self.__unindex_node(n)
+        self.layers.setdefault(layer, {})[n] = None
+        self.__indexed_layer[n] = layer
+
+    def __unindex_node(self, n):
+        layer = self.__indexed_layer.pop(n)
+        del self.layers[layer][n]
+        if not self.layers[layer]:
+            del self.layers[layer]
+
+    def __classify_edge(self, u, v):
+        self.__ensure_node(u)
+        self.__ensure_node(v)
+        adj = self.layer_adj if self._node[u].get('layer') == self._node[v].get('layer') else self.cross_adj
+        adj[u][v] = None
+        adj[v][u] = None
+
+    def __forget_edge(self, u, v):
+        for adj in [self.layer_adj, self.cross_adj]:
+            adj.get(u, {}).pop(v, None)
+            adj.get(v, {}).pop(u, None)
+
+    def __forget_node(self, n):
+        if n not in self.layer_adj:
+            return
+        self.__unindex_node(n)
+        for adj in [self.layer_adj, self.cross_adj]:
+            for neighbor in adj.pop(n):
+                adj[neighbor].pop(n, None)
+
+
+def layer_nodes(graph: Graph, layer: int) -> list:
+    """
+    Returns vertices of `graph` on layer `layer`. It takes time proportional
+    to the size of the layer for a `LayeredGraph` and to the size of the
+    whole graph otherwise.
+    """
+    if isinstance(graph, LayeredGraph) and not is_frozen(graph):
+        return graph.layer_nodes(layer)
+    return [v for v, data in graph.nodes(data='layer') if data == layer]
+
+
+def top_layer(graph: Graph) -> int:
+    """
+    Returns the highest layer of `graph` (0 if it is empty). It takes time
+    proportional to the number of layers for a `LayeredGraph` and to the
+    size of the whole graph otherwise.
+    """
+    if isinstance(graph, LayeredGraph) and not is_frozen(graph):
+        return max(graph.layers, default=0)
+    return max((layer for _, layer in graph.nodes(data='layer')), default=0)
+
+
+def layer_view(graph: Graph, layer: int) -> Graph:
+    """
+    Returns a read-only view of `graph` restricted to layer `layer`, without
+    copying the graph. Use `layer_view(graph, layer).copy()` to get a copy
+    of the layer.
+    """
+    return graph.subgraph(layer_nodes(graph, layer))
+
+
+class NodeRecord(MutableMapping):
+    """
+    A compact mapping of node attributes, with slots for `layer`, `position`
+    and `label`. Other attributes are kept in a dict created on demand.
+    """
+    __slots__ = ('layer', 'position', 'label', 'extra')
+
+    FIELDS = ('layer', 'position', 'label')
+
+    def __init__(self):
+        self.extra = None
+
+    def __getitem__(self, key):
+        if key in NodeRecord.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in NodeRecord.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in NodeRecord.FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        for key in NodeRecord.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self) -> 'NodeRecord':
+        record = NodeRecord()
+        record.update(self)
+        return record
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class EmptyEdgeAttributes(dict):
+    """
+    An immutable empty dict shared by all edges without attributes.
+    """
+
+    def __readonly(self, *args, **kwargs):
+        raise TypeError('attributes of this edge are shared, use add_edge to set them')
+
+    __setitem__ = __delitem__ = setdefault = pop = popitem = clear = __readonly
+
+    def update(self, *args, **kwargs):
+        if any(args) or kwargs:
+            self.__readonly()
+
+    def copy(self) -> dict:
+        return {}
+
+
+EMPTY_EDGE_ATTRIBUTES = EmptyEdgeAttributes()
+
+
+class CompactGraph(Graph):
+    """
+    A graph which stores node attributes in `NodeRecord`s and shares a single
+    empty attribute dict among all edges without attributes, which makes
+    it use less memory per node and per edge.
+
+    Edge attributes can only be set with `add_edge` or `add_edges_from`,
+    since the shared dict cannot be modified.
+    """
+    node_attr_dict_factory = NodeRecord
+
+    def edge_attr_dict_factory(self):
+        return EMPTY_EDGE_ATTRIBUTES
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        if not attr:
+            super().add_edge(u_of_edge, v_of_edge)
+            return
+        data = dict(self._adj.get(u_of_edge, {}).get(v_of_edge, {}))
+        data.update(attr)
+        super().add_edge(u_of_edge, v_of_edge)
+        self._adj[u_of_edge][v_of_edge] = data
+        self._adj[v_of_edge][u_of_edge] = data
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        for e in ebunch_to_add:
+            if len(e) == 3:
+                u, v, data = e
+                self.add_edge(u, v, **{**attr, **data})
+            else:
+                u, v = e
+                self.add_edge(u, v, **attr)
@@ -0,0 +1,129 @@
+"""
+Structural hashing of layered graphs.
+
+The hash does not depend on ids of vertices, only on their layers, labels,
+positions (quantized to `decimals` decimal places) and on the edges between
+them. It is a sum of hashes of vertices and edges, so it can be computed in
+linear time and updated incrementally when the graph changes.
+
+A vertex is hashed together with the multiset of signatures of its
+neighbors (one round of Weisfeiler-Lehman refinement). Otherwise sums of
+hashes of edges could not tell which of two vertexes at the same position
+an edge belongs to.
+"""
+import contextlib
+import hashlib
+
+from networkx import Graph
+
+MODULUS = 2 ** 64
+
+
+class StructuralHash:
+    """
+    Incrementally updatable structural hash of a graph or, if `layer` is
+    given, of its layer `layer` (with edges within this layer only).
+
+    Change the graph inside `updating` to keep the hash up to date.
+    """
+
+    def __init__(self, layer: int = None, decimals: int = 9):
+        self.layer = layer
+        self.decimals = decimals
+        self.value = 0
+
+    def signature(self, data) -> tuple:
+        """
+        Returns the signature of a vertex with attributes `data`.
+        """
+        scale = 10 ** self.decimals
+        x, y = data['position']
+        return data['layer'], data['label'], round(float(x) * scale), round(float(y) * scale)
+
+    def add_graph(self, graph: Graph):
+        """
+        Adds hashes of all vertexes and edges of `graph`.
+        """
+        node_data = graph.nodes(data=True)
+        for v, data in node_data:
+            if self.__in_scope(data):
+                self.__add(self.__node_hash(graph, v))
+        for u, v in graph.edges():
+            if self.__in_scope(node_data[u]) and self.__in_scope(node_data[v]):
+                self.__add(self.__edge_hash(node_data[u], node_data[v]))
+
+    @contextlib.contextmanager
+    def updating(self, graph: Graph, nodes):
+        """
+        Updates the hash for changes of `graph` made in the `with` block,
+        which may add or remove vertexes of `nodes`, change their attributes
+        and add or remove edges with an end among them.
+        """
+        nodes = set(nodes)
+        node_data = graph.nodes
+        neighbors = {v: self.__neighbors(graph, v) for v in nodes if v in graph and self.__in_scope(node_data[v])}
+        touched = set(neighbors).union(*neighbors.values())
+        for v in touched:
+            self.__add(-self.__node_hash(graph, v))
+        for u, v in self.__edges(neighbors):
+            self.__add(-self.__edge_hash(node_data[u], node_data[v]))
+
+        yield self
+
+        neighbors = {v: self.__neighbors(graph, v) for v in nodes if v in graph and self.__in_scope(node_data[v])}
+        for v in set().union(*neighbors.values()) - touched - nodes:
+            # a new neighbor had no neighbors among `nodes` before
+            signatures = [self.signature(node_data[n]) for n in self.__neighbors(graph, v) if n not in nodes]
+            self.__add(-self.__element_hash('n', self.signature(node_data[v]), tuple(sorted(signatures))))
+        for v in (touched - nodes).union(neighbors, *neighbors.values()):
+            self.__add(self.__node_hash(graph, v))
+        for u, v in self.__edges(neighbors):
+            self.__add(self.__edge_hash(node_data[u], node_data[v]))
+
+    def hexdigest(self) -> str:
+        return '{:016x}'.format(self.value)
+
+    def __add(self, h: int):
+        self.value = (self.value + h) % MODULUS
+
+    def __in_scope(self, data) -> bool:
+        return self.layer is None or data['layer'] == self.layer
+
+    def __neighbors(self, graph: Graph, v) -> list:
+        node_data = graph.nodes
+        return [n for n in graph.adj[v] if self.__in_scope(node_data[n])]
+
+    @staticmethod
+    def __edges(neighbors: dict):
+        """
+        Returns edges between vertexes and their `neighbors`, each once.
+        """
+        edges = {}
+        for u, ns in neighbors.items():
+            for n in ns:
+                edges.setdefault(frozenset((u, n)), (u, n))
+        return edges.values()
+
+    def __node_hash(self, graph: Graph, v) -> int:
+        signatures = sorted(self.signature(graph.nodes[n]) for n in self.__neighbors(graph, v))
+        return self.__element_hash('n', self.signature(graph.nodes[v]), tuple(signatures))
+
+    def __edge_hash(self, data_u, data_v) -> int:
+        a = self.signature(data_u)
+        b = self.signature(data_v)
+        return self.__element_hash('e', min(a, b), max(a, b))
+
+    @staticmethod
+    def __element_hash(*element) -> int:
+        digest = hashlib.blake2b(repr(element).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+
+def structural_hash(graph: Graph, layer: int = None, decimals: int = 9) -> StructuralHash:
+    """
+    Returns the structural hash of `graph` or, if `layer` is given, of the
+    layer `layer` of `graph` (with edges within this layer only).
+    """
+    h = StructuralHash(layer, decimals)
+    h.add_graph(graph)
+    return h
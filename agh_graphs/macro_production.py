@@ -0,0 +1,264 @@
+"""
+Macro-productions, i.e. fixed sequences of productions fused into a single
+rewrite.
+
+The sequence is recorded once on a prototype of its left-hand side. The
+positions of the prototype (and the `positions` passed in `kwargs`) are
+traced (see `agh_graphs.affine`), so the recorded rewrite knows each new
+position as an affine combination of them. Applying the macro-production
+only matches the prototype against the graph and performs the recorded
+rewrite, without running the productions of the sequence.
+
+Recorded rewrites compute positions as floats, so on exact positions (see
+`agh_graphs.utils.is_exact`) and on traced ones (e.g. when a derivation
+using macro-productions is compiled, see `agh_graphs.replay`) the
+productions of the sequence are run.
+"""
+from typing import List, Tuple
+
+import numpy as np
+from networkx import Graph
+from networkx.algorithms.isomorphism import GraphMatcher
+
+from agh_graphs.affine import trace_position, coefficients_of, untrace_position, is_traced
+from agh_graphs.production import Production, Step, apply_sequence
+from agh_graphs.utils import gen_name, is_exact, is_structurally_equal
+
+
+class Rewrite:
+    """
+    A recorded rewrite of a macro-production.
+
+    Vertexes are referred to by indexes: first come the vertexes of the
+    left-hand side (in the order of `lhs_nodes`), then the new vertexes.
+    Positions of the new vertexes are affine combinations of the anchors:
+    positions of the left-hand side vertexes followed by the `positions`
+    passed to the macro-production. Layers of the new vertexes are relative
+    to the layer of the first input vertex (`lhs_nodes[inputs[0]]`).
+    """
+
+    def __init__(self, lhs_nodes, inputs, new_layers, new_labels, x_coefficients, y_coefficients,
+                 added_edges, removed_edges, removed_nodes, relabels, outputs):
+        self.lhs_nodes = lhs_nodes
+        self.inputs = inputs
+        self.new_layers = new_layers
+        self.new_labels = new_labels
+        self.x_coefficients = x_coefficients
+        self.y_coefficients = y_coefficients
+        self.added_edges = added_edges
+        self.removed_edges = removed_edges
+        self.removed_nodes = removed_nodes
+        self.relabels = relabels
+        self.outputs = outputs
+
+    def new_positions(self, anchors: np.ndarray) -> np.ndarray:
+        """
+        Returns positions of the new vertexes for `anchors` of shape `(n, 2)`.
+        """
+        xs = self.x_coefficients[:, :-1] @ anchors[:, 0] + self.x_coefficients[:, -1]
+        ys = self.y_coefficients[:, :-1] @ anchors[:, 1] + self.y_coefficients[:, -1]
+        return np.stack([xs, ys], axis=1)
+
+    def apply(self, graph: Graph, lhs_match: List[str], base_layer: int, anchors: np.ndarray) -> List[str]:
+        """
+        Performs the rewrite on `graph`, where `lhs_match` are vertexes matched
+        with the left-hand side.
+
+        Returns ids of the output vertexes.
+        """
+        new_nodes = [gen_name() for _ in self.new_labels]
+        ids = list(lhs_match) + new_nodes
+        positions = self.new_positions(anchors)
+
+        for v, layer, label, (x, y) in zip(new_nodes, self.new_layers, self.new_labels, positions):
+            graph.add_node(v, layer=base_layer + int(layer), position=(float(x), float(y)), label=label)
+        graph.remove_edges_from((ids[a], ids[b]) for a, b in self.removed_edges)
+        graph.add_edges_from((ids[a], ids[b]) for a, b in self.added_edges)
+        for index, label in self.relabels:
+            graph.nodes[ids[index]]['label'] = label
+        graph.remove_nodes_from(ids[index] for index in self.removed_nodes)
+
+        return [ids[index] for index in self.outputs]
+
+
+class MacroProduction(Production):
+    """
+    A production fused from a fixed sequence of productions.
+
+    `lhs` is a prototype of the left-hand side of the sequence with input
+    vertexes `lhs_input`; it has to contain every vertex which is read by
+    the productions. `steps` are applied on the input of the macro-production
+    (see `agh_graphs.production.Step`) and `outputs` are references to the
+    vertexes it returns.
+
+    `orientation` is ignored, orientations of productions are given in
+    `steps`. `kwargs` are passed to every production of the sequence.
+
+    The sequence should not make geometric decisions (e.g. choice of the
+    longest edge) which differ between the prototype and the graph; use
+    `verify` to make sure it does not.
+    """
+
+    def __init__(self, lhs: Graph, lhs_input: List[str], steps: List[Step], outputs: List[Tuple[int, int]]):
+        self.lhs = lhs
+        self.lhs_input = lhs_input
+        self.steps = steps
+        self.outputs = outputs
+        self.__pattern, self.__radius = self.__build_pattern()
+        self.__rewrites = {}
+
+    def apply(self, graph: Graph, prod_input: List[str], orientation: int = 0, **kwargs) -> List[str]:
+        lhs_match = self.__match(graph, prod_input)
+        if lhs_match is None:
+            raise ValueError('left-hand side does not match')
+
+        anchors = [graph.nodes[v]['position'] for v in lhs_match] + list(kwargs.get('positions', []))
+        if any(is_exact(position) or is_traced(position) for position in anchors):
+            return self.apply_unfused(graph, prod_input, **kwargs)
+        rewrite = self.rewrite(**kwargs)
+        base_layer = graph.nodes[prod_input[0]]['layer']
+        return rewrite.apply(graph, lhs_match, base_layer, np.array(anchors, dtype=float))
+
+    def apply_unfused(self, graph: Graph, prod_input: List[str], **kwargs) -> List[str]:
+        """
+        Applies the productions of the sequence one after another.
+        """
+        step_outputs = apply_sequence(graph, self.steps, prod_input, **kwargs)
+        return [prod_input[index] if s == -1 else step_outputs[s][index] for s, index in self.outputs]
+
+    def verify(self, graph: Graph, prod_input: List[str], **kwargs) -> bool:
+        """
+        Checks whether the macro-production gives the same graph as the
+        unfused sequence, without modifying `graph`.
+        """
+        fused = graph.copy()
+        unfused = graph.copy()
+        self.apply(fused, prod_input, **kwargs)
+        self.apply_unfused(unfused, prod_input, **kwargs)
+        return is_structurally_equal(fused, unfused)
+
+    def rewrite(self, **kwargs) -> Rewrite:
+        """
+        Returns the rewrite recorded for `kwargs`, recording it if needed.
+
+        The rewrite depends on values of `kwargs` (compared by their `repr`),
+        except for `positions`, on which only the number of them matters.
+        """
+        key = (tuple(sorted((name, repr(value)) for name, value in kwargs.items() if name != 'positions')),
+               'positions' in kwargs, len(kwargs.get('positions', [])))
+        if key not in self.__rewrites:
+            self.__rewrites[key] = self.__record(**kwargs)
+        return self.__rewrites[key]
+
+    def __record(self, **kwargs) -> Rewrite:
+        lhs_nodes = list(self.lhs.nodes())
+        lhs_index = {v: i for i, v in enumerate(lhs_nodes)}
+        positions = list(kwargs.get('positions', []))
+        size = len(lhs_nodes) + len(positions)
+
+        traced = self.lhs.copy()
+        for v, i in lhs_index.items():
+            traced.nodes[v]['position'] = trace_position(self.lhs.nodes[v]['position'], i, size)
+        traced_kwargs = dict(kwargs)
+        if 'positions' in kwargs:
+            traced_kwargs['positions'] = [trace_position(p, len(lhs_nodes) + i, size)
+                                          for i, p in enumerate(positions)]
+
+        outputs = self.apply_unfused(traced, self.lhs_input, **traced_kwargs)
+
+        base_layer = self.lhs.nodes[self.lhs_input[0]]['layer']
+        new_nodes = [v for v in traced.nodes() if v not in lhs_index]
+        index = dict(lhs_index, **{v: len(lhs_nodes) + i for i, v in enumerate(new_nodes)})
+
+        x_coefficients = np.array([coefficients_of(traced.nodes[v]['position'][0], size) for v in new_nodes])
+        y_coefficients = np.array([coefficients_of(traced.nodes[v]['position'][1], size) for v in new_nodes])
+        added_edges = [(index[a], index[b]) for a, b in traced.edges()
+                       if a not in lhs_index or b not in lhs_index or not self.lhs.has_edge(a, b)]
+        removed_edges = [(index[a], index[b]) for a, b in self.lhs.edges()
+                         if traced.has_node(a) and traced.has_node(b) and not traced.has_edge(a, b)]
+        removed_nodes = [i for v, i in lhs_index.items() if not traced.has_node(v)]
+        relabels = [(i, traced.nodes[v]['label']) for v, i in lhs_index.items()
+                    if traced.has_node(v) and traced.nodes[v]['label'] != self.lhs.nodes[v]['label']]
+
+        for v, i in lhs_index.items():
+            if traced.has_node(v) and untrace_position(traced.nodes[v]['position']) != self.lhs.nodes[v]['position']:
+                raise ValueError('productions moving vertexes cannot be fused')
+
+        rewrite = Rewrite(
+            lhs_nodes=lhs_nodes,
+            inputs=[lhs_index[v] for v in self.lhs_input],
+            new_layers=np.array([traced.nodes[v]['layer'] - base_layer for v in new_nodes], dtype=int),
+            new_labels=[traced.nodes[v]['label'] for v in new_nodes],
+            x_coefficients=x_coefficients.reshape(len(new_nodes), size + 1),
+            y_coefficients=y_coefficients.reshape(len(new_nodes), size + 1),
+            added_edges=np.array(added_edges, dtype=int).reshape(-1, 2),
+            removed_edges=np.array(removed_edges, dtype=int).reshape(-1, 2),
+            removed_nodes=removed_nodes,
+            relabels=relabels,
+            outputs=[index[v] for v in outputs])
+
+        self.__check_rewrite(rewrite, **kwargs)
+        return rewrite
+
+    def __check_rewrite(self, rewrite: Rewrite, **kwargs):
+        fused = self.lhs.copy()
+        unfused = self.lhs.copy()
+        anchors = [self.lhs.nodes[v]['position'] for v in rewrite.lhs_nodes] + list(kwargs.get('positions', []))
+        base_layer = self.lhs.nodes[self.lhs_input[0]]['layer']
+        rewrite.apply(fused, rewrite.lhs_nodes, base_layer, np.array(anchors, dtype=float))
+        self.apply_unfused(unfused, self.lhs_input, **kwargs)
+        if not is_structurally_equal(fused, unfused):
+            raise RuntimeError('recorded rewrite differs from the sequence of productions')
+
+    def __build_pattern(self):
+        """
+        Returns the left-hand side pattern to match and the distance from the
+        input vertexes within which the pattern lies.
+        """
+        base_layer = self.lhs.nodes[self.lhs_input[0]]['layer']
+        pattern = Graph()
+        for v, data in self.lhs.nodes(data=True):
+            input_index = self.lhs_input.index(v) if v in self.lhs_input else None
+            pattern.add_node(v, key=(data['label'], data['layer'] - base_layer, input_index))
+        pattern.add_edges_from(self.lhs.edges())
+
+        distances = self.__distances(self.lhs, self.lhs_input, len(self.lhs))
+        if len(distances) != len(self.lhs):
+            raise ValueError('left-hand side is not connected to its input')
+        return pattern, max(distances.values())
+
+    def __match(self, graph: Graph, prod_input: List[str]):
+        """
+        Returns vertexes of `graph` matching the left-hand side, in the order
+        of `lhs.nodes()`, or `None` if it does not match.
+        """
+        if len(prod_input) != len(self.lhs_input):
+            return None
+
+        base_layer = graph.nodes[prod_input[0]]['layer']
+        context = Graph()
+        for v in self.__distances(graph, prod_input, self.__radius):
+            data = graph.nodes[v]
+            input_index = prod_input.index(v) if v in prod_input else None
+            context.add_node(v, key=(data['label'], data['layer'] - base_layer, input_index))
+        context.add_edges_from(graph.subgraph(context.nodes()).edges())
+
+        matcher = GraphMatcher(context, self.__pattern, node_match=lambda a, b: a['key'] == b['key'])
+        for mapping in matcher.subgraph_monomorphisms_iter():
+            inverse = {p: v for v, p in mapping.items()}
+            return [inverse[v] for v in self.lhs.nodes()]
+        return None
+
+    @staticmethod
+    def __distances(graph: Graph, sources: List[str], radius: int):
+        distances = {v: 0 for v in sources}
+        frontier = list(sources)
+        for distance in range(1, radius + 1):
+            next_frontier = []
+            for v in frontier:
+                for n in graph.neighbors(v):
+                    if n not in distances:
+                        distances[n] = distance
+                        next_frontier.append(n)
+            frontier = next_frontier
+        return distances
@@ -0,0 +1,298 @@
+"""
+Triangle meshes of layers and their import and export in standard formats.
+
+A layer is converted to a `Mesh`: coordinates of vertexes as a float array
+and corners of triangles (one per interior) as an int array. The arrays
+are filled in chunks of `chunk_size` rows, so besides them only a chunk
+of rows is held in Python lists, and writers format them in chunks of
+rows, so they do not build the whole file in memory.
+
+A `Mesh` (e.g. read from a file) can be imported as the initial layer of
+a derivation with `import_mesh`.
+"""
+import contextlib
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.graph import layer_nodes
+from agh_graphs.utils import get_neighbors_at, ccw_order, centroids, gen_name, is_exact
+
+CHUNK_SIZE = 65536
+
+
+class Mesh:
+    """
+    A triangle mesh.
+
+    `points` are positions of vertexes as an array of shape `(n, 2)` and
+    `triangles` are indexes of corners of triangles as an array of shape
+    `(m, 3)` (in counterclockwise order in meshes of layers). `nodes` are
+    ids of the vertexes and `interiors` ids of the interiors of the
+    triangles in the graph, if the mesh comes from or went to a graph.
+    """
+
+    def __init__(self, nodes, points, triangles, interiors=None):
+        self.nodes = nodes
+        self.points = points
+        self.triangles = triangles
+        self.interiors = interiors
+
+
+def layer_mesh(graph: Graph, layer: int, labels=('I', 'i'), chunk_size: int = CHUNK_SIZE) -> Mesh:
+    """
+    Returns the mesh of triangles represented by interiors with one of
+    `labels` on layer `layer` of `graph`.
+    """
+    node_data = graph.nodes(data=True)
+    interiors = [v for v in layer_nodes(graph, layer) if node_data[v]['label'] in labels]
+    return __interiors_mesh(graph, interiors, lambda v: v, chunk_size)
+
+
+def leaf_mesh(graph: Graph, hierarchy: bool = False, decimals: int = 9, chunk_size: int = CHUNK_SIZE) -> Mesh:
+    """
+    Returns the mesh of leaf triangles on all layers of `graph`, i.e. of
+    the interiors which are not refined. These are the `I` interiors or, if
+    `hierarchy` is set, the interiors without interiors on the next layer
+    among their neighbors.
+
+    Corners at the same position (exactly for exact positions, otherwise
+    up to `decimals` decimal places) are merged into a single vertex of the
+    mesh, whose id in `nodes` is the id of one of them.
+    """
+    node_data = graph.nodes(data=True)
+    if hierarchy:
+        interiors = [v for v, data in node_data
+                     if data['label'] in ('I', 'i') and not any(
+                         node_data[n]['label'] in ('I', 'i') for n in get_neighbors_at(graph, v, data['layer'] + 1))]
+    else:
+        interiors = [v for v, label in graph.nodes(data='label') if label == 'I']
+
+    scale = 10 ** decimals
+
+    def key(v):
+        position = node_data[v]['position']
+        if is_exact(position):
+            return position
+        return tuple(round(float(c) * scale) for c in position)
+
+    return __interiors_mesh(graph, interiors, key, chunk_size)
+
+
+def write_vtk(mesh: Mesh, file, title: str = 'mesh', chunk_size: int = CHUNK_SIZE):
+    """
+    Writes `mesh` to `file` (a path or a text file) in the legacy ASCII VTK
+    format, as an unstructured grid.
+    """
+    with __open_text(file) as f:
+        n, m = len(mesh.points), len(mesh.triangles)
+        f.write('# vtk DataFile Version 3.0\n{}\nASCII\nDATASET UNSTRUCTURED_GRID\n'.format(title))
+        f.write('POINTS {} double\n'.format(n))
+        __write_rows(f, __points_3d, mesh.points, '%.17g %.17g %.17g', chunk_size)
+        f.write('CELLS {} {}\n'.format(m, 4 * m))
+        __write_rows(f, lambda chunk, start: chunk, mesh.triangles, '3 %d %d %d', chunk_size)
+        f.write('CELL_TYPES {}\n'.format(m))
+        for start in range(0, m, chunk_size):
+            # 5 is VTK_TRIANGLE
+            f.write('5\n' * min(chunk_size, m - start))
+
+
+def write_obj(mesh: Mesh, file, chunk_size: int = CHUNK_SIZE):
+    """
+    Writes `mesh` to `file` (a path or a text file) in the Wavefront OBJ
+    format.
+    """
+    with __open_text(file) as f:
+        __write_rows(f, __points_3d, mesh.points, 'v %.17g %.17g %.17g', chunk_size)
+        __write_rows(f, lambda chunk, start: chunk + 1, mesh.triangles, 'f %d %d %d', chunk_size)
+
+
+def write_msh(mesh: Mesh, file, chunk_size: int = CHUNK_SIZE):
+    """
+    Writes `mesh` to `file` (a path or a text file) in the ASCII Gmsh 2.2
+    format.
+    """
+    with __open_text(file) as f:
+        f.write('$MeshFormat\n2.2 0 8\n$EndMeshFormat\n')
+        f.write('$Nodes\n{}\n'.format(len(mesh.points)))
+        __write_rows(f, __numbered_points, mesh.points, '%d %.17g %.17g %.17g', chunk_size)
+        f.write('$EndNodes\n$Elements\n{}\n'.format(len(mesh.triangles)))
+        # type 2 is a triangle, with 2 tags (physical and elementary entity)
+        __write_rows(f, __numbered_triangles, mesh.triangles, '%d 2 2 0 1 %d %d %d', chunk_size)
+        f.write('$EndElements\n')
+
+
+def import_mesh(graph: Graph, mesh: Mesh, layer: int = 1, root=None) -> Mesh:
+    """
+    Adds `mesh` to `graph` as layer `layer` made the way P1 makes layer 1:
+    `E` vertexes connected by edges of the triangles and an `I` interior in
+    the centroid of each triangle, connected with its corners and with an
+    `e` root on the previous layer. The root is the vertex `root` of `graph`
+    (relabelled to `e` like by P1) if it is given, otherwise a new vertex
+    placed in the center of the mesh.
+
+    Returns the imported mesh, with ids of the new vertexes (`nodes`) and
+    interiors (`interiors`).
+    """
+    points = np.asarray(mesh.points, dtype=np.float64).reshape(-1, 2)
+    triangles = np.asarray(mesh.triangles, dtype=np.int64).reshape(-1, 3)
+    nodes = [gen_name() for _ in range(len(points))]
+    interiors = [gen_name() for _ in range(len(triangles))]
+
+    edges = np.sort(triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    edges = np.unique(edges, axis=0)
+
+    if root is None:
+        root = gen_name()
+        center = points.mean(axis=0) if len(points) else np.zeros(2)
+        graph.add_node(root, layer=layer - 1, position=tuple(center.tolist()), label='e')
+    elif graph.nodes[root]['layer'] != layer - 1:
+        raise ValueError('root {} is not on layer {}'.format(root, layer - 1))
+    else:
+        graph.nodes[root]['label'] = 'e'
+    graph.add_nodes_from((v, {'layer': layer, 'position': (x, y), 'label': 'E'})
+                         for v, (x, y) in zip(nodes, points.tolist()))
+    graph.add_nodes_from((v, {'layer': layer, 'position': (x, y), 'label': 'I'})
+                         for v, (x, y) in zip(interiors, centroids(points[triangles]).tolist()))
+    graph.add_edges_from((nodes[a], nodes[b]) for a, b in edges.tolist())
+    graph.add_edges_from((interior, nodes[v]) for interior, corners in zip(interiors, triangles.tolist())
+                         for v in corners)
+    graph.add_edges_from((interior, root) for interior in interiors)
+    return Mesh(nodes, points, triangles, interiors)
+
+
+def read_obj(file) -> Mesh:
+    """
+    Reads a triangle mesh from `file` (a path or a text file) in the
+    Wavefront OBJ format. The `z` coordinates are ignored.
+    """
+    points = []
+    triangles = []
+    with __open_text(file, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == 'v':
+                points.append((float(fields[1]), float(fields[2])))
+            elif fields[0] == 'f':
+                if len(fields) != 4:
+                    raise ValueError('only triangular faces are supported')
+                triangles.append([__obj_index(field, len(points)) for field in fields[1:]])
+    return __mesh(points, triangles)
+
+
+def read_msh(file) -> Mesh:
+    """
+    Reads a triangle mesh from `file` (a path or a text file) in the ASCII
+    Gmsh 2.2 format. Elements other than triangles and the `z` coordinates
+    are ignored.
+    """
+    points = []
+    index = {}
+    triangles = []
+    with __open_text(file, 'r') as f:
+        section = None
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0].startswith('$'):
+                section = None if fields[0].startswith('$End') else fields[0]
+                count = None
+            elif section in ('$Nodes', '$Elements') and count is None:
+                count = int(fields[0])
+            elif section == '$Nodes':
+                index[fields[0]] = len(points)
+                points.append((float(fields[1]), float(fields[2])))
+            elif section == '$Elements' and fields[1] == '2':
+                tags = int(fields[2])
+                triangles.append([index[v] for v in fields[3 + tags:6 + tags]])
+    return __mesh(points, triangles)
+
+
+READERS = {
+    'obj': read_obj,
+    'msh': read_msh,
+}
+
+
+WRITERS = {
+    'vtk': write_vtk,
+    'obj': write_obj,
+    'msh': write_msh,
+}
+
+
+def __interiors_mesh(graph: Graph, interiors, key, chunk_size: int) -> Mesh:
+    """
+    Returns the mesh of triangles of `interiors`, where corners with the same
+    `key(corner)` are the same vertex of the mesh. The arrays are filled in
+    chunks of `chunk_size` rows.
+    """
+    node_data = graph.nodes(data=True)
+    index = {}
+    nodes = []
+    triangles = np.empty((len(interiors), 3), dtype=np.int64)
+    for start in range(0, len(interiors), chunk_size):
+        corners = []
+        for interior in interiors[start:start + chunk_size]:
+            neighbors = get_neighbors_at(graph, interior, node_data[interior]['layer'])
+            if len(neighbors) != 3:
+                raise ValueError('interior with wrong number of edges')
+            triangle = []
+            for v in neighbors:
+                k = key(v)
+                if k not in index:
+                    index[k] = len(nodes)
+                    nodes.append(v)
+                triangle.append(index[k])
+            corners.append(triangle)
+        triangles[start:start + len(corners)] = corners
+
+    points = np.empty((len(nodes), 2), dtype=np.float64)
+    for start in range(0, len(nodes), chunk_size):
+        points[start:start + chunk_size] = [node_data[v]['position'] for v in nodes[start:start + chunk_size]]
+    for start in range(0, len(triangles), chunk_size):
+        chunk = triangles[start:start + chunk_size]
+        chunk[:] = np.take_along_axis(chunk, ccw_order(points[chunk]), axis=1)
+    return Mesh(nodes, points, triangles, interiors)
+
+
+def __write_rows(f, transform, rows: np.ndarray, fmt: str, chunk_size: int):
+    for start in range(0, len(rows), chunk_size):
+        np.savetxt(f, transform(rows[start:start + chunk_size], start), fmt=fmt)
+
+
+def __points_3d(points: np.ndarray, start: int) -> np.ndarray:
+    return np.column_stack([points, np.zeros(len(points))])
+
+
+def __numbered_points(points: np.ndarray, start: int) -> np.ndarray:
+    numbers = np.arange(start + 1, start + len(points) + 1)
+    return np.column_stack([numbers, points, np.zeros(len(points))])
+
+
+def __numbered_triangles(triangles: np.ndarray, start: int) -> np.ndarray:
+    numbers = np.arange(start + 1, start + len(triangles) + 1)
+    return np.column_stack([numbers, triangles + 1])
+
+
+def __mesh(points, triangles) -> Mesh:
+    points = np.array(points, dtype=np.float64).reshape(-1, 2)
+    return Mesh(None, points, np.array(triangles, dtype=np.int64).reshape(-1, 3))
+
+
+def __obj_index(field: str, count: int) -> int:
+    # faces may be given as `v/vt/vn` and refer to vertexes with 1-based or negative indexes
+    k = int(field.split('/')[0])
+    return k - 1 if k > 0 else count + k
+
+
+@contextlib.contextmanager
+def __open_text(file, mode: str = 'w'):
+    if hasattr(file, 'read' if mode == 'r' else 'write'):
+        yield file
+    else:
+        with open(file, mode) as f:
+            yield f
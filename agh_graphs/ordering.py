@@ -0,0 +1,131 @@
+"""
+Spatial ordering of vertices.
+
+Vertices are ordered by layer and then along a space-filling curve (Morton
+or Hilbert) over their positions, so that vertices close in space are close
+in the order.
+"""
+import numpy as np
+from networkx import Graph
+
+
+def morton_codes(xy, bits: int = 16) -> np.ndarray:
+    """
+    Returns Morton (Z-order) codes of positions given as an array of shape
+    `(n, 2)`. Positions are scaled to the grid of `2 ** bits` cells per axis
+    spanned by their bounding box.
+    """
+    cells = __grid_cells(xy, bits)
+    return __spread_bits(cells[:, 0]) | (__spread_bits(cells[:, 1]) << np.uint64(1))
+
+
+def hilbert_codes(xy, bits: int = 16) -> np.ndarray:
+    """
+    Returns Hilbert curve codes of positions given as an array of shape
+    `(n, 2)`, on the same grid as `morton_codes`.
+    """
+    cells = __grid_cells(xy, bits).astype(np.int64)
+    x = cells[:, 0]
+    y = cells[:, 1]
+    n = 2 ** bits
+    codes = np.zeros(len(cells), dtype=np.uint64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        codes += np.uint64(s * s) * ((3 * rx) ^ ry).astype(np.uint64)
+        # rotate the quadrant
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s //= 2
+    return codes
+
+
+CURVES = {
+    'morton': morton_codes,
+    'hilbert': hilbert_codes,
+}
+
+
+def spatial_order(graph: Graph, nodes=None, curve: str = 'morton', bits: int = 16) -> list:
+    """
+    Returns `nodes` (all vertices of `graph` by default) sorted by layer and
+    then by the code of their position on `curve` (see `CURVES`).
+    """
+    nodes = list(graph.nodes()) if nodes is None else list(nodes)
+    if not nodes:
+        return []
+    node_data = graph.nodes(data=True)
+    layers = np.array([node_data[v]['layer'] for v in nodes])
+    codes = CURVES[curve]([node_data[v]['position'] for v in nodes], bits)
+    return [nodes[k] for k in np.lexsort((codes, layers))]
+
+
+def layer_order(graph: Graph, layer: int, labels=('E', 'I'), curve: str = 'morton') -> list:
+    """
+    Returns vertices of `graph` on layer `layer` with one of `labels`
+    (all labels if `None`) in the order of `curve`.
+    """
+    nodes = [v for v, data in graph.nodes(data=True)
+             if data['layer'] == layer and (labels is None or data['label'] in labels)]
+    return spatial_order(graph, nodes, curve)
+
+
+def partition_layer(graph: Graph, layer: int, parts: int, labels=('E', 'I'), curve: str = 'morton') -> list:
+    """
+    Splits vertices of layer `layer` (see `layer_order`) into `parts`
+    contiguous slices of the curve order, i.e. spatially compact domains of
+    (almost) equal sizes.
+    """
+    order = layer_order(graph, layer, labels, curve)
+    bounds = np.linspace(0, len(order), parts + 1).round().astype(int)
+    return [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def compact(graph: Graph, relabel: bool = True, curve: str = 'morton'):
+    """
+    Returns a copy of `graph` with vertices inserted in the spatial order
+    (see `spatial_order`) and neighbors of each vertex ordered the same way,
+    so that iteration over vertices and their neighbors follows the space.
+
+    If `relabel` is set, vertices are renumbered with consecutive integers.
+
+    Returns the new graph and a dict which maps old ids to new ones.
+    """
+    order = spatial_order(graph, curve=curve)
+    mapping = {v: k if relabel else v for k, v in enumerate(order)}
+    rank = {v: k for k, v in enumerate(order)}
+
+    compacted = graph.__class__()
+    compacted.graph.update(graph.graph)
+    compacted.add_nodes_from((mapping[v], graph.nodes[v]) for v in order)
+    for v in order:
+        neighbors = sorted(graph.adj[v], key=rank.__getitem__)
+        compacted.add_edges_from((mapping[v], mapping[n], graph.adj[v][n]) for n in neighbors)
+    return compacted, mapping
+
+
+def __grid_cells(xy, bits: int) -> np.ndarray:
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    if len(xy) == 0:
+        return np.zeros((0, 2), dtype=np.uint64)
+    low = xy.min(axis=0)
+    extent = xy.max(axis=0) - low
+    extent[extent == 0] = 1
+    scale = (2 ** bits - 1) / extent
+    return np.floor((xy - low) * scale).astype(np.uint64)
+
+
+def __spread_bits(x: np.ndarray) -> np.ndarray:
+    """
+    Inserts a zero bit between each two bits of 32-bit integers.
+    """
+    x = x.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x
@@ -1,12 +1,18 @@
 """
 This module contains the basic code for productions. You can add your own
 production by extending the `Production` class.
+
+Fixed sequences of productions are applied by `SequenceRun`, which calls
+hooks (see `StepHook`) around each step, so features of a run such as
+checkpointing or spilling layers to disk can be combined.
 """
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Tuple
 
 from networkx import Graph
 
+from agh_graphs.graph import top_layer
+
 
 class Production(ABC):
 
@@ -26,3 +32,155 @@ class Production(ABC):
 
     def __str__(self) -> str:
         return self.__class__.__name__
+
+
+class Step:
+    """
+    A single application of a production within a fixed sequence of productions.
+
+    `inputs` is a list of references `(step, index)` to the `index`-th vertex
+    returned by the `step`-th production of the sequence. The step `-1` refers
+    to the input of the whole sequence.
+
+    `kwargs` are passed to the production and take precedence over the
+    `kwargs` passed to the whole sequence.
+    """
+
+    def __init__(self, production: Production, inputs: List[Tuple[int, int]], orientation: int = 0, **kwargs):
+        self.production = production
+        self.inputs = inputs
+        self.orientation = orientation
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return '{}{}'.format(self.production, self.inputs)
+
+
+def resolve_inputs(step: Step, prod_input: List[str], outputs: List[List[str]]) -> List[str]:
+    """
+    Returns ids of vertexes referenced by inputs of `step`.
+
+    `outputs` are lists of vertexes returned by the preceding steps.
+    """
+    return [prod_input[index] if s == -1 else outputs[s][index] for s, index in step.inputs]
+
+
+class StepHook:
+    """
+    Callbacks called by a `SequenceRun`. `start` and `before_step` of the
+    hooks of a run are called in their order and the other callbacks in the
+    reverse order, so each hook wraps the ones following it.
+    """
+
+    def start(self, run: 'SequenceRun'):
+        """
+        Called before the first step. It may replace `prod_input` and
+        `outputs` of `run` to resume it from the step `len(run.outputs)`.
+        """
+
+    def before_step(self, run: 'SequenceRun', step: Step, step_input: List[str]):
+        """
+        Called before `step` is applied on `step_input`.
+        """
+
+    def after_step(self, run: 'SequenceRun', step: Step, step_input: List[str], step_output: List[str]):
+        """
+        Called after `step` returned `step_output`, which is already the last
+        list of `run.outputs`.
+        """
+
+    def finish(self, run: 'SequenceRun'):
+        """
+        Called after the last step.
+        """
+
+    def close(self, run: 'SequenceRun'):
+        """
+        Called when the run ends, also when a step or a hook raised.
+        """
+
+
+class SequenceRun:
+    """
+    Applies productions of `steps` one after another on `graph`, calling
+    `hooks` around each step. `kwargs` are passed to all the productions.
+
+    Iterating over the run applies the steps, yielding the lists of vertexes
+    returned by them one by one; `run` applies all of them at once.
+    `outputs` are lists of vertexes returned by the applied steps.
+    """
+
+    def __init__(self, graph: Graph, steps: List[Step], prod_input: List[str], hooks=(), **kwargs):
+        self.graph = graph
+        self.steps = steps
+        self.prod_input = prod_input
+        self.hooks = list(hooks)
+        self.kwargs = kwargs
+        self.outputs = []
+        self.__top_layer = None
+
+    @property
+    def top_layer(self) -> int:
+        """
+        The highest layer reached by the run. It is computed from the graph
+        the first time it is needed and then updated from layers of inputs
+        and outputs of the steps, which are on the highest layers changed by
+        the productions in `agh_graphs.productions`.
+        """
+        if self.__top_layer is None:
+            self.__top_layer = top_layer(self.graph)
+        return self.__top_layer
+
+    def resolve_inputs(self, step: Step) -> List[str]:
+        """
+        Returns ids of vertexes referenced by inputs of `step` (see
+        `resolve_inputs`).
+        """
+        return resolve_inputs(step, self.prod_input, self.outputs)
+
+    def run(self) -> List[List[str]]:
+        """
+        Applies all the steps and returns lists of vertexes returned by each
+        of them.
+        """
+        for _ in self:
+            pass
+        return self.outputs
+
+    def __iter__(self):
+        try:
+            for hook in self.hooks:
+                hook.start(self)
+            # hooks may have replaced the graph
+            self.__top_layer = None
+            for step in self.steps[len(self.outputs):]:
+                step_input = self.resolve_inputs(step)
+                for hook in self.hooks:
+                    hook.before_step(self, step, step_input)
+                step_kwargs = dict(self.kwargs, **step.kwargs)
+                step_output = step.production.apply(self.graph, step_input, step.orientation, **step_kwargs)
+                self.outputs.append(step_output)
+                if self.__top_layer is not None:
+                    self.__update_top_layer(step_input + step_output)
+                for hook in reversed(self.hooks):
+                    hook.after_step(self, step, step_input, step_output)
+                yield step_output
+            for hook in reversed(self.hooks):
+                hook.finish(self)
+        finally:
+            for hook in reversed(self.hooks):
+                hook.close(self)
+
+    def __update_top_layer(self, nodes: List[str]):
+        node_layers = self.graph.nodes(data='layer')
+        self.__top_layer = max([self.__top_layer] + [node_layers[v] for v in nodes if v in self.graph])
+
+
+def apply_sequence(graph: Graph, steps: List[Step], prod_input: List[str], hooks=(), **kwargs) -> List[List[str]]:
+    """
+    Applies productions of `steps` one after another on `graph`, calling
+    `hooks` (see `StepHook`) around each step.
+
+    Returns lists of vertexes returned by each step.
+    """
+    return SequenceRun(graph, steps, prod_input, hooks, **kwargs).run()
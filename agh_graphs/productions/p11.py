@@ -2,7 +2,7 @@ from typing import List
 
 from networkx import Graph
 from agh_graphs.production import Production
-from agh_graphs.utils import get_neighbors_at, find_overlapping_vertices, join_overlapping_vertices, get_common_neighbors
+from agh_graphs.utils import get_neighbors_at, find_overlapping_vertices, merge_vertices, get_common_neighbors
 
 
 class P11(Production):
@@ -40,9 +40,7 @@ class P11(Production):
                 elif graph.nodes()[v]['position'] == pos_v2:
                     to_merge[1].append(v)
 
-        for vs in to_merge:
-            if vs[0] != vs[1]:
-                join_overlapping_vertices(graph, vs[0], vs[1], down_layer)
+        merge_vertices(graph, to_merge, down_layer)
 
         return []
 
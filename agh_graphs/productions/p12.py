@@ -3,7 +3,7 @@ from typing import List
 from networkx import Graph
 
 from agh_graphs.production import Production
-from agh_graphs.utils import get_neighbors_at, join_overlapping_vertices, get_common_neighbors
+from agh_graphs.utils import get_neighbors_at, merge_vertices, get_common_neighbors
 
 
 class P12(Production):
@@ -27,8 +27,7 @@ class P12(Production):
                 elif graph.nodes()[v]['position'] == pos_v2:
                     to_merge[1].append(v)
 
-        for v1, v2 in to_merge:
-            join_overlapping_vertices(graph, v1, v2, down_layer)
+        merge_vertices(graph, to_merge, down_layer)
 
         return []
 
@@ -2,8 +2,9 @@ from typing import List
 
 from networkx import Graph
 
+from agh_graphs.geometry import triangle_geometry
 from agh_graphs.production import Production
-from agh_graphs.utils import gen_name, add_interior, get_neighbors_at, sort_segments_by_angle, add_break_in_segment, \
+from agh_graphs.utils import gen_name, add_interior, get_neighbors_at, add_break_in_segment, \
     sort_vertices_by_coordinates
 
 
@@ -37,8 +38,12 @@ class P2(Production):
         graph.add_edge(vx_e2, vx_e3)
         graph.add_edge(vx_e3, vx_e1)
 
-        sorted_segments = sort_segments_by_angle(graph, [(vx_e1, vx_e2), (vx_e2, vx_e3), (vx_e3, vx_e1)])
-        segment_to_break = sorted_segments[orientation % 3]
+        geometry = triangle_geometry(graph, i)
+        copies = dict(zip(i_neighbors, [vx_e1, vx_e2, vx_e3]))
+        sorted_edges = sorted(range(3), key=lambda k: geometry.edge_angles[k])
+        edge_to_break = sorted_edges[orientation % 3]
+        segment_to_break = (copies[geometry.corners[edge_to_break]],
+                            copies[geometry.corners[(edge_to_break + 1) % 3]])
         b = add_break_in_segment(graph, segment_to_break)
         b_neighbors = get_neighbors_at(graph, b, i_layer + 1)
         remaining = [x for x in [vx_e1, vx_e2, vx_e3] if x not in b_neighbors][0]
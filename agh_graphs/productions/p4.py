@@ -2,9 +2,9 @@ from typing import List
 
 from networkx import Graph
 
+from agh_graphs.geometry import triangle_geometry
 from agh_graphs.production import Production
-from agh_graphs.utils import get_neighbors_at, gen_name, sort_segments_by_angle, add_interior, \
-    get_vertex_between
+from agh_graphs.utils import get_neighbors_at, gen_name, add_interior, get_vertex_between
 
 
 class P4(Production):
@@ -37,7 +37,12 @@ class P4(Production):
         graph.add_edge(new_e13, new_e3)
         graph.add_edge(new_e2, new_e3)
 
-        sorted_segments = sort_segments_by_angle(graph, [(new_e1, new_e2), (new_e1, new_e3)])
+        geometry = triangle_geometry(graph, i)
+        angle_12 = geometry.edge_angles[geometry.edge_index(e1, e2)]
+        angle_13 = geometry.edge_angles[geometry.edge_index(e1, e3)]
+        sorted_segments = [(new_e1, new_e2), (new_e1, new_e3)]
+        if angle_13 < angle_12:
+            sorted_segments.reverse()
         segment_to_break = sorted_segments[orientation % 2]
         (v1, v2) = segment_to_break
         b = get_vertex_between(graph, v1, v2, new_layer, 'E')
@@ -2,9 +2,9 @@ from typing import List
 
 from networkx import Graph
 
+from agh_graphs.geometry import triangle_geometry
 from agh_graphs.production import Production
-from agh_graphs.utils import gen_name, add_interior, get_neighbors_at, angle_with_x_axis
-import math
+from agh_graphs.utils import gen_name, add_interior, get_neighbors_at, is_exact
 from math import isclose
 
 
@@ -109,37 +109,14 @@ class P5(Production):
         chosen by switching segment 'orientation' times in counterclockwise direction.
         """
 
-        [a, b, c] = get_neighbors_at(graph, i, i_layer)
+        geometry = triangle_geometry(graph, i)
+        corners = list(geometry.corners)
 
-        # find counterclockwise order of nodes
-        (a_x, a_y) = graph.nodes[a]['position']
-        (b_x, b_y) = graph.nodes[b]['position']
-        (c_x, c_y) = graph.nodes[c]['position']
+        # the corner opposite to the longest edge goes to the middle
+        apex = (geometry.longest_edge + 2) % 3
+        offset = (apex - 1 + orientation) % 3
 
-        m = P5.calc_mean(a_x, a_y, b_x, b_y, c_x, c_y)
-
-        ma_angle = angle_with_x_axis(m, (a_x, a_y))
-        mb_angle = angle_with_x_axis(m, (b_x, b_y))
-        mc_angle = angle_with_x_axis(m, (c_x, c_y))
-
-        angles_counterclockwise = sorted([(a, ma_angle), (b, mb_angle), (c, mc_angle)], key=lambda p: p[1])
-        nodes_counterclockwise = [p[0] for p in angles_counterclockwise]
-
-        # find longest edge
-        ab = P5.calc_distance_between(graph, a, b)
-        bc = P5.calc_distance_between(graph, b, c)
-        ca = P5.calc_distance_between(graph, c, a)
-
-        if max(ab, bc, ca) == ab:
-            middle_offset = nodes_counterclockwise.index(c)
-        elif max(ab, bc, ca) == bc:
-            middle_offset = nodes_counterclockwise.index(a)
-        else:
-            middle_offset = nodes_counterclockwise.index(b)
-
-        offset = (orientation + (1 - middle_offset)) % 3
-
-        return nodes_counterclockwise[offset:] + nodes_counterclockwise[:offset]  # rotate table according to offset
+        return corners[offset:] + corners[:offset]  # rotate table according to offset
 
     @staticmethod
     def get_node_between(graph, e1, e2, layer, eps):
@@ -158,23 +135,12 @@ class P5(Production):
         return neighbours[0]
 
     @staticmethod
-    def calc_distance_between(graph, e1, e2):
-        """
-        Calculates distance between node e1 and node e2.
-        """
-        (e1_x, e1_y) = graph.nodes[e1]['position']
-        (e2_x, e2_y) = graph.nodes[e2]['position']
-        return math.sqrt((e1_x - e2_x) ** 2 + (e1_y - e2_y) ** 2)
-
-    @staticmethod
-    def calc_mean(e1_x, e1_y, e2_x, e2_y, e3_x, e3_y):
+    def is_close(pos1, pos2, eps):
         """
-        Calculates mean of x and y coordinates of e1, e2 and e3
+        Exact positions are compared exactly and `eps` is not used.
         """
-        return (e1_x + e2_x + e3_x) / 3, (e1_y + e2_y + e3_y) / 3
-
-    @staticmethod
-    def is_close(pos1, pos2, eps):
+        if is_exact(pos1) and is_exact(pos2):
+            return pos1 == pos2
         x1, y1 = pos1
         x2, y2 = pos2
         return isclose(x1, x2, abs_tol=eps) and isclose(y1, y2, abs_tol=eps)
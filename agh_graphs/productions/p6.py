@@ -2,7 +2,7 @@ from typing import List
 
 from networkx import Graph
 from agh_graphs.production import Production
-from agh_graphs.utils import get_neighbors_at, find_overlapping_vertices, join_overlapping_vertices, get_common_neighbors
+from agh_graphs.utils import get_neighbors_at, find_overlapping_vertices, merge_vertices, get_common_neighbors
 
 
 class P6(Production):
@@ -43,8 +43,7 @@ class P6(Production):
                     if v not in to_merge[2]:
                         to_merge[2].append(v)
 
-        for v1, v2 in to_merge:
-            join_overlapping_vertices(graph, v1, v2, down_layer)
+        merge_vertices(graph, to_merge, down_layer)
 
         return []
 
@@ -0,0 +1,95 @@
+"""
+Recording of derivations for replaying them with different positions.
+
+A derivation is run once with its positions parameter (e.g. `p1_positions`
+of `DerivationA`) traced (see `agh_graphs.affine`). The resulting graph,
+together with the coefficients of every position with respect to the
+traced positions, makes a `CompiledDerivation`. Positions of all vertexes
+for any number of sets of positions are then computed with a single matrix
+multiplication, without running the productions again.
+"""
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.affine import trace_position, coefficients_of
+
+
+class CompiledDerivation:
+    """
+    A recorded derivation.
+
+    `nodes` are ids of vertexes of the recorded graph, `layers` and `labels`
+    are their layers and labels and `edges` are pairs of their indexes.
+    Coordinates of vertex `k` are affine combinations of the corresponding
+    coordinates of the anchors given by `x_coefficients[k]` and
+    `y_coefficients[k]` (one coefficient per anchor, followed by the
+    constant term).
+    """
+
+    def __init__(self, nodes, layers, labels, edges, x_coefficients, y_coefficients):
+        self.nodes = nodes
+        self.layers = layers
+        self.labels = labels
+        self.edges = edges
+        self.x_coefficients = x_coefficients
+        self.y_coefficients = y_coefficients
+
+    def positions(self, anchors) -> np.ndarray:
+        """
+        Returns positions of all vertexes for `anchors` of shape `(k, 2)`, or
+        for a batch of them of shape `(b, k, 2)`, as an array of shape
+        `(n, 2)` or `(b, n, 2)` respectively.
+        """
+        anchors = np.asarray(anchors, dtype=float)
+        xs = np.einsum('nk,...k->...n', self.x_coefficients[:, :-1], anchors[..., 0]) + self.x_coefficients[:, -1]
+        ys = np.einsum('nk,...k->...n', self.y_coefficients[:, :-1], anchors[..., 1]) + self.y_coefficients[:, -1]
+        return np.stack([xs, ys], axis=-1)
+
+    def to_graph(self, anchors, graph: Graph = None) -> Graph:
+        """
+        Returns the graph the derivation gives for `anchors` of shape `(k, 2)`.
+        Vertexes have the ids of the recorded graph and are added to `graph`
+        (a new `Graph` by default).
+        """
+        if graph is None:
+            graph = Graph()
+        positions = self.positions(anchors).tolist()
+        graph.add_nodes_from(
+            (v, {'layer': layer, 'position': (x, y), 'label': label})
+            for v, layer, (x, y), label in zip(self.nodes, self.layers.tolist(), positions, self.labels))
+        graph.add_edges_from((self.nodes[a], self.nodes[b]) for a, b in self.edges.tolist())
+        return graph
+
+
+def compile_derivation(derivation, graph: Graph, parameter: str = 'p1_positions', positions=None,
+                       **params) -> CompiledDerivation:
+    """
+    Records `derivation.run(graph, **{parameter: positions}, **params)` on a
+    copy of `graph`, with `positions` traced.
+
+    The compiled derivation is valid for positions for which the productions
+    make the same geometric decisions (e.g. choice of the longest edge) as
+    for `positions`.
+    """
+    if positions is None:
+        positions = [(0, 0), (1, 0), (0, 1), (1, 1)]
+    size = len(positions)
+    traced_graph = graph.copy()
+    traced = [trace_position(p, k, size) for k, p in enumerate(positions)]
+    derivation.run(traced_graph, **{parameter: traced}, **params)
+
+    nodes = list(traced_graph.nodes())
+    index = {v: k for k, v in enumerate(nodes)}
+    node_data = traced_graph.nodes(data=True)
+    return CompiledDerivation(
+        nodes=nodes,
+        layers=np.array([node_data[v]['layer'] for v in nodes], dtype=int),
+        labels=[node_data[v]['label'] for v in nodes],
+        edges=np.array([(index[a], index[b]) for a, b in traced_graph.edges()], dtype=int).reshape(-1, 2),
+        x_coefficients=__coefficients(traced_graph, nodes, 0, size),
+        y_coefficients=__coefficients(traced_graph, nodes, 1, size))
+
+
+def __coefficients(graph: Graph, nodes, axis: int, size: int) -> np.ndarray:
+    node_positions = graph.nodes(data='position')
+    return np.array([coefficients_of(node_positions[v][axis], size) for v in nodes]).reshape(-1, size + 1)
@@ -0,0 +1,224 @@
+"""
+Declarative derivation scripts.
+
+A script is a JSON object, e.g.
+
+    {
+        "graph": "layered",
+        "initial": {"position": [0.5, 0.5]},
+        "kwargs": {"positions": [[0, 0], [1, 0], [0, 1], [1, 1]]},
+        "steps": [
+            {"production": "P1", "inputs": ["root"], "outputs": ["i1", "i2"]},
+            {"production": "P9", "inputs": ["i1"], "outputs": ["i1_"]},
+            {"production": "P2", "inputs": [{"layer": 1, "label": "I", "near": [0.7, 0.3]}], "orientation": 1,
+             "as": "split"},
+            {"production": "P2", "inputs": ["split[0]"]}
+        ]
+    }
+
+`graph` is `"plain"` (default, `networkx.Graph`), `"layered"`
+(`LayeredGraph`) or `"compact"` (`CompactGraph`). `initial` is either the
+initial `E` vertex (its `layer`, `position` and `label` may be given) bound
+to `root`, or `{"mesh": <path to an OBJ or MSH file>}` imported with
+`agh_graphs.mesh.import_mesh`, binding `root` and the list `interiors`.
+
+Each step names a production from `PRODUCTIONS` and its inputs. An input is
+a name bound by a previous step (`"i1"`), an element of a bound list
+(`"split[0]"`) or a query `{"layer": ..., "label": ..., "near": [x, y]}`
+which selects the vertex with the given layer and label (closest to `near`,
+if there are many). `outputs` names the returned vertexes one by one (`null`
+skips one) and `as` binds the whole list. `orientation` and `kwargs` are
+optional; `kwargs` of the script are passed to all steps and `positions`
+are converted to tuples.
+
+Names are resolved to references to outputs of steps before the script is
+run, and queries right before their step, so a script is run by
+`ScriptRun`, which takes hooks of `agh_graphs.production.SequenceRun`
+(e.g. `agh_graphs.checkpoint.Checkpointing`) like other runs.
+"""
+import json
+import math
+import re
+import time
+from typing import List
+
+from networkx import Graph
+
+from agh_graphs.graph import LayeredGraph, CompactGraph, layer_nodes
+from agh_graphs.mesh import READERS, import_mesh
+from agh_graphs.production import Step, StepHook, SequenceRun
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p11 import P11
+from agh_graphs.productions.p12 import P12
+from agh_graphs.productions.p2 import P2
+from agh_graphs.productions.p4 import P4
+from agh_graphs.productions.p5 import P5
+from agh_graphs.productions.p6 import P6
+from agh_graphs.productions.p8 import P8
+from agh_graphs.productions.p9 import P9
+from agh_graphs.utils import gen_name
+
+PRODUCTIONS = {
+    'P1': P1,
+    'P2': P2,
+    'P4': P4,
+    'P5': P5,
+    'P6': P6,
+    'P8': P8,
+    'P9': P9,
+    'P11': P11,
+    'P12': P12,
+}
+
+GRAPHS = {
+    'plain': Graph,
+    'layered': LayeredGraph,
+    'compact': CompactGraph,
+}
+
+
+class StepReport:
+    """
+    Time taken by a step of a script and the size of the graph after it.
+    """
+    __slots__ = ('index', 'production', 'seconds', 'nodes', 'edges')
+
+    def __init__(self, index: int, production: str, seconds: float, nodes: int, edges: int):
+        self.index = index
+        self.production = production
+        self.seconds = seconds
+        self.nodes = nodes
+        self.edges = edges
+
+
+def load_script(path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+class Timing(StepHook):
+    """
+    Collects `reports` of the steps of a run.
+    """
+
+    def __init__(self):
+        self.reports = []
+        self.__start = None
+
+    def before_step(self, run, step, step_input):
+        self.__start = time.perf_counter()
+
+    def after_step(self, run, step, step_input, step_output):
+        seconds = time.perf_counter() - self.__start
+        self.reports.append(StepReport(len(run.outputs) - 1, str(step.production), seconds,
+                                       run.graph.number_of_nodes(), run.graph.number_of_edges()))
+
+
+class ScriptRun(SequenceRun):
+    """
+    A run of steps of a script. Inputs of the steps are references
+    `(step, index)` or queries, which are resolved against the graph right
+    before their step.
+    """
+
+    def resolve_inputs(self, step: Step) -> List[str]:
+        return [_query(self.graph, ref) if isinstance(ref, dict)
+                else self.prod_input[ref[1]] if ref[0] == -1 else self.outputs[ref[0]][ref[1]]
+                for ref in step.inputs]
+
+
+def run_script(script: dict, hooks=()) -> (Graph, List[StepReport]):
+    """
+    Runs `script` with `hooks` and returns the derived graph and reports of
+    its steps.
+    """
+    graph = GRAPHS[script.get('graph', 'plain')]()
+    prod_input, symbols = __initialize(graph, script.get('initial', {}))
+    steps = __compile(script['steps'], symbols)
+
+    timing = Timing()
+    ScriptRun(graph, steps, prod_input, list(hooks) + [timing], **__convert_kwargs(script.get('kwargs', {}))).run()
+    return graph, timing.reports
+
+
+def format_report(reports: List[StepReport]) -> str:
+    """
+    Returns a table with reports of steps followed by totals per production.
+    """
+    lines = ['{:>5}  {:<10} {:>12} {:>10} {:>10}'.format('step', 'production', 'time [ms]', 'vertexes', 'edges')]
+    for r in reports:
+        lines.append('{:>5}  {:<10} {:>12.3f} {:>10} {:>10}'.format(
+            r.index, r.production, r.seconds * 1000, r.nodes, r.edges))
+
+    lines.append('')
+    lines.append('{:<10} {:>7} {:>12} {:>12}'.format('production', 'count', 'total [ms]', 'mean [ms]'))
+    totals = {}
+    for r in reports:
+        count, seconds = totals.get(r.production, (0, 0.0))
+        totals[r.production] = (count + 1, seconds + r.seconds)
+    for production, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append('{:<10} {:>7} {:>12.3f} {:>12.3f}'.format(production, count, seconds * 1000,
+                                                               seconds * 1000 / count))
+    return '\n'.join(lines)
+
+
+def __initialize(graph: Graph, initial: dict):
+    # a symbol is a reference `(step, index)` to a vertex or `(step, offset, length)` to a list of vertexes
+    if 'mesh' in initial:
+        path = initial['mesh']
+        mesh = import_mesh(graph, READERS[path.rsplit('.', 1)[-1].lower()](path))
+        [root] = set(graph.nodes()) - set(mesh.nodes) - set(mesh.interiors)
+        return [root] + mesh.interiors, {'root': (-1, 0), 'interiors': (-1, 1, len(mesh.interiors))}
+
+    root = gen_name()
+    graph.add_node(root, layer=initial.get('layer', 0), position=tuple(initial.get('position', (0.5, 0.5))),
+                   label=initial.get('label', 'E'))
+    return [root], {'root': (-1, 0)}
+
+
+def __compile(script_steps: List[dict], symbols: dict) -> List[Step]:
+    steps = []
+    for k, step in enumerate(script_steps):
+        inputs = [__reference(symbols, ref) for ref in step['inputs']]
+        kwargs = __convert_kwargs(step.get('kwargs', {}))
+        steps.append(Step(PRODUCTIONS[step['production']](), inputs, step.get('orientation', 0), **kwargs))
+        for index, name in enumerate(step.get('outputs', [])):
+            if name is not None:
+                symbols[name] = (k, index)
+        if 'as' in step:
+            symbols[step['as']] = (k, 0, None)
+    return steps
+
+
+def __reference(symbols: dict, ref):
+    if isinstance(ref, dict):
+        return ref
+    match = re.fullmatch(r'(.+)\[(-?\d+)]', ref)
+    if not match:
+        if len(symbols[ref]) != 2:
+            raise ValueError('{} is a list, choose one of its vertexes'.format(ref))
+        return symbols[ref]
+    s, offset, length = symbols[match.group(1)]
+    index = int(match.group(2))
+    if index < 0 and length is not None:
+        index += length
+    return s, offset + index
+
+
+def _query(graph: Graph, query: dict):
+    candidates = [v for v in layer_nodes(graph, query['layer'])
+                  if 'label' not in query or graph.nodes[v]['label'] == query['label']]
+    if not candidates:
+        raise ValueError('no vertex matches {}'.format(query))
+    if 'near' in query:
+        return min(candidates, key=lambda v: math.dist(graph.nodes[v]['position'], query['near']))
+    if len(candidates) > 1:
+        raise ValueError('{} vertexes match {}, add "near" to choose one'.format(len(candidates), query))
+    return candidates[0]
+
+
+def __convert_kwargs(kwargs: dict) -> dict:
+    kwargs = dict(kwargs)
+    if 'positions' in kwargs:
+        kwargs['positions'] = [tuple(p) for p in kwargs['positions']]
+    return kwargs
@@ -0,0 +1,233 @@
+"""
+Derivations which keep only the active layers in memory.
+
+Productions change only the layers of their inputs and the layers above
+them. Once no pending step of a sequence refers to a vertex on a layer (or
+below it), the layer is frozen: the `Spilling` hook of
+`agh_graphs.production.SequenceRun` saves it to a columnar store on disk
+(see `agh_graphs.storage.save_columnar`) and removes it from the graph.
+Spilled layers stay readable through `SpilledLayers`.
+
+If older layers are not needed at all, the `Retaining` hook drops frozen
+layers which are not retained by a policy (e.g. only the last layer and the
+root). `run_spilling` and `run_retaining` apply steps with just one of the
+hooks.
+"""
+import os
+import re
+import shutil
+from typing import List
+
+from networkx import Graph
+
+from agh_graphs.graph import layer_nodes
+from agh_graphs.production import Step, StepHook, apply_sequence
+from agh_graphs.storage import ColumnarGraph, save_columnar
+
+
+class SpilledLayers:
+    """
+    Layers spilled to `directory`, one columnar store per layer.
+
+    The store of a layer also contains the vertexes of the next layer which
+    are connected with it, so edges between the layers are kept; only the
+    ids of these vertexes are meaningful, their attributes may have changed
+    after the layer was spilled.
+
+    Stores are written to a temporary directory which is then renamed, so
+    layers already spilled to `directory` (e.g. by an interrupted run) are
+    complete and are opened again.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.layers = {}
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            match = re.fullmatch(r'layer_(\d+)', name)
+            if match:
+                self.layers[int(match.group(1))] = ColumnarGraph(os.path.join(directory, name))
+
+    def __contains__(self, layer: int) -> bool:
+        return layer in self.layers
+
+    def spill(self, graph: Graph, layer: int):
+        """
+        Saves layer `layer` of `graph` and removes it from `graph`.
+        """
+        nodes = layer_nodes(graph, layer)
+        node_layers = graph.nodes(data='layer')
+        children = {n for v in nodes for n in graph.adj[v] if node_layers[n] == layer + 1}
+        path = os.path.join(self.directory, 'layer_{}'.format(layer))
+        temporary_path = path + '.tmp'
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        save_columnar(graph.subgraph(nodes + list(children)), temporary_path)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temporary_path, path)
+        graph.remove_nodes_from(nodes)
+        self.layers[layer] = ColumnarGraph(path)
+
+    def layer_graph(self, layer: int, graph: Graph = None) -> Graph:
+        """
+        Returns the spilled layer `layer` as a graph (added to `graph`, a new
+        `Graph` by default).
+        """
+        return self.layers[layer].layer_graph(layer, graph)
+
+    def cross_edges(self, layer: int) -> list:
+        """
+        Returns edges (pairs of ids) between the spilled layer `layer` and the
+        next layer.
+        """
+        store = self.layers[layer]
+        rows = store.layer_rows(layer)
+        ids = store.node_ids(range(len(store)))
+        edges = store.edges(rows, within=False)
+        edges = edges[(edges[:, 1] < rows.start) | (edges[:, 1] >= rows.stop)]
+        return [(ids[u], ids[v]) for u, v in edges.tolist()]
+
+    def restore(self, graph: Graph) -> Graph:
+        """
+        Adds all spilled layers back to `graph`.
+        """
+        for layer in sorted(self.layers):
+            self.layer_graph(layer, graph)
+        for layer in sorted(self.layers):
+            graph.add_edges_from(e for e in self.cross_edges(layer) if e[1] in graph)
+        return graph
+
+
+def frozen_below(graph: Graph, steps: List[Step], prod_input: List[str], outputs: List[List[str]]):
+    """
+    Returns the lowest layer which may still be changed by `steps` following
+    the applied ones (with `outputs`), i.e. the lowest layer of vertexes
+    referred to by them (or queried, see `agh_graphs.script`), or `None` if
+    there are no such steps.
+    """
+    node_layers = graph.nodes(data='layer')
+    layers = []
+    for step in steps[len(outputs):]:
+        for ref in step.inputs:
+            if isinstance(ref, dict):
+                layers.append(ref['layer'])
+                continue
+            s, index = ref
+            v = prod_input[index] if s == -1 else outputs[s][index] if s < len(outputs) else None
+            if v in graph:
+                layers.append(node_layers[v])
+    return min(layers, default=None)
+
+
+class Spilling(StepHook):
+    """
+    Spills frozen layers (see `frozen_below`) of a run to `directory` after
+    each step, in order, starting from the layer 0. Spilled layers are in
+    `spilled`.
+
+    A run resumed by a hook preceding this one (e.g.
+    `agh_graphs.checkpoint.Checkpointing`) continues after the layers
+    already spilled to `directory`, which are removed from the graph if
+    they are still there; a new run spills all its layers again.
+    """
+
+    def __init__(self, directory):
+        self.spilled = SpilledLayers(directory)
+        self.next_layer = 0
+
+    def start(self, run):
+        if not run.outputs:
+            self.spilled.layers.clear()
+        for layer in sorted(self.spilled.layers):
+            run.graph.remove_nodes_from(layer_nodes(run.graph, layer))
+        self.next_layer = max(self.spilled.layers, default=-1) + 1
+
+    def after_step(self, run, step, step_input, step_output):
+        threshold = frozen_below(run.graph, run.steps, run.prod_input, run.outputs)
+        while threshold is not None and self.next_layer < threshold:
+            self.spilled.spill(run.graph, self.next_layer)
+            self.next_layer += 1
+
+
+def run_spilling(graph: Graph, steps: List[Step], prod_input: List[str], directory, **kwargs):
+    """
+    Applies productions of `steps` on `graph` (see
+    `agh_graphs.production.apply_sequence`), spilling frozen layers to
+    `directory` (see `Spilling`).
+
+    Returns lists of vertexes returned by each step and the `SpilledLayers`.
+    """
+    spilling = Spilling(directory)
+    outputs = apply_sequence(graph, steps, prod_input, [spilling], **kwargs)
+    return outputs, spilling.spilled
+
+
+def drop_layer(graph: Graph, layer: int):
+    """
+    Removes layer `layer` from `graph`. Neighbors of its vertexes on lower
+    layers are connected with their neighbors on higher layers, so e.g.
+    interiors of the next layer become children of the interiors their
+    parents were children of.
+    """
+    nodes = layer_nodes(graph, layer)
+    node_layers = graph.nodes(data='layer')
+    for v in nodes:
+        lower = [n for n in graph.adj[v] if node_layers[n] < layer]
+        upper = [n for n in graph.adj[v] if node_layers[n] > layer]
+        graph.add_edges_from((p, c) for p in lower for c in upper)
+    graph.remove_nodes_from(nodes)
+
+
+def is_retained(layer: int, top: int, keep_last: int = None, keep=None) -> bool:
+    """
+    Checks whether layer `layer` is retained when the highest layer is `top`:
+    whether it is one of the `keep_last` highest layers or it is in `keep`,
+    where negative layers count from the highest one (`-1` is `top`). All
+    layers are retained if neither `keep_last` nor `keep` is given.
+    """
+    if keep_last is None and keep is None:
+        return True
+    if keep_last is not None and layer > top - keep_last:
+        return True
+    return any(layer == (k if k >= 0 else top + 1 + k) for k in keep or ())
+
+
+class Retaining(StepHook):
+    """
+    Drops frozen layers (see `frozen_below`) of a run which are not retained
+    (see `is_retained`) after each step and at the end, so the number of
+    layers in memory does not grow with the depth of the derivation. The
+    highest layer is the highest one reached by the run (see
+    `agh_graphs.production.SequenceRun.top_layer`).
+    """
+
+    def __init__(self, keep_last: int = None, keep=None):
+        self.keep_last = keep_last
+        self.keep = keep
+        self.dropped = set()
+
+    def after_step(self, run, step, step_input, step_output):
+        threshold = frozen_below(run.graph, run.steps, run.prod_input, run.outputs)
+        if threshold is not None:
+            self.__drop_frozen(run, threshold)
+
+    def finish(self, run):
+        self.__drop_frozen(run, run.top_layer + 1)
+
+    def __drop_frozen(self, run, threshold: int):
+        top = run.top_layer
+        for layer in range(min(threshold, top + 1)):
+            if layer not in self.dropped and not is_retained(layer, top, self.keep_last, self.keep):
+                drop_layer(run.graph, layer)
+                self.dropped.add(layer)
+
+
+def run_retaining(graph: Graph, steps: List[Step], prod_input: List[str], keep_last: int = None, keep=None,
+                  **kwargs) -> List[List[str]]:
+    """
+    Applies productions of `steps` on `graph` (see
+    `agh_graphs.production.apply_sequence`), dropping layers which are not
+    retained (see `Retaining`).
+
+    Returns lists of vertexes returned by each step.
+    """
+    return apply_sequence(graph, steps, prod_input, [Retaining(keep_last, keep)], **kwargs)
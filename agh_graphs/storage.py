@@ -0,0 +1,228 @@
+"""
+Saving and loading of layered graphs in compact binary formats.
+
+A graph is stored in a `.npz` file (see `save_graph`) or in a directory of
+memory-mappable `.npy` files (see `save_columnar`) as columns: vertex ids,
+layers, positions and label codes (with the table of labels), and edges.
+Ids of vertices have to be all `int`s or all strings. Only the `layer`,
+`position` and `label` attributes of vertices are stored; positions are
+stored as `float64`, so graphs with exact positions (see
+`agh_graphs.utils.is_exact`) are rejected instead of being rounded.
+"""
+import os
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.ordering import spatial_order
+from agh_graphs.utils import reject_exact
+
+
+def graph_to_arrays(graph: Graph) -> dict:
+    """
+    Returns columns of `graph` as a dict of arrays.
+    """
+    reject_exact((position for _, position in graph.nodes(data='position')), 'storage')
+    nodes = list(graph.nodes())
+    index = {v: k for k, v in enumerate(nodes)}
+    node_data = graph.nodes(data=True)
+    labels = sorted({data['label'] for _, data in node_data})
+    label_codes = {label: code for code, label in enumerate(labels)}
+
+    return {
+        'ids': __ids_array(nodes),
+        'layer': np.array([node_data[v]['layer'] for v in nodes], dtype=np.int32),
+        'position': np.array([node_data[v]['position'] for v in nodes], dtype=np.float64).reshape(-1, 2),
+        'label': np.array([label_codes[node_data[v]['label']] for v in nodes], dtype=np.uint8),
+        'labels': np.array(labels, dtype=str),
+        'edges': np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2),
+    }
+
+
+def arrays_to_graph(arrays, graph: Graph = None, ids=None) -> Graph:
+    """
+    Builds a graph from columns returned by `graph_to_arrays`.
+
+    Vertices are added to `graph` (a new `Graph` by default). If `ids` are
+    given, they are used instead of the stored ids.
+    """
+    if graph is None:
+        graph = Graph()
+    ids = arrays['ids'].tolist() if ids is None else list(ids)
+    labels = arrays['labels'].tolist()
+    graph.add_nodes_from(
+        (v, {'layer': layer, 'position': (x, y), 'label': labels[code]})
+        for v, layer, (x, y), code in zip(ids, arrays['layer'].tolist(), arrays['position'].tolist(),
+                                          arrays['label'].tolist()))
+    graph.add_edges_from((ids[u], ids[v]) for u, v in arrays['edges'].tolist())
+    return graph
+
+
+def save_graph(graph: Graph, file, **extra_arrays):
+    """
+    Saves `graph` to `file` (a path or a file object) in the compressed
+    `.npz` format. `extra_arrays` are saved along with the graph.
+    """
+    np.savez_compressed(file, **graph_to_arrays(graph), **extra_arrays)
+
+
+def load_graph(file, graph: Graph = None) -> Graph:
+    """
+    Loads a graph saved with `save_graph`, adding its vertices to `graph`
+    (a new `Graph` by default).
+    """
+    with np.load(file) as arrays:
+        return arrays_to_graph(arrays, graph)
+
+
+COLUMNS = ('layer', 'x', 'y', 'label', 'labels', 'layers', 'layer_offsets', 'indptr', 'indices', 'ids')
+
+
+def save_columnar(graph: Graph, directory):
+    """
+    Saves `graph` to `directory` as separate `.npy` files which can be
+    memory-mapped (see `ColumnarGraph`).
+
+    Vertexes are stored as rows sorted by layer and then spatially (see
+    `agh_graphs.ordering.spatial_order`), in columns `layer`, `x`, `y` and
+    `label` (codes into the table `labels`). Rows of the layer
+    `layers[k]` are `layer_offsets[k]:layer_offsets[k + 1]`. Edges are
+    stored in both directions in the CSR format: neighbors of the row `r`
+    are `indices[indptr[r]:indptr[r + 1]]`. Ids of vertexes are stored in
+    `ids` unless they are the row numbers.
+    """
+    reject_exact((position for _, position in graph.nodes(data='position')), 'storage')
+    os.makedirs(directory, exist_ok=True)
+    nodes = spatial_order(graph)
+    row = {v: r for r, v in enumerate(nodes)}
+    node_data = graph.nodes(data=True)
+    labels = sorted({data['label'] for _, data in node_data})
+    label_codes = {label: code for code, label in enumerate(labels)}
+    layer = np.array([node_data[v]['layer'] for v in nodes], dtype=np.int32)
+    layers, layer_starts = np.unique(layer, return_index=True)
+    neighbors = [sorted(row[n] for n in graph.adj[v]) for v in nodes]
+
+    columns = {
+        'layer': layer,
+        'x': np.array([float(node_data[v]['position'][0]) for v in nodes], dtype=np.float64),
+        'y': np.array([float(node_data[v]['position'][1]) for v in nodes], dtype=np.float64),
+        'label': np.array([label_codes[node_data[v]['label']] for v in nodes], dtype=np.uint8),
+        'labels': np.array(labels, dtype=str),
+        'layers': layers.astype(np.int32),
+        'layer_offsets': np.append(layer_starts, len(nodes)).astype(np.int64),
+        'indptr': np.cumsum([0] + [len(n) for n in neighbors], dtype=np.int64),
+        'indices': np.fromiter((n for ns in neighbors for n in ns), dtype=np.int64),
+    }
+    if nodes != list(range(len(nodes))):
+        columns['ids'] = __ids_array(nodes)
+    for name in COLUMNS:
+        path = os.path.join(directory, name + '.npy')
+        if name in columns:
+            np.save(path, columns[name])
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class ColumnarGraph:
+    """
+    A read-only graph saved with `save_columnar`.
+
+    Columns are memory-mapped, so opening the graph takes constant time and
+    only the parts of the columns which are accessed (e.g. a single layer)
+    are read from the disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = {}
+        for name in COLUMNS:
+            path = os.path.join(directory, name + '.npy')
+            if os.path.exists(path):
+                self.columns[name] = np.load(path, mmap_mode='r')
+        self.labels = self.columns['labels'].tolist()
+        self.layers = self.columns['layers'].tolist()
+
+    def __len__(self):
+        return len(self.columns['layer'])
+
+    def layer_rows(self, layer: int) -> range:
+        """
+        Returns rows of vertexes on layer `layer`.
+        """
+        if layer not in self.layers:
+            return range(0)
+        k = self.layers.index(layer)
+        offsets = self.columns['layer_offsets']
+        return range(int(offsets[k]), int(offsets[k + 1]))
+
+    def node_ids(self, rows: range) -> list:
+        """
+        Returns ids of vertexes in `rows`.
+        """
+        if 'ids' not in self.columns:
+            return list(rows)
+        return self.columns['ids'][rows.start:rows.stop].tolist()
+
+    def positions(self, rows: range) -> np.ndarray:
+        """
+        Returns positions of vertexes in `rows` as an array of shape `(n, 2)`.
+        """
+        return np.stack([self.columns['x'][rows.start:rows.stop], self.columns['y'][rows.start:rows.stop]], axis=1)
+
+    def node_labels(self, rows: range) -> list:
+        """
+        Returns labels of vertexes in `rows`.
+        """
+        return [self.labels[code] for code in self.columns['label'][rows.start:rows.stop].tolist()]
+
+    def neighbors(self, row: int) -> np.ndarray:
+        """
+        Returns rows of neighbors of the vertex in row `row`.
+        """
+        indptr = self.columns['indptr']
+        return np.asarray(self.columns['indices'][indptr[row]:indptr[row + 1]])
+
+    def edges(self, rows: range, within: bool = True) -> np.ndarray:
+        """
+        Returns edges (pairs of rows, each edge once) of vertexes in `rows`;
+        if `within` is set, only edges between vertexes in `rows`.
+        """
+        indptr = np.asarray(self.columns['indptr'][rows.start:rows.stop + 1])
+        indices = np.asarray(self.columns['indices'][indptr[0]:indptr[-1]])
+        sources = np.repeat(np.arange(rows.start, rows.stop), np.diff(indptr))
+        keep = (sources < indices) | ((indices < rows.start) | (indices >= rows.stop))
+        if within:
+            keep &= (indices >= rows.start) & (indices < rows.stop)
+        return np.stack([sources[keep], indices[keep]], axis=1)
+
+    def layer_graph(self, layer: int, graph: Graph = None) -> Graph:
+        """
+        Returns the layer `layer` as a graph (added to `graph`, a new `Graph`
+        by default), reading only the rows of this layer.
+        """
+        return self.__to_graph(self.layer_rows(layer), graph)
+
+    def to_graph(self, graph: Graph = None) -> Graph:
+        """
+        Returns the whole graph (added to `graph`, a new `Graph` by default).
+        """
+        return self.__to_graph(range(len(self)), graph)
+
+    def __to_graph(self, rows: range, graph: Graph = None) -> Graph:
+        if graph is None:
+            graph = Graph()
+        ids = self.node_ids(rows)
+        graph.add_nodes_from(
+            (v, {'layer': layer, 'position': (x, y), 'label': label})
+            for v, layer, (x, y), label in zip(ids, self.columns['layer'][rows.start:rows.stop].tolist(),
+                                               self.positions(rows).tolist(), self.node_labels(rows)))
+        graph.add_edges_from((ids[u - rows.start], ids[v - rows.start]) for u, v in self.edges(rows).tolist())
+        return graph
+
+
+def __ids_array(nodes) -> np.ndarray:
+    if all(isinstance(v, int) for v in nodes):
+        return np.array(nodes, dtype=np.int64)
+    if all(isinstance(v, str) for v in nodes):
+        return np.array(nodes, dtype=str)
+    raise ValueError('ids of vertices have to be all ints or all strings')
@@ -0,0 +1,129 @@
+"""
+Streaming application of sequences of productions.
+
+`stream_sequence` applies steps one after another like
+`agh_graphs.production.apply_sequence`, but it is a generator which yields a
+`Delta` describing the changes made by each step, computed by the
+`Streaming` hook. Deltas are computed from
+snapshots of the neighborhoods of the inputs of each step, not of the whole
+graph, so their cost does not depend on the size of the graph.
+"""
+from typing import List
+
+from networkx import Graph
+
+from agh_graphs.production import Production, Step, StepHook, SequenceRun
+from agh_graphs.utils import is_close
+
+
+class Delta:
+    """
+    Changes made to a graph by a single application of a production.
+
+    `created_nodes` maps ids of new vertexes to their attributes and
+    `removed_nodes` are ids of removed vertexes; a removed vertex which was
+    merged into another vertex at the same layer and position is mapped to
+    it in `merged_nodes`. `relabels` and `moves` map ids of existing vertexes
+    to their new labels and positions.
+    """
+    __slots__ = ('production', 'inputs', 'outputs', 'created_nodes', 'created_edges', 'removed_nodes',
+                 'removed_edges', 'merged_nodes', 'relabels', 'moves')
+
+    def __init__(self, production: Production, inputs: List[str], outputs: List[str]):
+        self.production = production
+        self.inputs = inputs
+        self.outputs = outputs
+        self.created_nodes = {}
+        self.created_edges = []
+        self.removed_nodes = []
+        self.removed_edges = []
+        self.merged_nodes = {}
+        self.relabels = {}
+        self.moves = {}
+
+    def __str__(self) -> str:
+        return '{}: +{} -{} vertexes, +{} -{} edges'.format(
+            self.production, len(self.created_nodes), len(self.removed_nodes),
+            len(self.created_edges), len(self.removed_edges))
+
+
+class Streaming(StepHook):
+    """
+    Computes `delta`, the `Delta` of the last applied step.
+
+    A production may only change vertexes within `radius` edges from its
+    inputs, which holds for all productions in `agh_graphs.productions`
+    with the default `radius`.
+    """
+
+    def __init__(self, radius: int = 2):
+        self.radius = radius
+        self.delta = None
+        self.__before = None
+
+    def before_step(self, run, step, step_input):
+        self.__before = _snapshot(run.graph, step_input, self.radius + 1)
+
+    def after_step(self, run, step, step_input, step_output):
+        self.delta = _delta(run.graph, step.production, step_input, step_output, self.__before, self.radius)
+        self.__before = None
+
+
+def stream_sequence(graph: Graph, steps: List[Step], prod_input: List[str], radius: int = 2, hooks=(), **kwargs):
+    """
+    Applies productions of `steps` one after another on `graph` (see
+    `agh_graphs.production.apply_sequence`), yielding a `Delta` after each
+    step (see `Streaming`). Returns lists of vertexes returned by each step.
+    """
+    streaming = Streaming(radius)
+    run = SequenceRun(graph, steps, prod_input, list(hooks) + [streaming], **kwargs)
+    for _ in run:
+        yield streaming.delta
+    return run.outputs
+
+
+def _snapshot(graph: Graph, sources: List[str], radius: int):
+    nodes = {v: dict(graph.nodes[v]) for v in __neighborhood(graph, sources, radius)}
+    edges = {frozenset(e) for e in graph.subgraph(nodes).edges()}
+    return nodes, edges
+
+
+def _delta(graph: Graph, production: Production, inputs: List[str], outputs: List[str], before, radius: int):
+    before_nodes, before_edges = before
+    delta = Delta(production, inputs, outputs)
+    after_nodes, after_edges = _snapshot(graph, [v for v in inputs + outputs if v in graph], radius)
+
+    for v, data in after_nodes.items():
+        if v not in before_nodes:
+            delta.created_nodes[v] = data
+        else:
+            if data['label'] != before_nodes[v]['label']:
+                delta.relabels[v] = data['label']
+            if data['position'] != before_nodes[v]['position']:
+                delta.moves[v] = data['position']
+
+    for v, data in before_nodes.items():
+        if v not in graph:
+            delta.removed_nodes.append(v)
+            for n, n_data in after_nodes.items():
+                if n_data['layer'] == data['layer'] and is_close(n_data['position'], data['position']):
+                    delta.merged_nodes[v] = n
+                    break
+
+    delta.created_edges = [tuple(e) for e in after_edges - before_edges]
+    delta.removed_edges = [tuple(e) for e in before_edges if not graph.has_edge(*e)]
+    return delta
+
+
+def __neighborhood(graph: Graph, sources: List[str], radius: int) -> List[str]:
+    visited = dict.fromkeys(sources)
+    frontier = list(sources)
+    for _ in range(radius):
+        next_frontier = []
+        for v in frontier:
+            for n in graph.neighbors(v):
+                if n not in visited:
+                    visited[n] = None
+                    next_frontier.append(n)
+        frontier = next_frontier
+    return list(visited)
@@ -0,0 +1,209 @@
+"""
+Parallel parameter sweeps of derivations.
+
+A sweep runs a task (a picklable function, e.g. `derivation_task` or
+`script_task`) for each set of parameters in a pool of processes. Each
+task builds its graph in the worker and returns only its summary (see
+`graph_summary` and `serialized_graph`), so little data is sent between
+the processes. At most `max_in_flight` tasks are submitted at once and
+results are yielded as soon as they are ready.
+
+Results may be appended to a file as they come, together with their
+parameters and a key of the parameters (see `parameters_key`); a sweep with
+the same file skips the parameters whose results are already there, so a
+cancelled or interrupted sweep can be resumed, even with the parameters
+reordered or extended.
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import pickle
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from networkx import Graph
+
+from agh_graphs.hashing import structural_hash
+from agh_graphs.script import run_script
+from agh_graphs.storage import save_graph
+from agh_graphs.utils import gen_name
+
+
+def graph_summary(graph: Graph) -> dict:
+    """
+    Returns numbers of vertexes and edges, numbers of vertexes per layer and
+    label and the structural hash of `graph`.
+    """
+    return {
+        'nodes': graph.number_of_nodes(),
+        'edges': graph.number_of_edges(),
+        'labels': dict(Counter((data['layer'], data['label']) for _, data in graph.nodes(data=True))),
+        'hash': structural_hash(graph).hexdigest(),
+    }
+
+
+def serialized_graph(graph: Graph) -> bytes:
+    """
+    Returns `graph` serialized with `agh_graphs.storage.save_graph`.
+    """
+    file = io.BytesIO()
+    save_graph(graph, file)
+    return file.getvalue()
+
+
+def derivation_task(derivation_class, p1_positions, summary=graph_summary, **options):
+    """
+    Runs `derivation_class(**options)` from a single `E` vertex with
+    `p1_positions` and returns `summary` of the derived graph.
+    """
+    graph = Graph()
+    graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+    derivation_class(**options).run(graph, [tuple(p) for p in p1_positions])
+    return summary(graph)
+
+
+def script_task(script: dict, summary=graph_summary, orientations=None, kwargs=None):
+    """
+    Runs the derivation script `script` (see `agh_graphs.script`) and returns
+    `summary` of the derived graph. `orientations` (one per step, `None`
+    keeps the orientation of the step) and `kwargs` override the ones
+    given in the script.
+    """
+    script = copy.deepcopy(script)
+    if kwargs:
+        script['kwargs'] = dict(script.get('kwargs', {}), **kwargs)
+    for step, orientation in zip(script['steps'], orientations or []):
+        if orientation is not None:
+            step['orientation'] = orientation
+    graph, _ = run_script(script)
+    return summary(graph)
+
+
+def parameters_key(params: dict) -> str:
+    """
+    Returns the SHA-256 digest of the canonical encoding of `params` (see
+    `canonical_parameters`), which identifies their results in a file of
+    results.
+    """
+    return hashlib.sha256(canonical_parameters(params).encode()).hexdigest()
+
+
+def canonical_parameters(params: dict) -> str:
+    """
+    Returns `params` encoded as JSON with sorted keys of dicts, tuples
+    encoded like lists, and classes and functions (e.g. `derivation_class`
+    or `summary`) encoded by their qualified names, so parameters which
+    differ only in these respects are encoded the same.
+    """
+    return json.dumps(params, sort_keys=True, default=__canonical_value)
+
+
+def __canonical_value(value):
+    if isinstance(value, type) or callable(value) and hasattr(value, '__qualname__'):
+        return '{}.{}'.format(value.__module__, value.__qualname__)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError('parameters of type {} cannot be encoded'.format(type(value).__name__))
+
+
+class Sweep:
+    """
+    Runs `task(**params)` for each `params` of `parameters`.
+
+    Iterate over `run()` to get pairs `(index, result)`, where `index` is
+    the index of the parameters, in the order of completion. If
+    `results_path` is given, results are appended to this file and
+    parameters with results already there are skipped (their results are
+    not yielded again, see `load_results`). Parameters are matched with the
+    stored ones by their keys (see `parameters_key`); a `ValueError` is
+    raised if the canonical encodings of the stored parameters with the
+    same key differ.
+    """
+
+    def __init__(self, task, parameters, results_path=None, max_workers: int = None, max_in_flight: int = None):
+        self.task = task
+        self.parameters = list(parameters)
+        self.results_path = results_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Stops submitting tasks; pending tasks are cancelled and `run` returns
+        after the tasks which are already running complete.
+        """
+        self.cancelled = True
+
+    def run(self):
+        self.cancelled = False
+        keys = [parameters_key(params) for params in self.parameters]
+        done = set()
+        results_file = None
+        if self.results_path:
+            results, length = _read_results(self.results_path)
+            for key, params in zip(keys, self.parameters):
+                if key in results and canonical_parameters(results[key][0]) != canonical_parameters(params):
+                    raise ValueError('stored parameters {} differ from {}'.format(results[key][0], params))
+            done = set(results)
+            results_file = open(self.results_path, 'ab')
+            # drop a truncated result, so the new ones can be read
+            results_file.truncate(length)
+        todo = iter([k for k in range(len(self.parameters)) if keys[k] not in done])
+        executor = ProcessPoolExecutor(self.max_workers)
+        in_flight = {}
+        try:
+            while True:
+                while not self.cancelled and len(in_flight) < self.max_in_flight:
+                    k = next(todo, None)
+                    if k is None:
+                        break
+                    in_flight[executor.submit(self.task, **self.parameters[k])] = k
+                if not in_flight:
+                    return
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    k = in_flight.pop(future)
+                    if future.cancelled():
+                        continue
+                    result = future.result()
+                    if results_file is not None:
+                        pickle.dump((keys[k], self.parameters[k], result), results_file)
+                        results_file.flush()
+                    yield k, result
+                if self.cancelled:
+                    for future in in_flight:
+                        future.cancel()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if results_file is not None:
+                results_file.close()
+
+
+def load_results(path) -> dict:
+    """
+    Returns results stored by a `Sweep` in `path` as a dict which maps keys
+    of parameters (see `parameters_key`) to pairs `(params, result)`. A
+    truncated last result is ignored.
+    """
+    return _read_results(path)[0]
+
+
+def _read_results(path):
+    """
+    Returns results stored in `path` and the length of the file without a
+    truncated last result.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results, 0
+    with open(path, 'rb') as file:
+        while True:
+            length = file.tell()
+            try:
+                key, params, result = pickle.load(file)
+            except (EOFError, pickle.UnpicklingError):
+                return results, length
+            results[key] = (params, result)
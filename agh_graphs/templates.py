@@ -0,0 +1,171 @@
+"""
+Precompiled right-hand sides of productions, which can be stamped into a
+graph many times in one call.
+
+A template is a `Rewrite` recorded from a single production (see
+`agh_graphs.macro_production`): new vertexes, edges as integer index arrays
+and positions as affine combinations of the left-hand side positions.
+Stamping computes positions of all the new vertexes with a single matrix
+product and wires edges by indexing arrays of ids.
+
+Vertexes of the left-hand side are given in the order of `lhs_nodes` of the
+template; for productions making geometric decisions these are roles:
+* P1 &mdash; `['e']`, the corner positions are passed as `positions`,
+* P2 &mdash; `['e1', 'e2', 'e3', 'i']`, the segment `e1`-`e2` is broken,
+* P5 &mdash; `['e1', 'e2', 'e3', 'e12', 'e23', 'e31', 'i']`, the triangle
+  is cut by the segment from `e2` to `e31`,
+* P9 &mdash; `['e1', 'e2', 'e3', 'i']`.
+
+`triangle_matches` and `p5_matches` return the roles chosen the way P2 and
+P5 choose them for a given orientation.
+"""
+import functools
+from typing import List
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.geometry import triangle_geometry
+from agh_graphs.macro_production import MacroProduction, Rewrite
+from agh_graphs.production import Production, Step
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p2 import P2
+from agh_graphs.productions.p5 import P5
+from agh_graphs.productions.p9 import P9
+from agh_graphs.utils import gen_name, centroid, reject_exact
+
+
+def stamp(graph: Graph, template: Rewrite, matches, positions=None) -> np.ndarray:
+    """
+    Stamps `template` into `graph` once for every row of `matches`.
+
+    `matches` has shape `(m, len(template.lhs_nodes))` and contains ids of
+    vertexes playing the roles of the left-hand side. `positions`, of shape
+    `(m, k, 2)`, are passed to each stamp like `positions` of P1.
+
+    Returns an array of shape `(m, len(template.outputs))` with ids of the
+    output vertexes of each stamp. Positions are computed as floats, so exact
+    positions are rejected.
+    """
+    matches = np.array(matches, dtype=object).reshape(-1, len(template.lhs_nodes))
+    m = len(matches)
+    n_new = len(template.new_labels)
+
+    node_positions = graph.nodes(data='position')
+    reject_exact((node_positions[v] for v in matches.flat), 'stamp')
+    if positions is not None:
+        reject_exact((p for row in positions for p in row), 'stamp')
+    anchors = np.array([node_positions[v] for v in matches.flat], dtype=float).reshape(m, -1, 2)
+    if positions is not None:
+        anchors = np.concatenate([anchors, np.array(positions, dtype=float).reshape(m, -1, 2)], axis=1)
+
+    xs = anchors[:, :, 0] @ template.x_coefficients[:, :-1].T + template.x_coefficients[:, -1]
+    ys = anchors[:, :, 1] @ template.y_coefficients[:, :-1].T + template.y_coefficients[:, -1]
+
+    node_layers = graph.nodes(data='layer')
+    base_layers = np.array([node_layers[v] for v in matches[:, template.inputs[0]]], dtype=int)
+    layers = base_layers[:, np.newaxis] + template.new_layers
+
+    new_ids = np.array([gen_name() for _ in range(m * n_new)], dtype=object).reshape(m, n_new)
+    ids = np.concatenate([matches, new_ids], axis=1)
+    labels = np.broadcast_to(np.array(template.new_labels, dtype=object), (m, n_new))
+
+    graph.add_nodes_from(
+        (v, {'layer': int(layer), 'position': (float(x), float(y)), 'label': label})
+        for v, layer, x, y, label in zip(new_ids.flat, layers.flat, xs.flat, ys.flat, labels.flat))
+    graph.remove_edges_from(zip(ids[:, template.removed_edges[:, 0]].flat,
+                                ids[:, template.removed_edges[:, 1]].flat))
+    graph.add_edges_from(zip(ids[:, template.added_edges[:, 0]].flat,
+                             ids[:, template.added_edges[:, 1]].flat))
+    for index, label in template.relabels:
+        for v in ids[:, index]:
+            graph.nodes[v]['label'] = label
+    graph.remove_nodes_from(ids[:, np.array(template.removed_nodes, dtype=int)].flat)
+
+    return ids[:, template.outputs]
+
+
+def triangle_matches(graph: Graph, interiors: List[str], orientation: int = 0) -> np.ndarray:
+    """
+    Returns rows `[e1, e2, e3, i]` for each interior of `interiors`, with its
+    corners in counterclockwise order and `e1`-`e2` being the segment broken
+    by P2 with `orientation`.
+    """
+    rows = []
+    for i in interiors:
+        geometry = triangle_geometry(graph, i)
+        edge = sorted(range(3), key=lambda k: geometry.edge_angles[k])[orientation % 3]
+        rows.append([geometry.corners[(edge + k) % 3] for k in range(3)] + [i])
+    return np.array(rows, dtype=object).reshape(-1, 4)
+
+
+def p5_matches(graph: Graph, interiors: List[str], orientation: int = 0, epsilon: float = 1e-6) -> np.ndarray:
+    """
+    Returns rows `[e1, e2, e3, e12, e23, e31, i]` for each interior of
+    `interiors`, with the corners ordered by P5 with `orientation` (see
+    `P5.get_corner_nodes`) and the vertexes breaking its edges.
+    """
+    rows = []
+    for i in interiors:
+        layer = graph.nodes[i]['layer']
+        e1, e2, e3 = P5.get_corner_nodes(graph, i, layer, orientation)
+        breaks = [P5.get_node_between(graph, a, b, layer, epsilon) for a, b in [(e1, e2), (e2, e3), (e3, e1)]]
+        rows.append([e1, e2, e3] + breaks + [i])
+    return np.array(rows, dtype=object).reshape(-1, 7)
+
+
+@functools.lru_cache(maxsize=None)
+def p1_template() -> Rewrite:
+    lhs = Graph()
+    lhs.add_node('e', layer=0, position=(0.5, 0.5), label='E')
+    positions = [(0, 0), (1, 0), (0, 1), (1, 1)]
+    return __record(P1(), lhs, 'e', 2, positions=positions)
+
+
+@functools.lru_cache(maxsize=None)
+def p2_template() -> Rewrite:
+    return __record(P2(), __triangle((0, 0), (1, 0), (0, 1)), 'i', 2)
+
+
+@functools.lru_cache(maxsize=None)
+def p5_template() -> Rewrite:
+    lhs = Graph()
+    for name, position in [('e1', (2, 0)), ('e2', (1, 1)), ('e3', (0, 0)),
+                           ('e12', (1.5, 0.5)), ('e23', (0.5, 0.5)), ('e31', (1, 0))]:
+        lhs.add_node(name, layer=1, position=position, label='E')
+    for a, b in [('e1', 'e12'), ('e12', 'e2'), ('e2', 'e23'), ('e23', 'e3'), ('e3', 'e31'), ('e31', 'e1')]:
+        lhs.add_edge(a, b)
+    __add_interior(lhs, 'e1', 'e2', 'e3')
+    return __record(P5(), lhs, 'i', 4)
+
+
+@functools.lru_cache(maxsize=None)
+def p9_template() -> Rewrite:
+    return __record(P9(), __triangle((0, 0), (1, 0), (0, 1)), 'i', 1)
+
+
+def __record(production: Production, lhs: Graph, lhs_input: str, n_outputs: int, **kwargs) -> Rewrite:
+    outputs = [(0, k) for k in range(n_outputs)]
+    return MacroProduction(lhs, [lhs_input], [Step(production, [(-1, 0)])], outputs).rewrite(**kwargs)
+
+
+def __triangle(a, b, c) -> Graph:
+    lhs = Graph()
+    lhs.add_node('e1', layer=1, position=a, label='E')
+    lhs.add_node('e2', layer=1, position=b, label='E')
+    lhs.add_node('e3', layer=1, position=c, label='E')
+    lhs.add_edge('e1', 'e2')
+    lhs.add_edge('e2', 'e3')
+    lhs.add_edge('e3', 'e1')
+    __add_interior(lhs, 'e1', 'e2', 'e3')
+    return lhs
+
+
+def __add_interior(lhs: Graph, a, b, c):
+    """
+    Adds the interior `i` with a fixed name, unlike `utils.add_interior`.
+    """
+    position = centroid(*(lhs.nodes[v]['position'] for v in [a, b, c]))
+    lhs.add_node('i', layer=lhs.nodes[a]['layer'], position=position, label='I')
+    for v in [a, b, c]:
+        lhs.add_edge('i', v)
@@ -4,14 +4,55 @@ Utility module.
 import functools
 import math
 import uuid
+from fractions import Fraction
 
+import networkx
+import numpy as np
 from networkx import Graph
 
+from agh_graphs.graph import LayeredGraph
+
 
 def gen_name():
     return str(uuid.uuid1())
 
 
+def exact_position(position):
+    """
+    Returns `position` with exact (rational) coordinates.
+
+    Midpoints and centroids of exact positions are exact as well, so they can
+    be compared with `==` and used as dict keys instead of being compared
+    with a tolerance.
+    """
+    return tuple(Fraction(x) for x in position)
+
+
+def is_exact(position) -> bool:
+    """
+    Checks whether all coordinates of `position` are exact, i.e. `Fraction`s.
+    Plain `int`s are not exact, since their midpoints are `float`s.
+    """
+    return all(isinstance(x, Fraction) for x in position)
+
+
+def reject_exact(positions, what: str):
+    """
+    Raises `ValueError` if any of `positions` is exact. Used by `what`, which
+    computes or stores positions as floats and would round exact ones.
+    """
+    if any(is_exact(position) for position in positions):
+        raise ValueError('{} does not support exact positions'.format(what))
+
+
+def to_exact_positions(graph: Graph):
+    """
+    Replaces positions of all vertices of `graph` with exact ones.
+    """
+    for _, data in graph.nodes(data=True):
+        data['position'] = exact_position(data['position'])
+
+
 def centroid(a, b, c):
     """
     Returns the centroid of the triangle defined by the given points:
@@ -29,6 +70,80 @@ def angle_with_x_axis(a: (int, int), b: (int, int)) -> float:
     return math.degrees(math.atan2(y, x)) % 180
 
 
+def centroids(tri_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns centroids of triangles given as an array of shape `(n, 3, 2)`.
+    """
+    return np.asarray(tri_xy, dtype=float).mean(axis=1)
+
+
+def segment_angles(seg_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns angles (0-180) between segments given as an array of shape
+    `(n, 2, 2)` and positive X-axis, like `angle_with_x_axis`.
+    """
+    seg_xy = np.asarray(seg_xy, dtype=float)
+    d = seg_xy[:, 1] - seg_xy[:, 0]
+    return np.degrees(np.arctan2(d[:, 1], d[:, 0])) % 180
+
+
+def edge_lengths(tri_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns lengths of edges of triangles given as an array of shape
+    `(n, 3, 2)`. Edge `k` connects vertices `k` and `(k + 1) % 3`.
+    """
+    tri_xy = np.asarray(tri_xy, dtype=float)
+    return np.linalg.norm(np.roll(tri_xy, -1, axis=1) - tri_xy, axis=2)
+
+
+def longest_edge(tri_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the longest edge (see `edge_lengths`) of each
+    triangle. Ties are resolved in favour of the lower index.
+    """
+    return np.argmax(edge_lengths(tri_xy), axis=1)
+
+
+def signed_areas(tri_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns areas of triangles, which are positive for triangles with
+    vertices in counterclockwise order and negative otherwise.
+    """
+    tri_xy = np.asarray(tri_xy, dtype=float)
+    ab = tri_xy[:, 1] - tri_xy[:, 0]
+    ac = tri_xy[:, 2] - tri_xy[:, 0]
+    return (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2
+
+
+def ccw_order(tri_xy: np.ndarray) -> np.ndarray:
+    """
+    Returns an array of shape `(n, 3)` with indices of vertices of each
+    triangle in counterclockwise order, starting with the vertex 0.
+    """
+    order = np.tile(np.arange(3), (len(tri_xy), 1))
+    clockwise = signed_areas(tri_xy) < 0
+    order[clockwise] = [0, 2, 1]
+    return order
+
+
+def vertex_pulls(positions: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Returns the average vector calculated from edges of each vertex, like
+    `get_vertex_pull`, for vertex `positions` of shape `(n, 2)` and `edges`
+    given as an integer array of shape `(m, 2)`. Vertices without edges
+    have zero pull.
+    """
+    positions = np.asarray(positions, dtype=float)
+    edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+    n = len(positions)
+    d = positions[edges[:, 1]] - positions[edges[:, 0]]
+    pulls = np.zeros((n, 2))
+    np.add.at(pulls, edges[:, 0], d)
+    np.add.at(pulls, edges[:, 1], -d)
+    degrees = np.bincount(edges.ravel(), minlength=n)
+    return pulls / np.maximum(degrees, 1)[:, np.newaxis]
+
+
 def add_interior(graph: Graph, a_name, b_name, c_name):
     """
     Adds a node which represents the interior of the triangle defined by
@@ -127,6 +242,10 @@ def get_neighbors_at(graph: Graph, vertex, layer):
     """
     Returns neighbors of the given `vertex` that lies on the layer `layer`.
     """
+    if isinstance(graph, LayeredGraph) and vertex in graph.layer_adj:
+        if graph.nodes[vertex]['layer'] == layer:
+            return graph.layer_neighbors(vertex)
+        return graph.cross_neighbors(vertex, layer)
     neighbors = list(graph.neighbors(vertex))
     return [v for v in neighbors if graph.nodes[v]['layer'] == layer]
 
@@ -186,7 +305,24 @@ def pull_vertices_apart(graph: Graph, vertex_a: str, vertex_b: str, factor: floa
     graph.nodes()[vertex_b]['position'] = (b_x + dir_x, b_y + dir_y)
 
 
+def group_by_position(graph: Graph) -> dict:
+    """
+    Returns a dict which maps `(layer, position)` to the list of vertices
+    at this position. Positions should be exact.
+    """
+    groups = {}
+    for node_id, node_data in graph.nodes(data=True):
+        groups.setdefault((node_data['layer'], node_data['position']), []).append(node_id)
+    return groups
+
+
 def find_overlapping_vertices(graph: Graph):
+    if all(is_exact(position) for _, position in graph.nodes(data='position')):
+        overlapping = []
+        for group in group_by_position(graph).values():
+            overlapping.extend((a, b) for a in group for b in group if a != b)
+        return overlapping
+
     def compare(a, b):
         a = a[1]
         b = b[1]
@@ -250,18 +386,63 @@ def join_overlapping_vertices(graph: Graph, vertex1, vertex2, layer):
     v2_pos = graph.nodes()[vertex2]['position']
 
     if is_close(v1_pos, v2_pos):
-        vertex1_neighbors = get_neighbors_at(graph, vertex1, layer)
-        vertex2_neighbors = get_neighbors_at(graph, vertex2, layer)
-
-        for vertex2_neighbor in vertex2_neighbors:
-            if vertex2_neighbor not in vertex1_neighbors:
-                graph.add_edge(vertex1, vertex2_neighbor)
-        graph.remove_node(vertex2)
+        merge_vertices(graph, [[vertex1, vertex2]], layer)
         return vertex1
 
     return None
 
 
+def merge_vertices(graph: Graph, groups, layer=None) -> dict:
+    """
+    Merges each group of vertices from `groups` into a single vertex.
+    Groups sharing a vertex are merged together.
+
+    The survivor of a group is its first vertex (or the first vertex of the
+    first of the groups merged together). Edges of other vertices are moved
+    to the survivor, then these vertices are removed. If `layer` is given,
+    only edges to vertices on this layer are moved.
+
+    Returns a dict which maps every vertex from `groups` to its survivor.
+    """
+    parent = {}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    # the root seen first wins, so the survivor is the first vertex of the first group
+    order = {}
+    for group in groups:
+        for v in group:
+            if v not in parent:
+                parent[v] = v
+                order[v] = len(order)
+        root = find(group[0])
+        for v in group[1:]:
+            v_root = find(v)
+            if v_root != root:
+                if order[v_root] < order[root]:
+                    root, v_root = v_root, root
+                parent[v_root] = root
+
+    survivors = {v: find(v) for v in parent}
+    node_layers = graph.nodes(data='layer')
+    new_edges = []
+    for v, survivor in survivors.items():
+        if v == survivor:
+            continue
+        for n in graph.adj[v]:
+            target = survivors.get(n, n)
+            if target != survivor and (layer is None or node_layers[n] == layer):
+                new_edges.append((survivor, target))
+
+    graph.add_edges_from(new_edges)
+    graph.remove_nodes_from([v for v, survivor in survivors.items() if v != survivor])
+    return survivors
+
+
 def get_common_neighbors(graph: Graph, v1: str, v2: str, on_layer: int = None) -> [str]:
     """
     Returns common neighbors of vertexes `v1` and `v2` that are on layer `on_layer`
@@ -299,6 +480,22 @@ def get_vertex_between(graph, v1, v2, layer=None, label=None):
 
 
 def is_close(pos1, pos2):
+    if is_exact(pos1) and is_exact(pos2):
+        return pos1 == pos2
     x1, y1 = pos1
     x2, y2 = pos2
     return math.isclose(x1, x2) and math.isclose(y1, y2)
+
+
+def is_structurally_equal(graph1: Graph, graph2: Graph) -> bool:
+    """
+    Checks whether the graphs are equal regardless of ids of their vertices,
+    i.e. whether they are isomorphic with vertices of the same layer, label
+    and (close) position.
+    """
+    def node_match(data1, data2):
+        return data1['layer'] == data2['layer'] \
+               and data1['label'] == data2['label'] \
+               and is_close(data1['position'], data2['position'])
+
+    return networkx.is_isomorphic(graph1, graph2, node_match=node_match)
@@ -6,21 +6,15 @@ import networkx
 import numpy as np
 from networkx import Graph
 
+from agh_graphs.graph import layer_view
 from agh_graphs.utils import find_overlapping_vertices, pull_vertices_apart, pull_vertex_towards_neighbors
 
 
 def visualize_graph_layer(graph: Graph, layer: int):
-    graph = graph.copy()
+    graph = layer_view(graph, layer).copy()
 
     __pull__overlapping_vertices_apart(graph, 0.05)
 
-    to_remove = []
-    for node, data in graph.nodes(data=True):
-        if data['layer'] != layer:
-            to_remove.append(node)
-
-    graph.remove_nodes_from(to_remove)
-
     colors = [__get_color(d) for n, d in graph.nodes(data=True)]
     networkx.draw(
         graph,
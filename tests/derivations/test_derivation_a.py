@@ -3,7 +3,7 @@ import unittest
 from networkx import Graph
 
 from agh_graphs.derivations.derivation_a import DerivationA
-from agh_graphs.utils import gen_name, centroid
+from agh_graphs.utils import gen_name, centroid, exact_position, is_exact
 
 
 class DerivationATest(unittest.TestCase):
@@ -101,3 +101,14 @@ class DerivationATest(unittest.TestCase):
                 and graph.nodes[n]['label'] == label
                 and (position is None or graph.nodes[n]['position'] == position)]
         return nodes
+
+    def test_exact_positions(self):
+        graph = Graph()
+        graph.add_node(gen_name(), layer=0, position=exact_position((0.5, 0.5)), label='E')
+        positions = [exact_position(p) for p in [(0, 0), (0.3, 0), (0, 0.7), (0.3, 0.7)]]
+        DerivationA().run(graph, positions)
+
+        self.assertEqual(len(graph.nodes()), 13)
+        self.assertTrue(all(is_exact(p) for _, p in graph.nodes(data='position')))
+        i_pos = centroid(positions[0], positions[2], positions[3])
+        self.assertEqual(len(self.find_nodes(graph, layer=2, label='I', position=i_pos)), 1)
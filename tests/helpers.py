@@ -0,0 +1,58 @@
+"""
+Graphs and scripts shared by tests.
+"""
+from networkx import Graph
+
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.utils import gen_name, add_interior
+
+UNIT_SQUARE = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+# the derivation of `DerivationA` as a script (see `agh_graphs.script`)
+DERIVATION_A = {
+    'graph': 'layered',
+    'kwargs': {'positions': [[0, 0], [1, 0], [0, 1], [1, 1]]},
+    'steps': [
+        {'production': 'P1', 'inputs': ['root'], 'as': 'p1'},
+        {'production': 'P9', 'inputs': ['p1[0]'], 'outputs': ['i1_']},
+        {'production': 'P9', 'inputs': [{'layer': 1, 'label': 'I'}], 'outputs': ['i2_']},
+        {'production': 'P12', 'inputs': ['p1[0]', 'p1[1]', 'i1_', 'i2_']},
+    ],
+}
+
+
+def initial_graph(graph: Graph = None) -> Graph:
+    """
+    Returns `graph` (a new `Graph` by default) with the initial `E` vertex
+    on layer 0 added.
+    """
+    graph = Graph() if graph is None else graph
+    graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+    return graph
+
+
+def triangle_graph(a, b, c, graph: Graph = None):
+    """
+    Returns `graph` (a new `Graph` by default) with a triangle with corners
+    at `a`, `b` and `c` on layer 1 added and a list of ids of the corners and
+    the interior.
+    """
+    graph = Graph() if graph is None else graph
+    e1, e2, e3 = gen_name(), gen_name(), gen_name()
+    graph.add_node(e1, layer=1, position=a, label='E')
+    graph.add_node(e2, layer=1, position=b, label='E')
+    graph.add_node(e3, layer=1, position=c, label='E')
+    graph.add_edge(e1, e2)
+    graph.add_edge(e2, e3)
+    graph.add_edge(e3, e1)
+    return graph, [e1, e2, e3, add_interior(graph, e1, e2, e3)]
+
+
+def derivation_a_graph(positions=None, graph: Graph = None) -> Graph:
+    """
+    Returns the graph derived by `DerivationA` with `positions` (the unit
+    square by default).
+    """
+    graph = initial_graph(graph)
+    DerivationA().run(graph, UNIT_SQUARE if positions is None else positions)
+    return graph
@@ -244,6 +244,18 @@ class P5Test(unittest.TestCase):
         self.assertEqual(graph.nodes[e23]['position'], (6.0, 6.0))
         self.assertEqual(graph.nodes[e31]['position'], (4.0, 8.0))
 
+    def test_corner_order(self):
+        graph = Graph()
+        # corners in clockwise order, with the longest edge at the bottom
+        [a, c, b] = self.create_nodes(graph, 1, 'E', [(0.0, 0.0), (1.0, 2.0), (3.0, 0.0)])
+        self.create_edges_chain(graph, [a, c, b, a])
+        i = add_interior(graph, a, b, c)
+
+        # counterclockwise, with the corner opposite to the longest edge in the middle for orientation 0
+        self.assertEqual([b, c, a], P5.get_corner_nodes(graph, i, 1, 0))
+        self.assertEqual([c, a, b], P5.get_corner_nodes(graph, i, 1, 1))
+        self.assertEqual([a, b, c], P5.get_corner_nodes(graph, i, 1, 2))
+
     def test_bad_input_vertex_count(self):
         graph = Graph()
         positions = [(1.0, 1.0), (1.0, 3.0),
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from agh_graphs.cache import DerivationCache
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph
+
+
+class DerivationCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit(self):
+        cache = DerivationCache(self.directory.name)
+        positions = [(0, 0), (1, 0), (0, 1), (1, 1)]
+        graph1 = initial_graph()
+        cache.run(DerivationA(), graph1, p1_positions=positions)
+        graph2 = initial_graph()
+        initial_node_name = list(graph2.nodes())[0]
+        cache.run(DerivationA(), graph2, p1_positions=positions)
+
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual([], [name for name in os.listdir(self.directory.name) if not name.endswith('.npz')])
+        self.assertTrue(is_structurally_equal(graph1, graph2))
+        self.assertEqual('e', graph2.nodes[initial_node_name]['label'])
+        self.assertFalse(set(graph1.nodes()) & set(graph2.nodes()))
+
+    def test_miss_on_different_parameters(self):
+        cache = DerivationCache(self.directory.name)
+        cache.run(DerivationA(), initial_graph(), p1_positions=[(0, 0), (1, 0), (0, 1), (1, 1)])
+        cache.run(DerivationA(), initial_graph(), p1_positions=[(0, 0), (2, 0), (0, 1), (2, 1)])
+
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+    def test_eviction(self):
+        cache = DerivationCache(self.directory.name, max_bytes=0)
+        cache.run(DerivationA(), initial_graph(), p1_positions=[(0, 0), (1, 0), (0, 1), (1, 1)])
+
+        self.assertEqual([], os.listdir(self.directory.name))
@@ -0,0 +1,94 @@
+import os
+import random
+import signal
+import tempfile
+import unittest
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.checkpoint import run_with_checkpoints, load_checkpoint, save_checkpoint
+from agh_graphs.derivations.derivation_a import derivation_a_macro
+from agh_graphs.production import Production, Step
+from agh_graphs.productions.p9 import P9
+from agh_graphs.utils import is_structurally_equal, exact_position
+from tests.helpers import initial_graph, UNIT_SQUARE as POSITIONS
+
+
+class Failing(Production):
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        raise RuntimeError('killed')
+
+
+class RaisingSignal(Production):
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        signal.raise_signal(signal.SIGUSR1)
+        return P9().apply(graph, prod_input, orientation, **kwargs)
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'checkpoint.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume(self):
+        steps = derivation_a_macro().steps
+        expected = initial_graph()
+        run_with_checkpoints(expected, steps, list(expected.nodes()), os.path.join(self.directory.name, 'a.npz'),
+                             positions=POSITIONS)
+
+        graph = initial_graph()
+        with self.assertRaises(RuntimeError):
+            run_with_checkpoints(graph, steps[:3] + [Step(Failing(), [])], list(graph.nodes()), self.path,
+                                 interval=2, positions=POSITIONS)
+        self.assertEqual(2, len(load_checkpoint(self.path, Graph())[1]))
+
+        resumed = Graph()
+        outputs = run_with_checkpoints(resumed, steps, ['unused'], self.path, interval=2, positions=POSITIONS)
+
+        self.assertEqual(4, len(outputs))
+        self.assertTrue(is_structurally_equal(expected, resumed))
+        self.assertEqual(['checkpoint.npz'], os.listdir(self.directory.name))
+
+    def test_rng_state(self):
+        rng = random.Random(7)
+        generator = np.random.default_rng(7)
+        graph = initial_graph()
+        run_with_checkpoints(graph, derivation_a_macro().steps[:1], list(graph.nodes()), self.path, interval=1,
+                             rng=rng, positions=POSITIONS)
+        expected = rng.random()
+
+        restored = random.Random()
+        load_checkpoint(self.path, Graph(), restored)
+        self.assertEqual(expected, restored.random())
+
+        path = os.path.join(self.directory.name, 'b.npz')
+        graph = initial_graph()
+        run_with_checkpoints(graph, derivation_a_macro().steps[:1], list(graph.nodes()), path, interval=1,
+                             rng=generator, positions=POSITIONS)
+        expected = generator.random()
+        restored = np.random.default_rng()
+        load_checkpoint(path, Graph(), restored)
+        self.assertEqual(expected, restored.random())
+
+    def test_signal(self):
+        graph = initial_graph()
+        steps = derivation_a_macro().steps[:1] + [Step(RaisingSignal(), [(0, 0)])]
+        run_with_checkpoints(graph, steps, list(graph.nodes()), self.path, signals=[signal.SIGUSR1],
+                             positions=POSITIONS)
+
+        self.assertEqual(2, len(load_checkpoint(self.path, Graph())[1]))
+        self.assertEqual(signal.SIG_DFL, signal.getsignal(signal.SIGUSR1))
+
+    def test_failed_save(self):
+        graph = initial_graph()
+        save_checkpoint(self.path, graph, list(graph.nodes()), [])
+        graph.add_node('exact', layer=0, position=exact_position((0.5, 0.5)), label='E')
+
+        with self.assertRaises(ValueError):
+            save_checkpoint(self.path, graph, list(graph.nodes()), [])
+        self.assertEqual(['checkpoint.npz'], os.listdir(self.directory.name))
+        self.assertEqual(1, len(load_checkpoint(self.path, Graph())[0]))
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.checkpoint import Checkpointing
+from agh_graphs.delta_log import DeltaLogWriter, replay_log, read_deltas, snapshot_offsets
+from agh_graphs.derivations.derivation_a import DerivationA, derivation_a_macro
+from agh_graphs.production import Production, Step, SequenceRun, apply_sequence
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph, UNIT_SQUARE
+
+
+class Failing(Production):
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        raise RuntimeError('killed')
+
+
+class DeltaLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'derivation.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay(self):
+        graph = initial_graph()
+        states = [graph.copy()]
+        with DeltaLogWriter(self.path, graph, snapshot_interval=2) as writer:
+            for delta in DerivationA.stream(graph, UNIT_SQUARE):
+                writer.write(delta)
+                states.append(graph.copy())
+
+        self.assertEqual([0, 2, 4], [step for step, _ in snapshot_offsets(self.path)])
+        for step, state in enumerate(states):
+            replayed = replay_log(self.path, step)
+            self.assertTrue(is_structurally_equal(state, replayed))
+            self.assertEqual(set(state.nodes()), set(replayed.nodes()))
+        self.assertEqual({frozenset(e) for e in graph.edges()}, {frozenset(e) for e in replay_log(self.path).edges()})
+
+    def test_read_deltas(self):
+        graph = initial_graph()
+        with DeltaLogWriter(self.path, graph) as writer:
+            deltas = list(DerivationA.stream(graph, UNIT_SQUARE))
+            for delta in deltas:
+                writer.write(delta)
+
+        read = list(read_deltas(self.path))
+        self.assertEqual(['P1', 'P9', 'P9', 'P12'], [delta.production for delta in read])
+        for delta, read_delta in zip(deltas, read):
+            self.assertEqual(delta.inputs, read_delta.inputs)
+            self.assertEqual(delta.outputs, read_delta.outputs)
+            self.assertEqual(delta.created_nodes, read_delta.created_nodes)
+            self.assertEqual(delta.merged_nodes, read_delta.merged_nodes)
+            self.assertEqual(delta.relabels, read_delta.relabels)
+
+    def test_truncated(self):
+        graph = initial_graph()
+        with DeltaLogWriter(self.path, graph) as writer:
+            for delta in DerivationA.stream(graph, UNIT_SQUARE):
+                writer.write(delta)
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 10)
+
+        self.assertEqual(3, len(list(read_deltas(self.path))))
+
+    def test_truncated_snapshot(self):
+        graph = initial_graph()
+        with DeltaLogWriter(self.path, graph, snapshot_interval=2) as writer:
+            for delta in DerivationA.stream(graph, UNIT_SQUARE):
+                writer.write(delta)
+        [*_, (_, last_snapshot)] = snapshot_offsets(self.path)
+        with open(self.path, 'r+b') as file:
+            file.truncate(last_snapshot + 30)
+
+        self.assertEqual([0, 2], [step for step, _ in snapshot_offsets(self.path)])
+        replayed = replay_log(self.path)
+        self.assertTrue(is_structurally_equal(graph, replayed))
+        self.assertEqual(set(graph.nodes()), set(replayed.nodes()))
+
+    def test_integer_ids(self):
+        graph = Graph()
+        graph.add_node(0, layer=0, position=(0.5, 0.5), label='E')
+        with DeltaLogWriter(self.path, graph) as writer:
+            for delta in DerivationA.stream(graph, UNIT_SQUARE):
+                writer.write(delta)
+
+        replayed = replay_log(self.path)
+        self.assertIn(0, replayed)
+        self.assertEqual(set(graph.nodes()), set(replayed.nodes()))
+
+    def test_hook(self):
+        graph = initial_graph()
+        apply_sequence(graph, derivation_a_macro().steps, list(graph.nodes()), [DeltaLogWriter(self.path)],
+                       positions=UNIT_SQUARE)
+
+        self.assertEqual(['P1', 'P9', 'P9', 'P12'], [delta.production for delta in read_deltas(self.path)])
+        self.assertTrue(is_structurally_equal(graph, replay_log(self.path)))
+
+    def test_resume(self):
+        steps = derivation_a_macro().steps
+        graph = initial_graph()
+        states = [graph.copy()]
+        for _ in SequenceRun(graph, steps, list(graph.nodes()), positions=UNIT_SQUARE):
+            states.append(graph.copy())
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.npz')
+
+        graph = initial_graph()
+        with self.assertRaises(RuntimeError):
+            apply_sequence(graph, steps[:3] + [Step(Failing(), [])], list(graph.nodes()),
+                           [Checkpointing(checkpoint, interval=2), DeltaLogWriter(self.path, append=True)],
+                           positions=UNIT_SQUARE)
+        resumed = Graph()
+        apply_sequence(resumed, steps, ['unused'],
+                       [Checkpointing(checkpoint, interval=2), DeltaLogWriter(self.path, append=True)],
+                       positions=UNIT_SQUARE)
+
+        self.assertEqual([0, 2], [step for step, _ in snapshot_offsets(self.path)])
+        self.assertEqual(5, len(list(read_deltas(self.path))))
+        for step, state in enumerate(states):
+            self.assertTrue(is_structurally_equal(state, replay_log(self.path, step)))
+        self.assertEqual(set(resumed.nodes()), set(replay_log(self.path).nodes()))
+
+    def test_append_to_other_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a log')
+
+        with self.assertRaises(ValueError):
+            DeltaLogWriter(self.path, initial_graph(), append=True)
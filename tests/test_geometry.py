@@ -0,0 +1,58 @@
+import math
+import unittest
+
+from agh_graphs.geometry import triangle_geometry, invalidate_geometry
+from agh_graphs.productions.p5 import P5
+from tests.helpers import triangle_graph
+
+
+class GeometryTest(unittest.TestCase):
+    def test_triangle_geometry(self):
+        graph, [a, b, c, i] = triangle_graph((0, 0), (0, 1), (3, 0))
+        geometry = triangle_geometry(graph, i)
+
+        self.assertEqual((a, c, b), geometry.corners)
+        self.assertEqual(-1, geometry.orientation)
+        self.assertEqual(1.5, geometry.area)
+        self.assertEqual((3, math.sqrt(10), 1), geometry.edge_lengths)
+        self.assertEqual(0, geometry.edge_angles[0])
+        self.assertEqual(1, geometry.longest_edge)
+        self.assertEqual(a, geometry.opposite_corner(geometry.longest_edge))
+        self.assertEqual(1, geometry.edge_index(b, c))
+
+    def test_cache(self):
+        graph, [a, b, c, i] = triangle_graph((0, 0), (0, 1), (3, 0))
+        geometry = triangle_geometry(graph, i)
+        self.assertIs(geometry, triangle_geometry(graph, i))
+
+        graph.nodes[b]['position'] = (0, 4)
+        self.assertEqual((a, c, b), triangle_geometry(graph, i).corners)
+        self.assertEqual(6, triangle_geometry(graph, i).area)
+        self.assertEqual(1, triangle_geometry(graph, i).longest_edge)
+
+        geometry = triangle_geometry(graph, i)
+        invalidate_geometry(graph, i)
+        self.assertIsNot(geometry, triangle_geometry(graph, i))
+
+    def test_copies_and_rewiring(self):
+        graph, [a, b, c, i] = triangle_graph((0, 0), (0, 1), (3, 0))
+        geometry = triangle_geometry(graph, i)
+
+        copy = graph.copy()
+        copy.nodes[b]['position'] = (0, 4)
+        self.assertEqual(6, triangle_geometry(copy, i).area)
+        self.assertIs(geometry, triangle_geometry(graph, i))
+
+        # the interior is moved to another corner at the same position as c
+        graph.add_node('d', layer=1, position=(3, 0), label='E')
+        graph.remove_edge(i, c)
+        graph.add_edge(i, 'd')
+        self.assertIn('d', triangle_geometry(graph, i).corners)
+        self.assertNotIn(c, triangle_geometry(graph, i).corners)
+
+    def test_p5_corner_nodes(self):
+        graph, [a, b, c, i] = triangle_graph((0, 0), (3, 0), (0, 1))
+
+        # the longest edge is b-c, so the triangle is cut from a
+        self.assertEqual([c, a, b], P5.get_corner_nodes(graph, i, 1, 0))
+        self.assertEqual([a, b, c], P5.get_corner_nodes(graph, i, 1, 1))
@@ -0,0 +1,131 @@
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.graph import LayeredGraph, CompactGraph, NodeRecord, layer_view, layer_nodes
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p2 import P2
+from agh_graphs.utils import gen_name, get_neighbors_at, is_structurally_equal
+
+
+class LayeredGraphTest(unittest.TestCase):
+    def test_adjacency(self):
+        graph = LayeredGraph()
+        graph.add_node('p', layer=0, position=(0, 0), label='i')
+        graph.add_nodes_from([('a', {'layer': 1, 'position': (0, 0), 'label': 'I'}),
+                              ('b', {'layer': 1, 'position': (1, 0), 'label': 'E'})])
+        graph.add_edges_from([('p', 'a'), ('a', 'b')])
+
+        self.assertEqual(['b'], graph.layer_neighbors('a'))
+        self.assertEqual(['p'], graph.parents('a'))
+        self.assertEqual(['a'], graph.children('p'))
+        self.assertEqual([], graph.cross_neighbors('b'))
+
+        graph.remove_edge('a', 'b')
+        self.assertEqual([], graph.layer_neighbors('a'))
+        graph.remove_node('p')
+        self.assertEqual([], graph.parents('a'))
+        self.assertNotIn('p', graph.cross_adj)
+
+    def test_derivation(self):
+        graph = LayeredGraph()
+        graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        expected = Graph()
+        expected.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        DerivationA().run(graph, [(0, 0), (1, 0), (0, 1), (1, 1)])
+        DerivationA().run(expected, [(0, 0), (1, 0), (0, 1), (1, 1)])
+
+        self.assertTrue(is_structurally_equal(graph, expected))
+        self.assert_consistent(graph)
+        self.assert_consistent(graph.copy())
+
+    def test_productions(self):
+        graph = LayeredGraph()
+        initial_node_name = gen_name()
+        graph.add_node(initial_node_name, layer=0, position=(0.5, 0.5), label='E')
+        [i1, i2] = P1().apply(graph, [initial_node_name])
+        [i1_1, i1_2] = P2().apply(graph, [i1])
+        P2().apply(graph, [i1_1])
+
+        self.assert_consistent(graph)
+
+    def assert_consistent(self, graph):
+        for v, layer in graph.nodes(data='layer'):
+            same_layer = [n for n in graph.neighbors(v) if graph.nodes[n]['layer'] == layer]
+            other_layers = [n for n in graph.neighbors(v) if graph.nodes[n]['layer'] != layer]
+            self.assertEqual(same_layer, graph.layer_neighbors(v))
+            self.assertEqual(other_layers, graph.cross_neighbors(v))
+            self.assertEqual(same_layer, get_neighbors_at(graph, v, layer))
+
+
+class CompactGraphTest(unittest.TestCase):
+    def test_node_record(self):
+        record = NodeRecord()
+        record.update(layer=1, position=(0, 0), label='E', color='red')
+
+        self.assertEqual({'layer': 1, 'position': (0, 0), 'label': 'E', 'color': 'red'}, dict(record))
+        self.assertEqual('E', record['label'])
+        del record['color']
+        self.assertEqual(3, len(record))
+        self.assertNotIn('color', record)
+        with self.assertRaises(KeyError):
+            NodeRecord()['layer']
+
+    def test_edges_share_attributes(self):
+        graph = CompactGraph()
+        graph.add_edges_from([('a', 'b'), ('b', 'c')])
+        graph.add_edge('c', 'd', weight=2)
+
+        self.assertIs(graph.edges['a', 'b'], graph.edges['b', 'c'])
+        self.assertEqual({'weight': 2}, graph.edges['c', 'd'])
+        with self.assertRaises(TypeError):
+            graph.edges['a', 'b']['weight'] = 1
+
+    def test_edge_data_overrides_attr(self):
+        graph = CompactGraph()
+        graph.add_edges_from([('a', 'b', {'weight': 2}), ('b', 'c')], weight=1, color='red')
+
+        self.assertEqual({'weight': 2, 'color': 'red'}, graph.edges['a', 'b'])
+        self.assertEqual({'weight': 1, 'color': 'red'}, graph.edges['b', 'c'])
+
+    def test_derivation(self):
+        graph = CompactGraph()
+        graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        expected = Graph()
+        expected.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        DerivationA().run(graph, [(0, 0), (1, 0), (0, 1), (1, 1)])
+        DerivationA().run(expected, [(0, 0), (1, 0), (0, 1), (1, 1)])
+
+        self.assertTrue(is_structurally_equal(graph, expected))
+        self.assertTrue(all(isinstance(data, NodeRecord) for _, data in graph.copy().nodes(data=True)))
+
+
+class LayerViewTest(unittest.TestCase):
+    def test_layer_view(self):
+        for graph in [Graph(), LayeredGraph()]:
+            graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+            DerivationA().run(graph, [(0, 0), (1, 0), (0, 1), (1, 1)])
+
+            view = layer_view(graph, 2)
+
+            expected = [v for v, layer in graph.nodes(data='layer') if layer == 2]
+            self.assertEqual(set(expected), set(view.nodes()))
+            self.assertEqual(6, len(view))
+            self.assertEqual(11, len(view.edges()))
+            self.assertEqual(2, len([v for v, label in view.nodes(data='label') if label == 'I']))
+            for v in view:
+                self.assertEqual(get_neighbors_at(graph, v, 2), get_neighbors_at(view, v, 2))
+            with self.assertRaises(Exception):
+                view.add_node('x')
+
+    def test_layer_index(self):
+        graph = LayeredGraph()
+        graph.add_node('a', layer=0)
+        graph.add_nodes_from([('b', {'layer': 1}), ('c', {'layer': 1})])
+        self.assertEqual(['b', 'c'], graph.layer_nodes(1))
+
+        graph.add_node('b', layer=2)
+        graph.remove_node('c')
+        self.assertEqual({0: {'a': None}, 2: {'b': None}}, graph.layers)
+        self.assertEqual(['b'], layer_nodes(graph, 2))
@@ -0,0 +1,69 @@
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.hashing import structural_hash
+from agh_graphs.utils import gen_name
+from tests.helpers import derivation_a_graph
+
+
+class HashingTest(unittest.TestCase):
+    def test_independent_of_ids(self):
+        graph1 = derivation_a_graph()
+        graph2 = derivation_a_graph()
+        graph3 = derivation_a_graph([(0, 0), (2, 0), (0, 1), (2, 1)])
+
+        self.assertEqual(structural_hash(graph1).value, structural_hash(graph2).value)
+        self.assertNotEqual(structural_hash(graph1).value, structural_hash(graph3).value)
+        self.assertEqual(structural_hash(graph1, layer=0).value, structural_hash(graph3, layer=0).value)
+        self.assertNotEqual(structural_hash(graph1, layer=2).value, structural_hash(graph3, layer=2).value)
+
+    def test_quantization(self):
+        graph1 = Graph()
+        graph1.add_node('a', layer=1, position=(1 / 3, 0), label='E')
+        graph2 = Graph()
+        graph2.add_node('b', layer=1, position=(0.1 + 0.1 + 0.1 + 1 / 30 + 1e-12, 0), label='E')
+
+        self.assertEqual(structural_hash(graph1).hexdigest(), structural_hash(graph2).hexdigest())
+
+    def test_incremental(self):
+        graph = derivation_a_graph()
+        h = structural_hash(graph)
+
+        v = gen_name()
+        [root] = [n for n, layer in graph.nodes(data='layer') if layer == 0]
+        with h.updating(graph, [v]):
+            graph.add_node(v, layer=1, position=(0.5, 0.5), label='E')
+            graph.add_edge(root, v)
+        self.assertEqual(structural_hash(graph).value, h.value)
+
+        with h.updating(graph, [root]):
+            graph.nodes[root]['label'] = 'e'
+        self.assertEqual(structural_hash(graph).value, h.value)
+
+        layer_hash = structural_hash(graph, layer=1)
+        [e1, e2, *_] = [n for n, data in graph.nodes(data=True) if data['layer'] == 1 and data['label'] == 'E'
+                        and n != v]
+        with h.updating(graph, [v]), layer_hash.updating(graph, [v]):
+            graph.nodes[v]['position'] = (0.25, 0.5)
+            graph.add_edge(v, e1)
+            graph.add_edge(v, e2)
+        self.assertEqual(structural_hash(graph).value, h.value)
+        self.assertEqual(structural_hash(graph, layer=1).value, layer_hash.value)
+
+        with h.updating(graph, [v, e1]):
+            graph.remove_node(v)
+            graph.nodes[e1]['label'] = 'X'
+        self.assertEqual(structural_hash(graph).value, h.value)
+
+    def test_neighbors_of_overlapping_vertexes(self):
+        graph1 = Graph()
+        graph1.add_node('p', layer=1, position=(0, 0), label='E')
+        graph1.add_node('q', layer=1, position=(0, 0), label='E')
+        graph1.add_node('x', layer=1, position=(1, 0), label='E')
+        graph1.add_node('y', layer=1, position=(0, 1), label='E')
+        graph2 = graph1.copy()
+        graph1.add_edges_from([('p', 'x'), ('q', 'y')])
+        graph2.add_edges_from([('p', 'x'), ('p', 'y')])
+
+        self.assertNotEqual(structural_hash(graph1).value, structural_hash(graph2).value)
@@ -0,0 +1,72 @@
+import unittest
+from fractions import Fraction
+
+from agh_graphs.derivations.derivation_a import DerivationA, derivation_a_macro
+from agh_graphs.macro_production import MacroProduction
+from agh_graphs.production import Step
+from agh_graphs.productions.p9 import P9
+from agh_graphs.utils import get_node_at, is_close, is_structurally_equal, exact_position, is_exact
+from tests.helpers import initial_graph, triangle_graph
+
+
+class MacroProductionTest(unittest.TestCase):
+    def test_derivation_a_fused(self):
+        positions = [(0, 0), (2, 0), (0, 3), (2, 3)]
+        fused = initial_graph()
+        unfused = initial_graph()
+
+        DerivationA(fused=True).run(fused, positions)
+        DerivationA().run(unfused, positions)
+
+        self.assertEqual(len(fused.nodes()), 13)
+        self.assertEqual(len(fused.edges()), 26)
+        self.assertTrue(is_structurally_equal(fused, unfused))
+
+    def test_verify(self):
+        graph = initial_graph()
+        [root] = graph.nodes()
+        self.assertTrue(derivation_a_macro().verify(graph, [root], positions=[(0, 0), (1, 0), (0, 1), (1, 1)]))
+        self.assertEqual(len(graph.nodes()), 1)
+
+    def test_double_p9(self):
+        lhs, [*_, i] = triangle_graph((0, 0), (1, 0), (0, 1))
+        macro = MacroProduction(lhs, [i], [Step(P9(), [(-1, 0)]), Step(P9(), [(0, 0)])], outputs=[(1, 0)])
+
+        graph, [*_, i] = triangle_graph((1.0, 1.0), (3.0, 1.0), (1.0, 4.0))
+        [i2] = macro.apply(graph, [i])
+
+        self.assertEqual(graph.nodes[i]['label'], 'i')
+        self.assertEqual(graph.nodes[i2]['label'], 'I')
+        self.assertEqual(graph.nodes[i2]['layer'], 3)
+        self.assertTrue(is_close(graph.nodes[i2]['position'], (5 / 3, 2.0)))
+        self.assertIsNotNone(get_node_at(graph, 3, (3.0, 1.0)))
+        self.assertEqual(len(graph.nodes()), 12)
+        self.assertEqual(len(graph.edges()), 20)
+
+    def test_exact_positions(self):
+        lhs, [*_, i] = triangle_graph((0, 0), (1, 0), (0, 1))
+        macro = MacroProduction(lhs, [i], [Step(P9(), [(-1, 0)]), Step(P9(), [(0, 0)])], outputs=[(1, 0)])
+
+        graph, [*_, i] = triangle_graph(*(exact_position(p) for p in [(1, 1), (3, 1), (1, 4)]))
+        [i2] = macro.apply(graph, [i])
+
+        self.assertEqual((Fraction(5, 3), Fraction(2)), graph.nodes[i2]['position'])
+        self.assertTrue(all(is_exact(p) for _, p in graph.nodes(data='position')))
+
+    def test_lhs_not_matching(self):
+        lhs, [*_, i] = triangle_graph((0, 0), (1, 0), (0, 1))
+        macro = MacroProduction(lhs, [i], [Step(P9(), [(-1, 0)])], outputs=[(0, 0)])
+
+        graph, [*_, i] = triangle_graph((0, 0), (1, 0), (0, 1))
+        graph.nodes[i]['label'] = 'i'
+        with self.assertRaises(ValueError):
+            macro.apply(graph, [i])
+
+    def test_rewrite_kwargs(self):
+        lhs, [*_, i] = triangle_graph((0, 0), (1, 0), (0, 1))
+        macro = MacroProduction(lhs, [i], [Step(P9(), [(-1, 0)])], outputs=[(0, 0)])
+
+        self.assertIs(macro.rewrite(epsilon=1e-6), macro.rewrite(epsilon=1e-6))
+        self.assertIsNot(macro.rewrite(epsilon=1e-6), macro.rewrite(epsilon=1e-3))
+        self.assertIs(derivation_a_macro().rewrite(positions=[(0, 0), (1, 0), (0, 1), (1, 1)]),
+                      derivation_a_macro().rewrite(positions=[(0, 0), (2, 0), (0, 3), (2, 3)]))
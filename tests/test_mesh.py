@@ -0,0 +1,135 @@
+import io
+import unittest
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.mesh import Mesh, layer_mesh, leaf_mesh, import_mesh, read_obj, read_msh, write_vtk, write_obj, \
+    write_msh
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p9 import P9
+from agh_graphs.utils import gen_name, signed_areas, is_structurally_equal
+from tests.helpers import derivation_a_graph
+
+
+class MeshTest(unittest.TestCase):
+    def test_layer_mesh(self):
+        mesh = layer_mesh(derivation_a_graph(), 2)
+
+        self.assertEqual((4, 2), mesh.points.shape)
+        self.assertEqual((2, 3), mesh.triangles.shape)
+        self.assertEqual(2, len(mesh.interiors))
+        self.assertTrue(np.all(signed_areas(mesh.points[mesh.triangles]) > 0))
+        self.assertEqual({(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0)}, set(map(tuple, mesh.points.tolist())))
+
+    def test_chunks(self):
+        graph = derivation_a_graph()
+        for mesh_of in [lambda **kwargs: layer_mesh(graph, 2, **kwargs), lambda **kwargs: leaf_mesh(graph, **kwargs)]:
+            mesh = mesh_of()
+            chunked = mesh_of(chunk_size=1)
+
+            self.assertEqual(mesh.nodes, chunked.nodes)
+            self.assertEqual(mesh.points.tolist(), chunked.points.tolist())
+            self.assertEqual(mesh.triangles.tolist(), chunked.triangles.tolist())
+
+    def test_empty_layer(self):
+        mesh = layer_mesh(derivation_a_graph(), 0)
+
+        self.assertEqual((0, 3), mesh.triangles.shape)
+
+    def test_writers(self):
+        mesh = layer_mesh(derivation_a_graph(), 2)
+
+        obj = io.StringIO()
+        write_obj(mesh, obj, chunk_size=3)
+        lines = obj.getvalue().splitlines()
+        self.assertEqual(4, sum(line.startswith('v ') for line in lines))
+        self.assertEqual(2, sum(line.startswith('f ') for line in lines))
+
+        vtk = io.StringIO()
+        write_vtk(mesh, vtk, chunk_size=1)
+        lines = vtk.getvalue().splitlines()
+        self.assertIn('POINTS 4 double', lines)
+        self.assertIn('CELLS 2 8', lines)
+        self.assertEqual(['5', '5'], lines[lines.index('CELL_TYPES 2') + 1:])
+
+        msh = io.StringIO()
+        write_msh(mesh, msh)
+        lines = msh.getvalue().splitlines()
+        elements = lines[lines.index('$Elements') + 2:lines.index('$EndElements')]
+        self.assertEqual(['1', '2'], [line.split()[0] for line in elements])
+        self.assertEqual(mesh.triangles[0].tolist(), [int(k) - 1 for k in elements[0].split()[5:]])
+
+
+class ImportMeshTest(unittest.TestCase):
+    def test_import_like_p1(self):
+        expected = Graph()
+        expected.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        P1().apply(expected, list(expected.nodes()))
+
+        graph = Graph()
+        mesh = Mesh(None, np.array([(0, 0), (1, 0), (0, 1), (1, 1)]), np.array([[2, 3, 0], [3, 1, 0]]))
+        imported = import_mesh(graph, mesh)
+
+        self.assertTrue(is_structurally_equal(expected, graph))
+        self.assertEqual(2, len(imported.interiors))
+        self.assertEqual(['I', 'I'], [graph.nodes[v]['label'] for v in imported.interiors])
+
+    def test_existing_root(self):
+        expected = Graph()
+        expected.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        P1().apply(expected, list(expected.nodes()))
+
+        graph = Graph()
+        root = gen_name()
+        graph.add_node(root, layer=0, position=(0.5, 0.5), label='E')
+        mesh = Mesh(None, np.array([(0, 0), (1, 0), (0, 1), (1, 1)]), np.array([[2, 3, 0], [3, 1, 0]]))
+        imported = import_mesh(graph, mesh, root=root)
+
+        self.assertTrue(is_structurally_equal(expected, graph))
+        self.assertEqual('e', graph.nodes[root]['label'])
+        self.assertEqual({root}, {u for i in imported.interiors for u in graph[i] if graph.nodes[u]['layer'] == 0})
+        with self.assertRaises(ValueError):
+            import_mesh(graph, mesh, layer=2, root=root)
+
+    def test_read_written(self):
+        graph = derivation_a_graph()
+        mesh = layer_mesh(graph, 2)
+        for write, read in [(write_obj, read_obj), (write_msh, read_msh)]:
+            file = io.StringIO()
+            write(mesh, file)
+            file.seek(0)
+            read_mesh = read(file)
+
+            self.assertEqual(mesh.points.tolist(), read_mesh.points.tolist())
+            self.assertEqual(mesh.triangles.tolist(), read_mesh.triangles.tolist())
+
+    def test_obj_faces(self):
+        mesh = read_obj(io.StringIO('# square\nv 0 0 0\nv 1 0 0\nv 1 1 0\nf 1/1 2/2 3/3\nf -3 -1 -2\n'))
+
+        self.assertEqual([[0, 1, 2], [0, 2, 1]], mesh.triangles.tolist())
+
+
+class LeafMeshTest(unittest.TestCase):
+    def test_leaves_of_derivation_a(self):
+        graph = derivation_a_graph()
+        for hierarchy in [False, True]:
+            mesh = leaf_mesh(graph, hierarchy=hierarchy)
+
+            self.assertEqual((4, 2), mesh.points.shape)
+            self.assertEqual((2, 3), mesh.triangles.shape)
+            self.assertEqual({2}, {graph.nodes[v]['layer'] for v in mesh.interiors})
+
+    def test_leaves_on_different_layers(self):
+        graph = Graph()
+        graph.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        [i1, i2] = P1().apply(graph, list(graph.nodes()))
+        P9().apply(graph, [i1])
+
+        mesh = leaf_mesh(graph)
+
+        self.assertEqual(['I', 'I'], [graph.nodes[v]['label'] for v in mesh.interiors])
+        self.assertEqual([1, 2], sorted(graph.nodes[v]['layer'] for v in mesh.interiors))
+        self.assertEqual((4, 2), mesh.points.shape)
+        self.assertTrue(np.all(signed_areas(mesh.points[mesh.triangles]) > 0))
+        self.assertEqual(len(leaf_mesh(graph, hierarchy=True).interiors), 2)
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from agh_graphs.ordering import morton_codes, hilbert_codes, spatial_order, layer_order, partition_layer, compact
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import derivation_a_graph
+
+
+class OrderingTest(unittest.TestCase):
+    def test_morton_codes(self):
+        codes = morton_codes([(0, 0), (1, 0), (0, 1), (1, 1), (0.5, 0.5)], bits=1)
+        np.testing.assert_array_equal(codes, [0, 1, 2, 3, 0])
+
+        codes = morton_codes([(0, 0), (3, 0), (0, 3), (1, 2)], bits=2)
+        np.testing.assert_array_equal(codes, [0, 5, 10, 9])
+
+    def test_compact(self):
+        graph = derivation_a_graph()
+
+        compacted, mapping = compact(graph)
+
+        self.assertEqual(list(range(13)), list(compacted.nodes()))
+        self.assertEqual(set(graph.nodes()), set(mapping))
+        layers = [layer for _, layer in compacted.nodes(data='layer')]
+        self.assertEqual(sorted(layers), layers)
+        for v in compacted.nodes():
+            self.assertEqual(sorted(compacted.neighbors(v)), list(compacted.neighbors(v)))
+        self.assertTrue(is_structurally_equal(graph, compacted))
+
+    def test_spatial_order(self):
+        graph = derivation_a_graph()
+        order = spatial_order(graph)
+
+        positions = [graph.nodes[v]['position'] for v in order if graph.nodes[v]['layer'] == 1]
+        self.assertEqual([(0, 0), (1, 0), (2 / 3, 1 / 3), (1 / 3, 2 / 3), (0, 1), (1, 1)], positions)
+
+    def test_hilbert_codes(self):
+        codes = hilbert_codes([(0, 0), (0, 1), (1, 1), (1, 0)], bits=1)
+        np.testing.assert_array_equal(codes, [0, 1, 2, 3])
+
+        xy = [(x, y) for x in range(4) for y in range(4)]
+        order = np.argsort(hilbert_codes(xy, bits=2))
+        path = np.array(xy)[order]
+        # consecutive cells on the Hilbert curve are adjacent
+        self.assertTrue(np.all(np.abs(np.diff(path, axis=0)).sum(axis=1) == 1))
+
+    def test_layer_order(self):
+        graph = derivation_a_graph()
+
+        order = layer_order(graph, 2, labels=('E',), curve='hilbert')
+        positions = [graph.nodes[v]['position'] for v in order]
+        self.assertEqual([(0, 0), (0, 1), (1, 1), (1, 0)], positions)
+
+        parts = partition_layer(graph, 2, 2, labels=('E',), curve='hilbert')
+        self.assertEqual([order[:2], order[2:]], parts)
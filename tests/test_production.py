@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.checkpoint import Checkpointing, load_checkpoint
+from agh_graphs.derivations.derivation_a import derivation_a_macro
+from agh_graphs.graph import LayeredGraph, layer_view
+from agh_graphs.production import Production, Step, StepHook, SequenceRun, apply_sequence
+from agh_graphs.spill import Retaining
+from agh_graphs.stream import stream_sequence
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph, UNIT_SQUARE as POSITIONS
+
+
+class Recording(StepHook):
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.top_layers = []
+
+    def start(self, run):
+        self.events.append(('start', self.name))
+
+    def before_step(self, run, step, step_input):
+        self.events.append(('before', self.name))
+
+    def after_step(self, run, step, step_input, step_output):
+        self.events.append(('after', self.name))
+        self.top_layers.append(run.top_layer)
+
+    def finish(self, run):
+        self.events.append(('finish', self.name))
+
+    def close(self, run):
+        self.events.append(('close', self.name))
+
+
+class Failing(Production):
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        raise RuntimeError('failed')
+
+
+class SequenceRunTest(unittest.TestCase):
+    def test_hooks(self):
+        events = []
+        a = Recording('a', events)
+        b = Recording('b', events)
+        graph = initial_graph()
+
+        outputs = apply_sequence(graph, derivation_a_macro().steps, list(graph.nodes()), [a, b], positions=POSITIONS)
+
+        self.assertEqual(4, len(outputs))
+        self.assertEqual([('start', 'a'), ('start', 'b'), ('before', 'a'), ('before', 'b'), ('after', 'b'),
+                          ('after', 'a')], events[:6])
+        self.assertEqual([('finish', 'b'), ('finish', 'a'), ('close', 'b'), ('close', 'a')], events[-4:])
+        self.assertEqual([1, 2, 2, 2], a.top_layers)
+
+    def test_failing_step(self):
+        events = []
+        graph = initial_graph()
+        run = SequenceRun(graph, [Step(Failing(), [(-1, 0)])], list(graph.nodes()), [Recording('a', events)])
+
+        with self.assertRaises(RuntimeError):
+            run.run()
+        self.assertEqual([('start', 'a'), ('before', 'a'), ('close', 'a')], events)
+
+    def test_combined_hooks(self):
+        steps = derivation_a_macro().steps
+        expected = initial_graph(Graph())
+        apply_sequence(expected, steps, list(expected.nodes()), positions=POSITIONS)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.npz')
+            graph = initial_graph(LayeredGraph())
+            deltas = list(stream_sequence(graph, steps, list(graph.nodes()),
+                                          hooks=[Checkpointing(path, interval=1), Retaining(keep=[0, -1])],
+                                          positions=POSITIONS))
+            self.assertEqual(4, len(load_checkpoint(path, Graph())[1]))
+
+        self.assertEqual(4, len(deltas))
+        self.assertEqual([0, 2], sorted(graph.layers))
+        self.assertTrue(is_structurally_equal(layer_view(expected, 2), layer_view(graph, 2)))
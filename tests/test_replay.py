@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from agh_graphs.derivations.derivation_a import DerivationA, derivation_a_macro
+from agh_graphs.replay import compile_derivation
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph
+
+
+class MacroDerivation:
+    def run(self, graph, p1_positions):
+        derivation_a_macro().apply(graph, list(graph.nodes()), positions=p1_positions)
+
+
+class ReplayTest(unittest.TestCase):
+    def test_derivation_a(self):
+        compiled = compile_derivation(DerivationA(), initial_graph())
+        sets = [
+            [(0, 0), (1, 0), (0, 1), (1, 1)],
+            [(0, 0), (2, 0), (0, 3), (2, 3)],
+            [(-1.5, 0.5), (1, 0), (0, 2), (1.25, 2)],
+        ]
+        batch = compiled.positions(sets)
+        self.assertEqual((3, 13, 2), batch.shape)
+
+        for k, positions in enumerate(sets):
+            expected = initial_graph()
+            DerivationA().run(expected, positions)
+
+            self.assertTrue(is_structurally_equal(expected, compiled.to_graph(positions)))
+            self.assertTrue(np.allclose(batch[k], compiled.positions(positions)))
+
+    def test_constant_positions(self):
+        compiled = compile_derivation(DerivationA(), initial_graph())
+        layer_0 = compiled.positions([(0, 0), (5, 0), (0, 5), (5, 5)])[compiled.layers == 0]
+
+        self.assertEqual([[0.5, 0.5]], layer_0.tolist())
+
+    def test_macro_production(self):
+        positions = [(5, 5), (7, 5), (5, 8), (7, 8)]
+        expected = initial_graph()
+        DerivationA().run(expected, positions)
+
+        for derivation in [MacroDerivation(), DerivationA(fused=True)]:
+            compiled = compile_derivation(derivation, initial_graph())
+            self.assertTrue(is_structurally_equal(expected, compiled.to_graph(positions)))
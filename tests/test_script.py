@@ -0,0 +1,69 @@
+import contextlib
+import json
+import io
+import os
+import tempfile
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.__main__ import main
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.graph import LayeredGraph
+from agh_graphs.script import run_script, format_report
+from agh_graphs.spill import Retaining
+from agh_graphs.storage import load_graph
+from agh_graphs.utils import gen_name, is_structurally_equal
+from tests.helpers import DERIVATION_A
+
+
+class ScriptTest(unittest.TestCase):
+    def test_derivation_a(self):
+        expected = Graph()
+        expected.add_node(gen_name(), layer=0, position=(0.5, 0.5), label='E')
+        DerivationA().run(expected, [(0, 0), (1, 0), (0, 1), (1, 1)])
+
+        graph, reports = run_script(DERIVATION_A)
+
+        self.assertIsInstance(graph, LayeredGraph)
+        self.assertTrue(is_structurally_equal(expected, graph))
+        self.assertEqual(['P1', 'P9', 'P9', 'P12'], [r.production for r in reports])
+        self.assertEqual([7, 11, 15, 13], [r.nodes for r in reports])
+        totals = [line.split() for line in format_report(reports).splitlines() if line.startswith('P9 ')]
+        self.assertEqual([['P9', '2']], [fields[:2] for fields in totals])
+
+    def test_hooks(self):
+        graph, reports = run_script(DERIVATION_A, hooks=[Retaining(keep=[0, -1])])
+
+        self.assertEqual([0, 2], sorted(graph.layers))
+        self.assertEqual(4, len(reports))
+
+    def test_list_without_index(self):
+        script = dict(DERIVATION_A, steps=DERIVATION_A['steps'][:1] + [{'production': 'P9', 'inputs': ['p1']}])
+        with self.assertRaises(ValueError):
+            run_script(script)
+
+    def test_ambiguous_query(self):
+        script = dict(DERIVATION_A, steps=DERIVATION_A['steps'][:1] + [
+            {'production': 'P9', 'inputs': [{'layer': 1, 'label': 'I'}]}
+        ])
+        with self.assertRaises(ValueError):
+            run_script(script)
+
+        script['steps'][1]['inputs'][0]['near'] = [0.1, 0.9]
+        graph, _ = run_script(script)
+        self.assertEqual(11, len(graph))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script_path = os.path.join(directory, 'derivation.json')
+            output_path = os.path.join(directory, 'result.npz')
+            with open(script_path, 'w') as f:
+                json.dump(DERIVATION_A, f)
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(['run', script_path, '--output', output_path])
+
+            self.assertIn('4 steps, 13 vertexes, 26 edges', output.getvalue())
+            self.assertEqual(13, len(load_graph(output_path)))
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+from networkx import Graph
+
+from agh_graphs.derivations.derivation_a import derivation_a_macro
+from agh_graphs.graph import LayeredGraph, layer_view
+from agh_graphs.checkpoint import Checkpointing
+from agh_graphs.production import Production, Step, apply_sequence
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p9 import P9
+from agh_graphs.spill import SpilledLayers, Spilling, run_spilling, frozen_below, run_retaining, is_retained
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph
+
+POSITIONS = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+
+class Failing(Production):
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        raise RuntimeError('killed')
+
+
+class SpillTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_derivation_a(self):
+        steps = derivation_a_macro().steps
+        expected = initial_graph(Graph())
+        apply_sequence(expected, steps, list(expected.nodes()), positions=POSITIONS)
+
+        graph = initial_graph(LayeredGraph())
+        [root] = graph.nodes()
+        outputs, spilled = run_spilling(graph, steps, [root], self.directory.name, positions=POSITIONS)
+
+        self.assertIn(0, spilled)
+        self.assertNotIn(root, graph)
+        self.assertEqual({1, 2}, {layer for _, layer in graph.nodes(data='layer')})
+        self.assertEqual({root: 'e'}, dict(spilled.layer_graph(0).nodes(data='label')))
+        self.assertEqual({(root, v) for v in outputs[0]}, set(spilled.cross_edges(0)))
+        self.assertTrue(is_structurally_equal(expected, spilled.restore(graph)))
+
+    def test_cross_edges(self):
+        expected = initial_graph(Graph())
+        [i1, _] = P1().apply(expected, list(expected.nodes()), positions=POSITIONS)
+        P9().apply(expected, [i1])
+
+        graph = initial_graph(LayeredGraph())
+        [i1, _] = P1().apply(graph, list(graph.nodes()), positions=POSITIONS)
+        [i3] = P9().apply(graph, [i1])
+        spilled = SpilledLayers(self.directory.name)
+        spilled.spill(graph, 0)
+        spilled.spill(graph, 1)
+
+        self.assertEqual([(i1, i3)], spilled.cross_edges(1))
+        self.assertEqual(11, len(spilled.layer_graph(1).edges()))
+        self.assertTrue(is_structurally_equal(expected, spilled.restore(graph)))
+
+    def test_resume(self):
+        steps = derivation_a_macro().steps
+        expected = initial_graph(Graph())
+        apply_sequence(expected, steps, list(expected.nodes()), positions=POSITIONS)
+        path = os.path.join(self.directory.name, 'checkpoint.npz')
+        layers = os.path.join(self.directory.name, 'layers')
+
+        graph = initial_graph(LayeredGraph())
+        with self.assertRaises(RuntimeError):
+            apply_sequence(graph, steps[:3] + [Step(Failing(), [])], list(graph.nodes()),
+                           [Checkpointing(path, interval=1), Spilling(layers)], positions=POSITIONS)
+
+        resumed = LayeredGraph()
+        spilling = Spilling(layers)
+        apply_sequence(resumed, steps, ['unused'], [Checkpointing(path, interval=1), spilling], positions=POSITIONS)
+
+        self.assertIn(0, spilling.spilled)
+        self.assertEqual(1, spilling.next_layer)
+        self.assertEqual(['layer_0'], os.listdir(layers))
+        self.assertTrue(is_structurally_equal(expected, spilling.spilled.restore(resumed)))
+
+    def test_frozen_below(self):
+        steps = derivation_a_macro().steps
+        graph = initial_graph(Graph())
+        [root] = graph.nodes()
+
+        self.assertEqual(0, frozen_below(graph, steps, [root], []))
+        outputs = apply_sequence(graph, steps[:1], [root], positions=POSITIONS)
+        self.assertEqual(1, frozen_below(graph, steps, [root], outputs))
+        self.assertIsNone(frozen_below(graph, steps, [root], outputs + [[]] * 3))
+
+
+class CountingP9(P9):
+    def __init__(self, layer_counts):
+        self.layer_counts = layer_counts
+
+    def apply(self, graph, prod_input, orientation=0, **kwargs):
+        self.layer_counts.append(len(graph.layers))
+        return super().apply(graph, prod_input, orientation, **kwargs)
+
+
+class RetentionTest(unittest.TestCase):
+    def test_keep_root_and_last(self):
+        steps = derivation_a_macro().steps
+        expected = initial_graph(Graph())
+        apply_sequence(expected, steps, list(expected.nodes()), positions=POSITIONS)
+
+        graph = initial_graph(LayeredGraph())
+        [root] = graph.nodes()
+        outputs = run_retaining(graph, steps, [root], keep=[0, -1], positions=POSITIONS)
+
+        self.assertEqual([0, 2], sorted(graph.layers))
+        self.assertTrue(is_structurally_equal(layer_view(expected, 2), layer_view(graph, 2)))
+        self.assertEqual(set(outputs[1] + outputs[2]), set(graph.adj[root]))
+
+    def test_constant_number_of_layers(self):
+        graph = initial_graph(LayeredGraph())
+        [root] = graph.nodes()
+        layer_counts = []
+        steps = [Step(P1(), [(-1, 0)])] + [Step(CountingP9(layer_counts), [(k, 0)]) for k in range(8)]
+
+        outputs = run_retaining(graph, steps, [root], keep_last=1, positions=POSITIONS)
+
+        self.assertEqual([9], list(graph.layers))
+        self.assertEqual({'I'}, {label for _, label in graph.nodes(data='label') if label in ('I', 'i')})
+        self.assertIn(outputs[-1][0], graph)
+        self.assertLessEqual(max(layer_counts), 2)
+
+    def test_is_retained(self):
+        self.assertTrue(is_retained(3, 5))
+        self.assertTrue(is_retained(4, 5, keep_last=2))
+        self.assertFalse(is_retained(3, 5, keep_last=2))
+        self.assertTrue(is_retained(0, 5, keep=[0, -1]))
+        self.assertTrue(is_retained(5, 5, keep=[0, -1]))
+        self.assertFalse(is_retained(4, 5, keep=[0, -1]))
@@ -0,0 +1,96 @@
+import io
+import tempfile
+import unittest
+
+import numpy as np
+from networkx import Graph
+
+from agh_graphs.graph import LayeredGraph, layer_view
+from agh_graphs.storage import save_graph, load_graph, save_columnar, ColumnarGraph
+from agh_graphs.utils import exact_position
+from tests.helpers import derivation_a_graph
+
+
+class StorageTest(unittest.TestCase):
+    def test_round_trip(self):
+        graph = derivation_a_graph()
+
+        file = io.BytesIO()
+        save_graph(graph, file)
+        file.seek(0)
+        loaded = load_graph(file, LayeredGraph())
+
+        self.assertEqual(dict(graph.nodes(data=True)), dict(loaded.nodes(data=True)))
+        self.assertEqual({frozenset(e) for e in graph.edges()}, {frozenset(e) for e in loaded.edges()})
+        self.assertEqual(len(loaded.layer_nodes(2)), 6)
+
+    def test_integer_ids(self):
+        graph = Graph()
+        graph.add_node(3, layer=0, position=(0, 0), label='E')
+        graph.add_node(7, layer=0, position=(1, 0), label='E')
+        graph.add_edge(3, 7)
+
+        file = io.BytesIO()
+        save_graph(graph, file)
+        file.seek(0)
+        loaded = load_graph(file)
+
+        self.assertEqual([3, 7], list(loaded.nodes()))
+        self.assertTrue(loaded.has_edge(3, 7))
+
+    def test_exact_positions(self):
+        graph = Graph()
+        graph.add_node('a', layer=0, position=exact_position((0.5, 0.5)), label='E')
+
+        with self.assertRaises(ValueError):
+            save_graph(graph, io.BytesIO())
+
+    def test_mixed_ids(self):
+        graph = Graph()
+        graph.add_node(3, layer=0, position=(0, 0), label='E')
+        graph.add_node('3', layer=0, position=(1, 0), label='E')
+
+        with self.assertRaises(ValueError):
+            save_graph(graph, io.BytesIO())
+
+
+class ColumnarTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        graph = derivation_a_graph()
+        save_columnar(graph, self.directory.name)
+        columnar = ColumnarGraph(self.directory.name)
+
+        self.assertEqual(13, len(columnar))
+        self.assertEqual([0, 1, 2], columnar.layers)
+        self.assertIsInstance(columnar.columns['x'], np.memmap)
+        loaded = columnar.to_graph()
+        self.assertEqual(dict(graph.nodes(data=True)), dict(loaded.nodes(data=True)))
+        self.assertEqual({frozenset(e) for e in graph.edges()}, {frozenset(e) for e in loaded.edges()})
+
+    def test_layer_graph(self):
+        graph = derivation_a_graph()
+        save_columnar(graph, self.directory.name)
+        columnar = ColumnarGraph(self.directory.name)
+
+        layer = columnar.layer_graph(2)
+        expected = layer_view(graph, 2)
+        self.assertEqual(dict(expected.nodes(data=True)), dict(layer.nodes(data=True)))
+        self.assertEqual({frozenset(e) for e in expected.edges()}, {frozenset(e) for e in layer.edges()})
+        self.assertEqual(0, len(columnar.layer_graph(5)))
+
+    def test_integer_ids(self):
+        graph = Graph()
+        graph.add_node(0, layer=0, position=(0, 0), label='E')
+        graph.add_node(1, layer=0, position=(1, 0), label='E')
+        graph.add_edge(0, 1)
+        save_columnar(graph, self.directory.name)
+        columnar = ColumnarGraph(self.directory.name)
+
+        self.assertNotIn('ids', columnar.columns)
+        self.assertEqual([1], columnar.neighbors(0).tolist())
@@ -0,0 +1,56 @@
+import unittest
+
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.productions.p12 import P12
+from agh_graphs.productions.p1 import P1
+from agh_graphs.utils import is_structurally_equal
+from tests.helpers import initial_graph
+
+
+class StreamTest(unittest.TestCase):
+    def test_replay_deltas(self):
+        graph = initial_graph()
+        replayed = graph.copy()
+
+        deltas = list(DerivationA.stream(graph, [(0, 0), (2, 0), (0, 1), (2, 1)]))
+
+        self.assertEqual(4, len(deltas))
+        self.assertIsInstance(deltas[0].production, P1)
+        self.assertIsInstance(deltas[3].production, P12)
+        for delta in deltas:
+            self.apply_delta(replayed, delta)
+        self.assertTrue(is_structurally_equal(graph, replayed))
+        self.assertEqual(set(graph.nodes()), set(replayed.nodes()))
+
+    def test_p1_delta(self):
+        graph = initial_graph()
+        [root] = graph.nodes()
+
+        delta = next(DerivationA.stream(graph, [(0, 0), (1, 0), (0, 1), (1, 1)]))
+
+        self.assertEqual([root], delta.inputs)
+        self.assertEqual({root: 'e'}, delta.relabels)
+        self.assertEqual(6, len(delta.created_nodes))
+        self.assertEqual(13, len(delta.created_edges))
+        self.assertEqual([], delta.removed_nodes)
+
+    def test_p12_merges(self):
+        graph = initial_graph()
+
+        *_, delta = DerivationA.stream(graph, [(0, 0), (1, 0), (0, 1), (1, 1)])
+
+        self.assertEqual(2, len(delta.removed_nodes))
+        self.assertEqual(set(delta.removed_nodes), set(delta.merged_nodes))
+        self.assertTrue(all(v in graph for v in delta.merged_nodes.values()))
+        self.assertTrue(all(graph.has_edge(*e) for e in delta.created_edges))
+
+    @staticmethod
+    def apply_delta(graph, delta):
+        graph.add_nodes_from((v, dict(data)) for v, data in delta.created_nodes.items())
+        graph.remove_edges_from(e for e in delta.removed_edges if graph.has_edge(*e))
+        graph.add_edges_from(delta.created_edges)
+        for v, label in delta.relabels.items():
+            graph.nodes[v]['label'] = label
+        for v, position in delta.moves.items():
+            graph.nodes[v]['position'] = position
+        graph.remove_nodes_from(delta.removed_nodes)
@@ -0,0 +1,79 @@
+import io
+import os
+import pickle
+import tempfile
+import unittest
+
+from agh_graphs.derivations.derivation_a import DerivationA
+from agh_graphs.sweep import Sweep, derivation_task, script_task, load_results, serialized_graph, parameters_key, \
+    canonical_parameters
+from agh_graphs.storage import load_graph
+from tests.helpers import DERIVATION_A
+
+SQUARES = [[(0, 0), (k, 0), (0, 1), (k, 1)] for k in range(1, 7)]
+
+
+class SweepTest(unittest.TestCase):
+    def test_derivation_task(self):
+        parameters = [{'derivation_class': DerivationA, 'p1_positions': p} for p in SQUARES]
+        results = dict(Sweep(derivation_task, parameters, max_workers=2, max_in_flight=3).run())
+
+        self.assertEqual(set(range(len(SQUARES))), set(results))
+        self.assertEqual({13}, {r['nodes'] for r in results.values()})
+        self.assertEqual(len(SQUARES), len({r['hash'] for r in results.values()}))
+        self.assertEqual(2, results[0]['labels'][(2, 'I')])
+        self.assertEqual(results[2], derivation_task(DerivationA, SQUARES[2]))
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.pickle')
+            parameters = [{'script': DERIVATION_A, 'kwargs': {'positions': p}} for p in SQUARES]
+
+            sweep = Sweep(script_task, parameters, results_path=path, max_workers=2, max_in_flight=2)
+            first = []
+            for k, result in sweep.run():
+                first.append(k)
+                if len(first) == 2:
+                    sweep.cancel()
+            self.assertLess(len(first), len(SQUARES))
+            self.assertEqual({parameters_key(parameters[k]) for k in first}, set(load_results(path)))
+
+            with open(path, 'ab') as file:
+                file.write(b'\x80\x04truncated')
+            # resuming matches parameters by their keys, not by their indexes, and
+            # parameters which differ only in key order or sequence types have equal keys
+            reordered = [{'kwargs': {'positions': [list(v) for v in p]}, 'script': DERIVATION_A} for p in SQUARES[::-1]]
+            rest = [reordered[k] for k, _ in Sweep(script_task, reordered, results_path=path, max_workers=2).run()]
+
+            resumed = [parameters[k] for k in first] + rest
+            self.assertCountEqual(map(parameters_key, parameters), map(parameters_key, resumed))
+            results = load_results(path)
+            self.assertEqual(len(SQUARES), len(results))
+            for params in parameters:
+                stored_params, result = results[parameters_key(params)]
+                self.assertEqual(canonical_parameters(params), canonical_parameters(stored_params))
+                self.assertEqual(script_task(**params), result)
+
+    def test_parameters_key(self):
+        self.assertEqual(parameters_key({'a': 1, 'b': (1, (2, 3))}), parameters_key({'b': [1, [2, 3]], 'a': 1}))
+        self.assertEqual(parameters_key({'kwargs': {'x': 1, 'y': 2}}), parameters_key({'kwargs': {'y': 2, 'x': 1}}))
+        self.assertNotEqual(parameters_key({'a': 1, 'b': (1, 2)}), parameters_key({'a': 1, 'b': (2, 1)}))
+        self.assertIn('DerivationA', canonical_parameters({'derivation_class': DerivationA}))
+        with self.assertRaises(TypeError):
+            parameters_key({'a': object()})
+
+    def test_different_stored_parameters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.pickle')
+            parameters = [{'script': DERIVATION_A, 'kwargs': {'positions': p}} for p in SQUARES[:1]]
+            with open(path, 'wb') as file:
+                pickle.dump((parameters_key(parameters[0]), {'script': DERIVATION_A}, None), file)
+
+            with self.assertRaises(ValueError):
+                list(Sweep(script_task, parameters, results_path=path, max_workers=1).run())
+
+    def test_serialized_results(self):
+        parameters = [{'derivation_class': DerivationA, 'p1_positions': SQUARES[0], 'summary': serialized_graph}]
+        [(_, data)] = Sweep(derivation_task, parameters, max_workers=1).run()
+
+        self.assertEqual(13, len(load_graph(io.BytesIO(data))))
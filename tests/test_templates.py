@@ -0,0 +1,98 @@
+import unittest
+
+from agh_graphs.productions.p1 import P1
+from agh_graphs.productions.p2 import P2
+from agh_graphs.productions.p5 import P5
+from agh_graphs.productions.p9 import P9
+from agh_graphs.templates import stamp, triangle_matches, p5_matches, p1_template, p2_template, p5_template, \
+    p9_template
+from agh_graphs.utils import add_break_in_segment, is_close, is_structurally_equal, exact_position
+from tests.helpers import initial_graph, triangle_graph
+
+
+class TemplatesTest(unittest.TestCase):
+    def test_p1(self):
+        positions = [(0, 0), (2, 0), (0, 1), (2, 1)]
+        stamped = initial_graph()
+        expected = initial_graph()
+
+        [[i1, i2]] = stamp(stamped, p1_template(), [list(stamped.nodes())], positions=[positions])
+        P1().apply(expected, list(expected.nodes()), positions=positions)
+
+        self.assertEqual(stamped.nodes[i1]['label'], 'I')
+        self.assertEqual(stamped.nodes[i2]['layer'], 1)
+        self.assertTrue(is_structurally_equal(stamped, expected))
+
+    def test_p9_many(self):
+        stamped = initial_graph()
+        expected = initial_graph()
+        stamped_interiors = P1().apply(stamped, list(stamped.nodes()))
+        expected_interiors = P1().apply(expected, list(expected.nodes()))
+
+        outputs = stamp(stamped, p9_template(), triangle_matches(stamped, stamped_interiors))
+        for i in expected_interiors:
+            P9().apply(expected, [i])
+
+        self.assertEqual(outputs.shape, (2, 1))
+        self.assertTrue(is_structurally_equal(stamped, expected))
+
+    def test_p2(self):
+        stamped, [e1, e2, e3, i] = triangle_graph((0.0, 0.0), (2.0, 0.0), (1.0, 3.0))
+        expected, _ = triangle_graph((0.0, 0.0), (2.0, 0.0), (1.0, 3.0))
+
+        stamp(stamped, p2_template(), [[e1, e2, e3, i]])
+        P2().apply(expected, [[v for v, label in expected.nodes(data='label') if label == 'I'][0]])
+
+        self.assertTrue(is_structurally_equal(stamped, expected))
+
+    def test_p5(self):
+        stamped, [e1, e2, e3, i] = triangle_graph((0.0, 0.0), (1.0, 2.0), (3.0, 0.0))
+        expected, _ = triangle_graph((0.0, 0.0), (1.0, 2.0), (3.0, 0.0))
+        breaks = []
+        for graph in [stamped, expected]:
+            [a, b, c] = [v for v, label in graph.nodes(data='label') if label == 'E']
+            breaks.append([add_break_in_segment(graph, s) for s in [(a, b), (b, c), (c, a)]])
+
+        stamp(stamped, p5_template(), [[e1, e2, e3] + breaks[0] + [i]])
+        P5().apply(expected, [[v for v, label in expected.nodes(data='label') if label == 'I'][0]])
+
+        self.assertTrue(is_structurally_equal(stamped, expected))
+
+    def test_p2_matches(self):
+        # corners in clockwise order, so the order of neighbors is not the one of P2
+        for orientation in range(3):
+            stamped, [_, _, _, i] = triangle_graph((0.0, 0.0), (1.0, 3.0), (2.5, 0.0))
+            expected, [_, _, _, expected_i] = triangle_graph((0.0, 0.0), (1.0, 3.0), (2.5, 0.0))
+
+            [outputs] = stamp(stamped, p2_template(), triangle_matches(stamped, [i], orientation))
+            expected_outputs = P2().apply(expected, [expected_i], orientation)
+
+            self.assertTrue(is_structurally_equal(stamped, expected))
+            # P2 returns its interiors sorted by coordinates
+            positions = sorted(stamped.nodes[v]['position'] for v in outputs)
+            expected_positions = sorted(expected.nodes[v]['position'] for v in expected_outputs)
+            for position, expected_position in zip(positions, expected_positions):
+                self.assertTrue(is_close(position, expected_position))
+
+    def test_p5_matches(self):
+        for orientation in range(3):
+            graphs = []
+            for _ in range(2):
+                graph, [a, b, c, i] = triangle_graph((0.0, 0.0), (1.0, 2.0), (3.0, 0.0))
+                for s in [(a, b), (b, c), (c, a)]:
+                    add_break_in_segment(graph, s)
+                graphs.append((graph, i))
+            (stamped, i), (expected, expected_i) = graphs
+
+            [outputs] = stamp(stamped, p5_template(), p5_matches(stamped, [i], orientation))
+            expected_outputs = P5().apply(expected, [expected_i], orientation)
+
+            self.assertTrue(is_structurally_equal(stamped, expected))
+            for v, expected_v in zip(outputs, expected_outputs):
+                self.assertTrue(is_close(stamped.nodes[v]['position'], expected.nodes[expected_v]['position']))
+
+    def test_exact_positions(self):
+        graph, [e1, e2, e3, i] = triangle_graph(*(exact_position(p) for p in [(0, 0), (2, 0), (1, 3)]))
+
+        with self.assertRaises(ValueError):
+            stamp(graph, p9_template(), [[e1, e2, e3, i]])
@@ -1,8 +1,12 @@
 import unittest
+from fractions import Fraction
 
+import numpy as np
 from networkx import Graph
 
-from agh_graphs.utils import sort_segments_by_angle, angle_with_x_axis
+from agh_graphs.utils import sort_segments_by_angle, angle_with_x_axis, exact_position, to_exact_positions, \
+    add_break_in_segment, is_exact, find_overlapping_vertices, group_by_position, centroid, centroids, \
+    segment_angles, edge_lengths, longest_edge, signed_areas, ccw_order, vertex_pulls, get_vertex_pull, merge_vertices
 
 
 class UtilsTest(unittest.TestCase):
@@ -33,3 +37,68 @@ class UtilsTest(unittest.TestCase):
         self.assertEqual(('b', 'a'), sorted_segments[0])
         self.assertEqual(('a', 'c'), sorted_segments[1])
         self.assertEqual(('b', 'c'), sorted_segments[2])
+
+    def test_exact_positions(self):
+        graph = Graph()
+        graph.add_node('a', layer=1, position=exact_position((0.1, 0)), label='E')
+        graph.add_node('b', layer=1, position=exact_position((0.2, 1)), label='E')
+        graph.add_edge('a', 'b')
+        to_exact_positions(graph)
+
+        v = add_break_in_segment(graph, ('a', 'b'))
+        self.assertTrue(is_exact(graph.nodes[v]['position']))
+        self.assertEqual(Fraction(0.1) / 2 + Fraction(0.2) / 2, graph.nodes[v]['position'][0])
+
+        graph.add_node('c', layer=1, position=graph.nodes[v]['position'], label='E')
+        self.assertEqual(sorted([('c', v), (v, 'c')]), sorted(find_overlapping_vertices(graph)))
+        self.assertEqual(['a'], group_by_position(graph)[(1, exact_position((0.1, 0)))])
+        self.assertFalse(is_exact((0, 1)))
+
+    def test_batch_geometry(self):
+        tri_xy = np.array([
+            [(0, 0), (1, 0), (0, 1)],
+            [(0, 0), (0, 2), (3, 0)],
+        ])
+        np.testing.assert_allclose(centroids(tri_xy), [centroid(*t) for t in tri_xy])
+        np.testing.assert_allclose(segment_angles(tri_xy[:, :2]), [angle_with_x_axis(*t[:2]) for t in tri_xy])
+        np.testing.assert_allclose(edge_lengths(tri_xy), [[1, np.sqrt(2), 1], [2, np.sqrt(13), 3]])
+        np.testing.assert_array_equal(longest_edge(tri_xy), [1, 1])
+        np.testing.assert_allclose(signed_areas(tri_xy), [0.5, -3])
+        np.testing.assert_array_equal(ccw_order(tri_xy), [[0, 1, 2], [0, 2, 1]])
+
+    def test_vertex_pulls(self):
+        graph = Graph()
+        graph.add_node('a', layer=0, position=(0, 0), label='x')
+        graph.add_node('b', layer=0, position=(2, 0), label='x')
+        graph.add_node('c', layer=0, position=(0, 4), label='x')
+        graph.add_edge('a', 'b')
+        graph.add_edge('a', 'c')
+
+        pulls = vertex_pulls([(0, 0), (2, 0), (0, 4)], [(0, 1), (0, 2)])
+        for v, pull in zip(['a', 'b', 'c'], pulls):
+            np.testing.assert_allclose(pull, get_vertex_pull(graph, v))
+
+    def test_merge_vertices(self):
+        graph = Graph()
+        for v, layer in [('a', 1), ('b', 1), ('c', 1), ('d', 1), ('x', 1), ('y', 1), ('p', 0)]:
+            graph.add_node(v, layer=layer, position=(0, 0), label='E')
+        graph.add_edge('b', 'x')
+        graph.add_edge('c', 'y')
+        graph.add_edge('a', 'b')
+        graph.add_edge('d', 'p')
+
+        survivors = merge_vertices(graph, [['a', 'b'], ['c', 'd'], ['b', 'c']], layer=1)
+
+        self.assertEqual({'a': 'a', 'b': 'a', 'c': 'a', 'd': 'a'}, survivors)
+        self.assertEqual(['a', 'x', 'y', 'p'], list(graph.nodes()))
+        self.assertEqual({'x', 'y'}, set(graph.neighbors('a')))
+        self.assertEqual([], list(graph.neighbors('p')))
+
+    def test_merge_overlapping_groups(self):
+        graph = Graph()
+        for v in ['a', 'b', 'c', 'd', 'e', 'f']:
+            graph.add_node(v, layer=1, position=(0, 0), label='E')
+
+        self.assertEqual({'a': 'a', 'b': 'a', 'c': 'a'}, merge_vertices(graph, [['a', 'b'], ['c', 'a']]))
+        self.assertEqual({'d': 'd', 'e': 'd', 'f': 'd'}, merge_vertices(graph, [['d'], ['f', 'e'], ['e', 'd']]))
+        self.assertEqual(['a', 'd'], list(graph.nodes()))